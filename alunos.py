@@ -1,187 +1,432 @@
-import sqlite3
-import streamlit as st
-from datetime import datetime
-import pandas as pd
-
-# Função para criar a tabela de alunos
-def criar_tabela_alunos():
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-
-    c.execute(''' 
-        CREATE TABLE IF NOT EXISTS alunos (
-            matricula INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cpf TEXT NOT NULL UNIQUE,
-            data_nascimento DATE,
-            endereco TEXT,
-            telefone TEXT,
-            email TEXT,
-            unidade TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Função para adicionar um aluno
-def adicionar_aluno(nome, cpf, data_nascimento, endereco, telefone, email, unidade):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM alunos WHERE cpf = ?", (cpf,))
-    aluno_existente = c.fetchone()
-    
-    if aluno_existente:
-        conn.close()
-        return None
-    
-    c.execute(''' 
-        INSERT INTO alunos (nome, cpf, data_nascimento, endereco, telefone, email, unidade)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (nome, cpf, data_nascimento, endereco, telefone, email, unidade))
-    
-    matricula = c.lastrowid
-    conn.commit()
-    conn.close()
-    return matricula
-
-# Função para consultar alunos
-def consultar_alunos():
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute("SELECT matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade FROM alunos")
-    alunos = c.fetchall()
-    conn.close()
-    return alunos
-
-# Função para editar aluno
-def editar_aluno(matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    try:
-        c.execute('''
-            UPDATE alunos
-            SET nome = ?, cpf = ?, data_nascimento = ?, endereco = ?, telefone = ?, email = ?, unidade = ?
-            WHERE matricula = ?
-        ''', (nome, cpf, data_nascimento, endereco, telefone, email, unidade, matricula))
-
-        rows_affected = c.rowcount
-        conn.commit()
-        conn.close()
-
-        print(f"Linhas afetadas na atualização: {rows_affected}")
-        return rows_affected
-    except Exception as e:
-        print(f"Erro ao atualizar cadastro: {e}")
-        conn.rollback()
-        conn.close()
-        return 0
-
-# Função para excluir aluno
-def excluir_aluno(matricula):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM alunos WHERE matricula = ?", (matricula,))
-    conn.commit()
-    conn.close()
-
-# Função para buscar aluno por matrícula, nome ou CPF
-def buscar_aluno(busca_por, valor):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    
-    if busca_por == "Matrícula":
-        c.execute("SELECT * FROM alunos WHERE matricula = ?", (valor,))
-    elif busca_por == "Nome":
-        c.execute("SELECT * FROM alunos WHERE nome LIKE ?", ('%' + valor + '%',))
-    elif busca_por == "CPF":
-        c.execute("SELECT * FROM alunos WHERE cpf = ?", (valor,))
-    
-    aluno = c.fetchone()
-    print(f"Aluno encontrado: {aluno}")  # Log para depuração
-    conn.close()
-    return aluno
-
-# Interface do Streamlit
-st.title("\u2795Cadastros") 
-
-criar_tabela_alunos()  # Certifique-se de que a tabela exista
-tab1, tab2, tab3 = st.tabs(["\U0001F4C1 Dados Gerais", "\U0001F4C1 Inserir", "\U0001F4C1 Editar/Excluir"])
-
-with tab1:
-    st.write("\U0001F4C2Cadastros")
-    alunos = consultar_alunos()
-    
-    if alunos:
-        df_alunos = pd.DataFrame(alunos, columns=["Matrícula", "Nome", "CPF", "Data de Nascimento", "Endereço", "Telefone", "Email", "Unidade"])
-        st.dataframe(df_alunos)
-    else:
-        st.write("Nenhum aluno cadastrado.")
-
-with tab2:
-    st.write("\U0001F4C2Inserir")
-    nome = st.text_input("Nome", key="nome")
-    cpf = st.text_input("CPF", key="cpf")
-    data_nascimento = st.date_input("Data de Nascimento", key="data_nascimento", value=None)
-    endereco = st.text_input("Endereço", key="endereco")
-    telefone = st.text_input("Telefone", key="telefone")
-    email = st.text_input("Email", key="email")
-    unidade = st.selectbox("Unidade", ["Academia I", "Academia II"], key="unidade_input")
-
-    if st.button("\U0001F4E5Inserir", key="botao_cadastrar"):
-        if nome and cpf:
-            matricula = adicionar_aluno(nome, cpf, data_nascimento, endereco, telefone, email, unidade)
-            if matricula:
-                st.success("Aluno cadastrado com sucesso!")
-                st.info(f"Número da Matrícula: {matricula}")
-            else:
-                st.error("Erro: CPF já cadastrado.")
-        else:
-            st.warning("Preencha todos os campos obrigatórios.")
-
-with tab3:
-    st.write("\U0001F4C2Editar Cadastros")
-
-    busca_por = st.selectbox("Buscar por:", ["Matrícula", "Nome", "CPF"], key="busca_por_input")
-    valor_busca = st.text_input("Valor de busca:", key="valor_busca_input")
-
-    if st.button("Buscar Aluno"):
-        if valor_busca:
-            aluno = buscar_aluno(busca_por, valor_busca)
-            if aluno:
-                # Carregar dados do aluno nos campos de entrada
-                st.session_state['matricula'] = aluno[0]
-                st.session_state['edit_nome'] = aluno[1]
-                st.session_state['edit_cpf'] = aluno[2]
-                st.session_state['edit_data_nascimento'] = datetime.strptime(aluno[3], '%Y-%m-%d').date() if aluno[3] else None
-                st.session_state['edit_endereco'] = aluno[4]
-                st.session_state['edit_telefone'] = aluno[5]
-                st.session_state['edit_email'] = aluno[6]
-                st.session_state['edit_unidade'] = aluno[7]
-                st.session_state['editing'] = True  # Marcar que estamos editando
-
-    # Verificar se estamos no modo de edição
-    if 'editing' in st.session_state and st.session_state['editing']:
-        # Criar campos de entrada para edição com valores armazenados
-        nome = st.text_input("Nome", value=st.session_state['edit_nome'], key="edit_nome_input")
-        cpf = st.text_input("CPF", value=st.session_state['edit_cpf'], key="edit_cpf_input")
-        data_nascimento = st.date_input("Data de Nascimento", value=st.session_state['edit_data_nascimento'], key="edit_data_nascimento_input")
-        endereco = st.text_input("Endereço", value=st.session_state['edit_endereco'], key="edit_endereco_input")
-        telefone = st.text_input("Telefone", value=st.session_state['edit_telefone'], key="edit_telefone_input")
-        email = st.text_input("Email", value=st.session_state['edit_email'], key="edit_email_input")
-
-        unidade_opcoes = ["Academia I", "Academia II"]
-        unidade = st.selectbox("Unidade", unidade_opcoes, 
-            index=unidade_opcoes.index(st.session_state['edit_unidade']) if st.session_state['edit_unidade'] in unidade_opcoes else 0, 
-            key="edit_unidade_input")
-
-        # Atualizar cadastro ao clicar no botão
-        if st.button("Atualizar Cadastro"):
-            rows_affected = editar_aluno(st.session_state['matricula'], nome, cpf, data_nascimento, endereco, telefone, email, unidade)
-            
-            if rows_affected > 0:
-                st.success("Cadastro atualizado com sucesso!")
-                st.session_state['editing'] = False  # Desmarcar edição após atualização
-            else:
-                st.error("Erro: Cadastro não foi atualizado. O aluno pode não existir.")
-    else:
-        st.write("Faça uma busca para editar os dados de um aluno.")
+import contextlib
+import itertools
+import re
+import unicodedata
+import streamlit as st
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+import banco
+import busca_alunos
+import catraca
+import componentes
+import escrita
+import migracoes
+import perfil
+
+# Operação do gravador: grava o aluno e devolve a matrícula (None quando o CPF já está cadastrado)
+def _inserir_aluno(conn, nome, cpf, data_nascimento, endereco, telefone, email, unidade):
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM alunos WHERE cpf = ?", (cpf,))
+    aluno_existente = c.fetchone()
+
+    if aluno_existente:
+        return None
+
+    c.execute(''' 
+        INSERT INTO alunos (nome, cpf, data_nascimento, endereco, telefone, email, unidade)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (nome, cpf, data_nascimento, endereco, telefone, email, unidade))
+    return c.lastrowid
+
+# Função para adicionar um aluno
+def adicionar_aluno(nome, cpf, data_nascimento, endereco, telefone, email, unidade):
+    matricula = escrita.executar(_inserir_aluno, nome, cpf, data_nascimento, endereco, telefone, email, unidade,
+                                 altera=('alunos',))
+    if matricula is not None:
+        catraca.obter_indice().atualizar_aluno(matricula, cpf, nome, unidade)
+    return matricula
+
+# Colunas aceitas na importação em massa (o cabeçalho é comparado sem acentos e sem maiúsculas)
+COLUNAS_IMPORTACAO = ["nome", "cpf", "data_nascimento", "endereco", "telefone", "email", "unidade"]
+SINONIMOS_IMPORTACAO = {"data_de_nascimento": "data_nascimento", "nascimento": "data_nascimento", "e_mail": "email"}
+UNIDADES = ["Academia I", "Academia II"]
+TAMANHO_LOTE_IMPORTACAO = 5000
+LIMITE_ERROS_IMPORTACAO = 1000
+VAZIOS = {"", "nan", "none", "nat"}
+
+# Função para normalizar o nome de uma coluna do arquivo ("Data de Nascimento" -> "data_nascimento")
+def _normalizar_coluna(nome):
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode().lower()
+    nome = re.sub(r'\W+', '_', nome).strip('_')
+    return SINONIMOS_IMPORTACAO.get(nome, nome)
+
+# Função para ler o arquivo de importação em lotes, sem carregar tudo na memória
+def ler_importacao_em_lotes(arquivo, nome_arquivo, tamanho=TAMANHO_LOTE_IMPORTACAO):
+    if nome_arquivo.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        livro = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            linhas = livro.active.iter_rows(values_only=True)
+            cabecalho = [_normalizar_coluna(coluna) for coluna in next(linhas, ())]
+            lote = []
+            for linha in linhas:
+                lote.append(linha)
+                if len(lote) == tamanho:
+                    yield pd.DataFrame(lote, columns=cabecalho, dtype=object)
+                    lote = []
+            if lote:
+                yield pd.DataFrame(lote, columns=cabecalho, dtype=object)
+        finally:
+            livro.close()
+    else:
+        # sep=None detecta o separador (";" do Excel brasileiro ou ",")
+        leitor = pd.read_csv(arquivo, sep=None, engine='python', dtype=str, keep_default_na=False,
+                             encoding='utf-8-sig', chunksize=tamanho)
+        for lote in leitor:
+            yield lote.rename(columns=_normalizar_coluna)
+
+# Função para transformar uma coluna do lote em texto limpo (None quando vazia)
+def _texto(lote, coluna):
+    if coluna not in lote:
+        return pd.Series(None, index=lote.index, dtype=object)
+    valores = lote[coluna].astype(str).str.strip()
+    return valores.where(~valores.str.lower().isin(VAZIOS), None)
+
+# Função para validar os CPFs do lote de uma vez (11 dígitos e dígitos verificadores corretos)
+def _cpfs_validos(cpfs):
+    digitos = cpfs.fillna('').str.replace(r'\D', '', regex=True)
+    tamanho_ok = (digitos.str.len() == 11).to_numpy()
+    validos = np.zeros(len(digitos), dtype=bool)
+    if tamanho_ok.any():
+        numeros = np.array([list(cpf) for cpf in digitos[tamanho_ok]], dtype=np.int64)
+        dv1 = (numeros[:, :9] @ np.arange(10, 1, -1)) * 10 % 11 % 10
+        dv2 = (numeros[:, :10] @ np.arange(11, 1, -1)) * 10 % 11 % 10
+        repetidos = (numeros == numeros[:, :1]).all(axis=1)
+        validos[tamanho_ok] = (dv1 == numeros[:, 9]) & (dv2 == numeros[:, 10]) & ~repetidos
+    return digitos, validos
+
+# Função para normalizar e validar um lote; devolve as linhas válidas e os erros (linha do arquivo, motivo)
+def validar_lote(lote, primeira_linha, unidade_padrao=None):
+    dados = pd.DataFrame({coluna: _texto(lote, coluna) for coluna in COLUNAS_IMPORTACAO}, index=lote.index)
+    numero_linha = pd.Series(np.arange(len(lote)) + primeira_linha, index=lote.index)
+
+    dados['cpf'], cpf_ok = _cpfs_validos(dados['cpf'])
+
+    # Aceita AAAA-MM-DD (ou data do Excel) e DD/MM/AAAA; grava sempre como AAAA-MM-DD
+    nascimento = dados['data_nascimento'].str[:10]
+    datas = pd.to_datetime(nascimento, format='%Y-%m-%d', errors='coerce')
+    datas = datas.fillna(pd.to_datetime(nascimento, format='%d/%m/%Y', errors='coerce'))
+    data_ok = (datas.notna() | nascimento.isna()).to_numpy()
+    dados['data_nascimento'] = datas.dt.strftime('%Y-%m-%d').where(datas.notna(), None)
+
+    if unidade_padrao:
+        dados['unidade'] = dados['unidade'].fillna(unidade_padrao)
+    unidade_ok = (dados['unidade'].isna() | dados['unidade'].isin(UNIDADES)).to_numpy()
+    nome_ok = dados['nome'].notna().to_numpy()
+
+    motivos = np.select(
+        [~nome_ok, ~cpf_ok, ~data_ok, ~unidade_ok],
+        ["Nome vazio", "CPF inválido", "Data de nascimento inválida", "Unidade inválida"],
+        default="",
+    )
+    invalidas = motivos != ""
+    erros = list(zip(numero_linha[invalidas], motivos[invalidas]))
+    return dados[~invalidas], erros
+
+# Área de preparo da importação: tabela temporária da conexão do gravador, que só ele usa. Cada lote lido
+# entra numa operação curta do gravador e a importação inteira vai para alunos numa operação final, num único
+# commit; um erro no meio do arquivo descarta o que foi preparado, sem gravar nenhum aluno
+SQL_PREPARO_IMPORTACAO = f'''
+    CREATE TEMP TABLE IF NOT EXISTS importacao_alunos (
+        importacao INTEGER NOT NULL,
+        {", ".join(COLUNAS_IMPORTACAO)}
+    )
+'''
+_importacoes = itertools.count(1)
+
+# Operação do gravador: guarda um lote já validado na área de preparo
+def _preparar_importacao(conn, importacao, validos):
+    conn.execute(SQL_PREPARO_IMPORTACAO)
+    conn.executemany(f'''
+        INSERT INTO temp.importacao_alunos (importacao, {", ".join(COLUNAS_IMPORTACAO)})
+        VALUES (?, {", ".join("?" * len(COLUNAS_IMPORTACAO))})
+    ''', ((importacao, *linha) for linha in validos.itertuples(index=False, name=None)))
+
+# Operação do gravador: passa a importação preparada para alunos; o UNIQUE do CPF descarta os duplicados
+def _concluir_importacao(conn, importacao):
+    conn.execute(SQL_PREPARO_IMPORTACAO)
+    inseridos = conn.execute(f'''
+        INSERT OR IGNORE INTO alunos ({", ".join(COLUNAS_IMPORTACAO)})
+        SELECT {", ".join(COLUNAS_IMPORTACAO)} FROM temp.importacao_alunos WHERE importacao = ? ORDER BY rowid
+    ''', (importacao,)).rowcount
+    _descartar_importacao(conn, importacao)
+    return inseridos
+
+def _descartar_importacao(conn, importacao):
+    conn.execute(SQL_PREPARO_IMPORTACAO)
+    conn.execute("DELETE FROM temp.importacao_alunos WHERE importacao = ?", (importacao,))
+
+# Função para importar alunos em massa num único commit
+# Leitura e validação ficam na sessão, lote a lote: o arquivo nunca fica inteiro em memória e o gravador
+# só é ocupado pelo INSERT de cada lote e pela passagem final
+def importar_alunos(arquivo, nome_arquivo, unidade_padrao=None):
+    resumo = {'inseridos': 0, 'duplicados': 0, 'invalidos': 0}
+    erros = []
+    validados = 0
+    primeira_linha = 2  # a linha 1 do arquivo é o cabeçalho
+    importacao = next(_importacoes)
+
+    try:
+        for lote in ler_importacao_em_lotes(arquivo, nome_arquivo):
+            validos, erros_lote = validar_lote(lote, primeira_linha, unidade_padrao)
+            primeira_linha += len(lote)
+            if len(validos):
+                escrita.executar(_preparar_importacao, importacao, validos)
+            validados += len(validos)
+            resumo['invalidos'] += len(erros_lote)
+            erros.extend(erros_lote[:LIMITE_ERROS_IMPORTACAO - len(erros)])
+
+        resumo['inseridos'] = escrita.executar(_concluir_importacao, importacao, altera=('alunos',))
+    except BaseException:
+        # Sem esperar: o que ficar preparado some com a conexão do gravador
+        with contextlib.suppress(escrita.EscritaRecusada):
+            escrita.obter_gravador(banco.BANCO_PRINCIPAL).enviar(_descartar_importacao, importacao)
+        raise
+    resumo['duplicados'] = validados - resumo['inseridos']
+    if resumo['inseridos']:
+        catraca.obter_indice().invalidar()
+    return resumo, erros
+
+# Função para consultar alunos (em memória até a próxima escrita em alunos)
+@banco.leitura_em_cache('alunos')
+def consultar_alunos():
+    with banco.conexao() as conn:
+        c = conn.cursor()
+        c.execute("SELECT matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade FROM alunos")
+        alunos = c.fetchall()
+    return alunos
+
+# Função para consultar uma página de alunos com filtros aplicados no SQL
+# Paginação por chave: a próxima página começa depois da última matrícula exibida
+# Página em cache até a próxima escrita em alunos
+@banco.leitura_em_cache('alunos', max_entries=200)
+def listar_alunos(apos_matricula=0, limite=50, unidade=None, prefixo_nome=None, nascimento_de=None, nascimento_ate=None):
+    filtros = ["matricula > ?"]
+    parametros = [apos_matricula]
+    if unidade:
+        filtros.append("unidade = ?")
+        parametros.append(unidade)
+    if prefixo_nome:
+        filtros.append("nome LIKE ? ESCAPE '\\'")
+        parametros.append(prefixo_nome.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+    if nascimento_de:
+        filtros.append("data_nascimento >= ?")
+        parametros.append(nascimento_de.strftime('%Y-%m-%d'))
+    if nascimento_ate:
+        filtros.append("data_nascimento <= ?")
+        parametros.append(nascimento_ate.strftime('%Y-%m-%d'))
+    parametros.append(limite)
+
+    with banco.conexao() as conn:
+        return conn.execute(f'''
+            SELECT matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade
+            FROM alunos
+            WHERE {" AND ".join(filtros)}
+            ORDER BY matricula
+            LIMIT ?
+        ''', parametros).fetchall()
+
+# Operação do gravador: atualiza o cadastro e devolve as linhas afetadas
+def _atualizar_aluno(conn, matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade):
+    return conn.execute('''
+        UPDATE alunos
+        SET nome = ?, cpf = ?, data_nascimento = ?, endereco = ?, telefone = ?, email = ?, unidade = ?
+        WHERE matricula = ?
+    ''', (nome, cpf, data_nascimento, endereco, telefone, email, unidade, matricula)).rowcount
+
+# Função para editar aluno
+def editar_aluno(matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade):
+    try:
+        rows_affected = escrita.executar(_atualizar_aluno, matricula, nome, cpf, data_nascimento, endereco,
+                                         telefone, email, unidade, altera=('alunos',))
+
+        if rows_affected:
+            catraca.obter_indice().atualizar_aluno(matricula, cpf, nome, unidade)
+        print(f"Linhas afetadas na atualização: {rows_affected}")
+        return rows_affected
+    except Exception as e:
+        print(f"Erro ao atualizar cadastro: {e}")
+        return 0
+
+def _excluir_aluno(conn, matricula):
+    conn.execute("DELETE FROM alunos WHERE matricula = ?", (matricula,))
+
+# Função para excluir aluno
+def excluir_aluno(matricula):
+    escrita.executar(_excluir_aluno, matricula, altera=('alunos',))
+    catraca.obter_indice().remover_aluno(matricula)
+
+# Função para buscar aluno por matrícula, nome ou CPF
+def buscar_aluno(busca_por, valor):
+    with banco.conexao() as conn:
+        c = conn.cursor()
+
+        # Colunas explícitas: a ordem física da tabela varia entre os bancos existentes
+        colunas = "matricula, nome, cpf, data_nascimento, endereco, telefone, email, unidade"
+        if busca_por == "Matrícula":
+            c.execute(f"SELECT {colunas} FROM alunos WHERE matricula = ?", (valor,))
+        elif busca_por == "Nome":
+            c.execute(f"SELECT {colunas} FROM alunos WHERE matricula = ?", (busca_alunos.melhor_matricula(valor),))
+        elif busca_por == "CPF":
+            c.execute(f"SELECT {colunas} FROM alunos WHERE cpf = ?", (valor,))
+
+        aluno = c.fetchone()
+    print(f"Aluno encontrado: {aluno}")  # Log para depuração
+    return aluno
+
+# Função para carregar os dados do aluno nos campos de edição
+def carregar_aluno_edicao(aluno):
+    if aluno:
+        st.session_state['matricula'] = aluno[0]
+        st.session_state['edit_nome'] = aluno[1]
+        st.session_state['edit_cpf'] = aluno[2]
+        st.session_state['edit_data_nascimento'] = datetime.strptime(aluno[3], '%Y-%m-%d').date() if aluno[3] else None
+        st.session_state['edit_endereco'] = aluno[4]
+        st.session_state['edit_telefone'] = aluno[5]
+        st.session_state['edit_email'] = aluno[6]
+        st.session_state['edit_unidade'] = aluno[7]
+        st.session_state['editing'] = True  # Marcar que estamos editando
+
+# Interface do Streamlit
+def render():
+    st.title("\u2795Cadastros") 
+
+    migracoes.garantir_esquema()  # Certifique-se de que a tabela exista
+    tab1, tab2, tab3, tab4 = st.tabs(["\U0001F4C1 Dados Gerais", "\U0001F4C1 Inserir", "\U0001F4C1 Editar/Excluir", "\U0001F4C1 Importar"])
+
+    with tab1:
+        st.write("\U0001F4C2Cadastros")
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            filtro_unidade = st.selectbox("Unidade", ["Todas", "Academia I", "Academia II"], key="filtro_unidade")
+        with col2:
+            filtro_nome = st.text_input("Nome começa com", key="filtro_nome")
+        with col3:
+            filtro_nascimento_de = st.date_input("Nascimento de", value=None, key="filtro_nascimento_de")
+        with col4:
+            filtro_nascimento_ate = st.date_input("Nascimento até", value=None, key="filtro_nascimento_ate")
+        por_pagina = st.selectbox("Alunos por página", [25, 50, 100], index=1, key="alunos_por_pagina")
+
+        # Cursores das páginas já visitadas; volta para a primeira página quando os filtros mudam
+        filtros = (filtro_unidade, filtro_nome, filtro_nascimento_de, filtro_nascimento_ate, por_pagina)
+        if st.session_state.get('filtros_alunos') != filtros:
+            st.session_state['filtros_alunos'] = filtros
+            st.session_state['cursores_alunos'] = [0]
+        cursores = st.session_state['cursores_alunos']
+
+        alunos = listar_alunos(cursores[-1], por_pagina + 1, None if filtro_unidade == "Todas" else filtro_unidade,
+                               filtro_nome.strip(), filtro_nascimento_de, filtro_nascimento_ate)
+        tem_proxima = len(alunos) > por_pagina
+        alunos = alunos[:por_pagina]
+
+        if alunos:
+            with perfil.secao('dataframe'):
+                df_alunos = pd.DataFrame(alunos, columns=["Matrícula", "Nome", "CPF", "Data de Nascimento", "Endereço", "Telefone", "Email", "Unidade"])
+            perfil.exibir_dataframe(df_alunos, hide_index=True)
+        else:
+            st.write("Nenhum aluno cadastrado.")
+
+        col_anterior, col_pagina, col_proxima = st.columns(3)
+        with col_anterior:
+            if len(cursores) > 1 and st.button("\u2B05 Anterior", key="alunos_anterior"):
+                cursores.pop()
+                st.rerun()
+        with col_pagina:
+            st.write(f"Página {len(cursores)}")
+        with col_proxima:
+            if tem_proxima and st.button("Próxima \u27A1", key="alunos_proxima"):
+                cursores.append(alunos[-1][0])
+                st.rerun()
+
+    with tab2:
+        st.write("\U0001F4C2Inserir")
+        nome = st.text_input("Nome", key="nome")
+        cpf = st.text_input("CPF", key="cpf")
+        data_nascimento = st.date_input("Data de Nascimento", key="data_nascimento", value=None)
+        endereco = st.text_input("Endereço", key="endereco")
+        telefone = st.text_input("Telefone", key="telefone")
+        email = st.text_input("Email", key="email")
+        unidade = st.selectbox("Unidade", ["Academia I", "Academia II"], key="unidade_input")
+
+        if st.button("\U0001F4E5Inserir", key="botao_cadastrar"):
+            if nome and cpf:
+                matricula = adicionar_aluno(nome, cpf, data_nascimento, endereco, telefone, email, unidade)
+                if matricula:
+                    st.success("Aluno cadastrado com sucesso!")
+                    st.info(f"Número da Matrícula: {matricula}")
+                else:
+                    st.error("Erro: CPF já cadastrado.")
+            else:
+                st.warning("Preencha todos os campos obrigatórios.")
+
+    with tab3:
+        st.write("\U0001F4C2Editar Cadastros")
+
+        busca_por = st.selectbox("Buscar por:", ["Matrícula", "Nome", "CPF"], key="busca_por_input")
+        valor_busca = st.text_input("Valor de busca:", key="valor_busca_input")
+
+        if st.button("Buscar Aluno"):
+            if valor_busca:
+                if busca_por == "Nome":
+                    # Vários alunos podem ter o mesmo nome: a escolha é feita na lista abaixo
+                    componentes.iniciar_busca(valor_busca, "edicao")
+                else:
+                    st.session_state['termo_edicao'] = None
+                    carregar_aluno_edicao(buscar_aluno(busca_por, valor_busca))
+
+        if busca_por == "Nome" and st.session_state.get('termo_edicao'):
+            matricula_escolhida = componentes.selecionar_aluno(st.session_state['termo_edicao'], "edicao")
+            if matricula_escolhida and st.button("Editar aluno selecionado"):
+                carregar_aluno_edicao(buscar_aluno("Matrícula", matricula_escolhida))
+
+        # Verificar se estamos no modo de edição
+        if 'editing' in st.session_state and st.session_state['editing']:
+            # Criar campos de entrada para edição com valores armazenados
+            nome = st.text_input("Nome", value=st.session_state['edit_nome'], key="edit_nome_input")
+            cpf = st.text_input("CPF", value=st.session_state['edit_cpf'], key="edit_cpf_input")
+            data_nascimento = st.date_input("Data de Nascimento", value=st.session_state['edit_data_nascimento'], key="edit_data_nascimento_input")
+            endereco = st.text_input("Endereço", value=st.session_state['edit_endereco'], key="edit_endereco_input")
+            telefone = st.text_input("Telefone", value=st.session_state['edit_telefone'], key="edit_telefone_input")
+            email = st.text_input("Email", value=st.session_state['edit_email'], key="edit_email_input")
+
+            unidade_opcoes = ["Academia I", "Academia II"]
+            unidade = st.selectbox("Unidade", unidade_opcoes, 
+                index=unidade_opcoes.index(st.session_state['edit_unidade']) if st.session_state['edit_unidade'] in unidade_opcoes else 0, 
+                key="edit_unidade_input")
+
+            # Atualizar cadastro ao clicar no botão
+            if st.button("Atualizar Cadastro"):
+                rows_affected = editar_aluno(st.session_state['matricula'], nome, cpf, data_nascimento, endereco, telefone, email, unidade)
+
+                if rows_affected > 0:
+                    st.success("Cadastro atualizado com sucesso!")
+                    st.session_state['editing'] = False  # Desmarcar edição após atualização
+                else:
+                    st.error("Erro: Cadastro não foi atualizado. O aluno pode não existir.")
+        else:
+            st.write("Faça uma busca para editar os dados de um aluno.")
+
+    with tab4:
+        st.write("\U0001F4C2Importar Alunos")
+        st.caption("Arquivo CSV ou XLSX com as colunas: " + ", ".join(COLUNAS_IMPORTACAO) + ". Datas em AAAA-MM-DD ou DD/MM/AAAA.")
+        arquivo_importacao = st.file_uploader("Arquivo", type=["csv", "xlsx"], key="arquivo_importacao")
+        unidade_importacao = st.selectbox("Unidade das linhas sem unidade", UNIDADES, key="unidade_importacao")
+
+        if arquivo_importacao and st.button("\U0001F4E5Importar", key="botao_importar"):
+            try:
+                with st.spinner("Importando alunos..."):
+                    resumo, erros = importar_alunos(arquivo_importacao, arquivo_importacao.name, unidade_importacao)
+            except Exception as e:
+                st.error(f"Erro ao importar o arquivo (nenhum aluno foi gravado): {e}")
+            else:
+                st.success(f"Inseridos: {resumo['inseridos']} | Duplicados: {resumo['duplicados']} | Inválidos: {resumo['invalidos']}")
+                if erros:
+                    st.write("Linhas inválidas (não importadas):")
+                    st.dataframe(pd.DataFrame(erros, columns=["Linha", "Motivo"]), hide_index=True)
+
+if __name__ == "__main__":
+    render()
@@ -0,0 +1,455 @@
+# Instantâneo analítico de pagamentos e alunos em arquivos Arrow (formato IPC, sem compressão)
+# Os arquivos são lidos por memory map: os painéis e relatórios filtram colunas na memória do sistema
+# em vez de buscar linha a linha no SQLite que a recepção está gravando.
+# A atualização é incremental: só os pagamentos com codigo_pagamento maior que o último exportado
+# viram um novo segmento; os alunos (poucos) são exportados inteiros quando mudam. Pagamentos já exportados
+# que foram excluídos ou corrigidos (contador de alterações mantido por gatilhos) refazem o instantâneo.
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import streamlit as st
+
+import banco
+
+PASTA_ANALITICO = os.environ.get("GDE_ANALITICO", "analitico")
+MANIFESTO = "manifesto.json"
+TRAVA = "atualizando.lock"
+TRAVA_EXPIRA_S = 300  # trava deixada por um processo que morreu no meio da exportação
+ESPERA_TRAVA_S = 30  # espera por outro processo que está exportando antes de ler o que ele publicar
+MAXIMO_SEGMENTOS = 32  # acima disso os segmentos são juntados em um só
+TAMANHO_LOTE = 50_000
+
+ESQUEMA_PAGAMENTOS = pa.schema([
+    ("codigo_pagamento", pa.int64()), ("matricula", pa.int64()), ("unidade", pa.string()), ("plano", pa.string()),
+    ("data_pagamento", pa.date32()), ("data_vencimento", pa.date32()), ("valor", pa.float64()),
+])
+ESQUEMA_ALUNOS = pa.schema([
+    ("matricula", pa.int64()), ("nome", pa.string()), ("cpf", pa.string()), ("unidade_aluno", pa.string()),
+])
+# Colunas do relatório de mensalidades, na ordem de relatorio.COLUNAS (datas em texto)
+ESQUEMA_RELATORIO = pa.schema([
+    ("codigo_pagamento", pa.int64()), ("matricula", pa.int64()), ("nome", pa.string()), ("cpf", pa.string()),
+    ("unidade", pa.string()), ("plano", pa.string()), ("data_pagamento", pa.string()),
+    ("data_vencimento", pa.string()), ("valor", pa.float64()), ("status", pa.string()),
+])
+
+# Datas já saem do banco em dias desde 1970-01-01, o mesmo valor de um date32 do Arrow
+# O status gravado não entra: painéis e relatório calculam a situação pelo vencimento
+SQL_EXPORTAR_PAGAMENTOS = '''
+    SELECT p.codigo_pagamento, p.matricula, u.nome, pl.nome, p.data_pagamento, p.data_vencimento,
+           p.valor_centavos / 100.0
+    FROM pagamentos_base p
+    LEFT JOIN unidades u ON u.codigo = p.unidade
+    LEFT JOIN planos pl ON pl.codigo = p.plano
+    WHERE p.codigo_pagamento > ?
+    ORDER BY p.codigo_pagamento
+'''
+SQL_EXPORTAR_ALUNOS = "SELECT matricula, nome, cpf, unidade FROM alunos ORDER BY matricula"
+
+# Contador de alterações dos pagamentos (versão 12): exclusão ou correção de um pagamento já exportado não
+# muda o maior código e pode manter a contagem; o contador muda e a próxima atualização refaz o instantâneo
+# Só as colunas exportadas contam (a marcação de status dos vencidos não refaz nada)
+SQL_CONTADORES = '''
+    CREATE TABLE IF NOT EXISTS contadores_alteracao (
+        tabela TEXT PRIMARY KEY,
+        alteracoes INTEGER NOT NULL
+    ) WITHOUT ROWID
+'''
+SQL_GATILHOS_CONTADOR = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_base_contador_exclusao
+    AFTER DELETE ON pagamentos_base
+    BEGIN
+        UPDATE contadores_alteracao SET alteracoes = alteracoes + 1 WHERE tabela = 'pagamentos_base';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_base_contador_alteracao
+    AFTER UPDATE OF codigo_pagamento, matricula, unidade, plano, data_pagamento, data_vencimento, valor_centavos
+    ON pagamentos_base
+    BEGIN
+        UPDATE contadores_alteracao SET alteracoes = alteracoes + 1 WHERE tabela = 'pagamentos_base';
+    END
+    ''',
+)
+# Mesmo contador para os alunos (versão 13): aluno novo aumenta a maior matrícula, exclusão ou correção das
+# colunas exportadas incrementa o contador
+SQL_GATILHOS_CONTADOR_ALUNOS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_alunos_contador_exclusao
+    AFTER DELETE ON alunos
+    BEGIN
+        UPDATE contadores_alteracao SET alteracoes = alteracoes + 1 WHERE tabela = 'alunos';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_alunos_contador_alteracao
+    AFTER UPDATE OF matricula, nome, cpf, unidade ON alunos
+    BEGIN
+        UPDATE contadores_alteracao SET alteracoes = alteracoes + 1 WHERE tabela = 'alunos';
+    END
+    ''',
+)
+# Estado do banco que o instantâneo acompanha; lido a cada garantir_atualizado (maiores chaves e contadores,
+# sem percorrer tabela nenhuma), vale para gravações de qualquer processo
+SQL_ESTADO_ALUNOS = '''
+    SELECT (SELECT IFNULL(MAX(matricula), 0) FROM alunos),
+           (SELECT alteracoes FROM contadores_alteracao WHERE tabela = 'alunos')
+'''
+SQL_ESTADO = f'''
+    SELECT (SELECT IFNULL(MAX(codigo_pagamento), 0) FROM pagamentos_base),
+           (SELECT alteracoes FROM contadores_alteracao WHERE tabela = 'pagamentos_base'),
+           *
+    FROM ({SQL_ESTADO_ALUNOS})
+'''
+
+
+# Instantâneo que não pôde ser atualizado (outro processo segurou a exportação além de ESPERA_TRAVA_S)
+class InstantaneoDesatualizado(TimeoutError):
+    pass
+
+# Migração: contador de alterações de pagamentos_base e os gatilhos que o mantêm
+def criar_contadores(conn):
+    conn.execute(SQL_CONTADORES)
+    conn.execute("INSERT OR IGNORE INTO contadores_alteracao (tabela, alteracoes) VALUES ('pagamentos_base', 0)")
+    for sql in SQL_GATILHOS_CONTADOR:
+        conn.execute(sql)
+
+# Migração: contador de alterações de alunos
+def criar_contador_alunos(conn):
+    conn.execute("INSERT OR IGNORE INTO contadores_alteracao (tabela, alteracoes) VALUES ('alunos', 0)")
+    for sql in SQL_GATILHOS_CONTADOR_ALUNOS:
+        conn.execute(sql)
+
+# Função para montar um lote Arrow a partir das linhas do banco
+def _lote(linhas, esquema):
+    colunas = list(zip(*linhas))
+    arrays = []
+    for valores, campo in zip(colunas, esquema):
+        if pa.types.is_date32(campo.type):
+            arrays.append(pa.array(valores, type=pa.int32()).cast(pa.date32()))
+        else:
+            arrays.append(pa.array(valores, type=campo.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema)
+
+# Função para gravar o resultado de uma consulta em um arquivo Arrow; o arquivo só aparece completo
+def _exportar(cursor, esquema, caminho):
+    linhas = 0
+    temporario = caminho + ".tmp"
+    with pa.OSFile(temporario, 'wb') as arquivo, ipc.new_file(arquivo, esquema) as escritor:
+        while True:
+            lote = cursor.fetchmany(TAMANHO_LOTE)
+            if not lote:
+                break
+            escritor.write_batch(_lote(lote, esquema))
+            linhas += len(lote)
+    os.replace(temporario, caminho)
+    return linhas
+
+# Função para abrir um arquivo Arrow por memory map (as colunas não são copiadas para a memória do processo)
+def _abrir(caminho):
+    return ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass  # ainda aberto por outro processo (Windows) ou já removido
+
+
+# Pasta do instantâneo compartilhada entre processos: um só exporta de cada vez (arquivo de trava)
+# e os demais apenas releem o manifesto
+class InstantaneoAnalitico:
+    def __init__(self, pasta=PASTA_ANALITICO, caminho=banco.BANCO_PRINCIPAL):
+        self.pasta = pasta
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        # Conexão própria para o estado do banco (SQL_ESTADO), como a do monitor de alterações: a cada leitura
+        # custa só a consulta, sem passar pelo pool
+        self._conn_estado = sqlite3.connect(caminho, check_same_thread=False)
+        self._trava_estado = threading.Lock()
+        self._versao = None
+        self._atualizado_em = 0.0
+        self._manifesto = {}
+        self._segmentos = {}
+        self._alunos_carregados = None
+        self.pagamentos = pa.Table.from_batches([], ESQUEMA_PAGAMENTOS)
+        self.alunos = pa.Table.from_batches([], ESQUEMA_ALUNOS)
+        self.estatisticas = {'atualizacoes': 0, 'linhas_exportadas': 0, 'reconstrucoes': 0}
+        os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome)
+
+    def _ler_manifesto(self):
+        try:
+            with open(self._caminho(MANIFESTO), encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return {'segmentos': [], 'ultimo_codigo': 0, 'linhas': 0, 'versao_alunos': 0, 'alunos': None}
+
+    def _gravar_manifesto(self, manifesto):
+        manifesto['atualizado_em'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        temporario = self._caminho(MANIFESTO + ".tmp")
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo)
+        os.replace(temporario, self._caminho(MANIFESTO))
+
+    def _travar(self):
+        caminho = self._caminho(TRAVA)
+        try:
+            os.close(os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(caminho) > TRAVA_EXPIRA_S:
+                    _remover(caminho)
+            except OSError:
+                pass
+            return False
+
+    # Espera a trava de outro processo; devolve False se ela não foi liberada a tempo
+    def _esperar_trava(self, espera_maxima):
+        limite = time.monotonic() + espera_maxima
+        while not self._travar():
+            if time.monotonic() > limite:
+                return False
+            time.sleep(0.1)
+        return True
+
+    # Exporta o que falta: pagamentos novos, alunos (se mudaram desde a última exportação de qualquer processo)
+    # e, se necessário, refaz tudo
+    def _exportar_pendentes(self, conn, manifesto, exportar_alunos):
+        total, = conn.execute("SELECT COUNT(*) FROM pagamentos_base WHERE codigo_pagamento <= ?",
+                              (manifesto['ultimo_codigo'],)).fetchone()
+        alteracoes, = conn.execute(
+            "SELECT alteracoes FROM contadores_alteracao WHERE tabela = 'pagamentos_base'").fetchone()
+        if total != manifesto['linhas'] or alteracoes != manifesto.get('alteracoes'):
+            # Pagamento já exportado excluído ou corrigido (no app ou por fora): o instantâneo é refeito do zero
+            # A geração entra no nome dos segmentos: os refeitos não se confundem com os já abertos
+            manifesto.update(segmentos=[], ultimo_codigo=0, linhas=0, alteracoes=alteracoes,
+                             geracao=manifesto.get('geracao', 0) + 1)
+            self.estatisticas['reconstrucoes'] += 1
+            exportar_alunos = True
+
+        ultimo, = conn.execute("SELECT IFNULL(MAX(codigo_pagamento), 0) FROM pagamentos_base").fetchone()
+        if ultimo > manifesto['ultimo_codigo']:
+            geracao, primeiro = manifesto.get('geracao', 0), manifesto['ultimo_codigo'] + 1
+            nome = f"pagamentos_{geracao:06d}_{primeiro:010d}_{ultimo:010d}.arrow"
+            linhas = _exportar(conn.execute(SQL_EXPORTAR_PAGAMENTOS, (manifesto['ultimo_codigo'],)),
+                               ESQUEMA_PAGAMENTOS, self._caminho(nome))
+            manifesto['segmentos'].append(nome)
+            manifesto['ultimo_codigo'] = ultimo
+            manifesto['linhas'] += linhas
+            self.estatisticas['linhas_exportadas'] += linhas
+
+        if len(manifesto['segmentos']) > MAXIMO_SEGMENTOS:
+            self._juntar_segmentos(manifesto)
+
+        # Arquivo novo a cada exportação: quem ainda lê o anterior por memory map não é afetado
+        estado_alunos = list(conn.execute(SQL_ESTADO_ALUNOS).fetchone())
+        if exportar_alunos or not manifesto.get('alunos') or estado_alunos != manifesto.get('estado_alunos'):
+            manifesto['estado_alunos'] = estado_alunos
+            manifesto['versao_alunos'] = manifesto.get('versao_alunos', 0) + 1
+            nome = f"alunos_{manifesto['versao_alunos']:06d}.arrow"
+            _exportar(conn.execute(SQL_EXPORTAR_ALUNOS), ESQUEMA_ALUNOS, self._caminho(nome))
+            manifesto['alunos'] = nome
+
+    def _juntar_segmentos(self, manifesto):
+        tabela = pa.concat_tables(_abrir(self._caminho(nome)) for nome in manifesto['segmentos'])
+        nome = f"pagamentos_{manifesto.get('geracao', 0):06d}_{1:010d}_{manifesto['ultimo_codigo']:010d}.arrow"
+        temporario = self._caminho(nome + ".tmp")
+        with pa.OSFile(temporario, 'wb') as arquivo, ipc.new_file(arquivo, ESQUEMA_PAGAMENTOS) as escritor:
+            escritor.write_table(tabela, max_chunksize=TAMANHO_LOTE)
+        os.replace(temporario, self._caminho(nome))
+        manifesto['segmentos'] = [nome]
+
+    # Relê o manifesto e abre só os segmentos que este processo ainda não tem
+    def _carregar(self, manifesto):
+        self._segmentos = {nome: self._segmentos.get(nome) or _abrir(self._caminho(nome))
+                           for nome in manifesto['segmentos']}
+        self.pagamentos = (pa.concat_tables(self._segmentos.values()) if self._segmentos
+                           else pa.Table.from_batches([], ESQUEMA_PAGAMENTOS))
+        if manifesto.get('alunos') and manifesto['alunos'] != self._alunos_carregados:
+            self.alunos = _abrir(self._caminho(manifesto['alunos']))
+            self._alunos_carregados = manifesto['alunos']
+        self._manifesto = manifesto
+
+    # Função para atualizar o instantâneo; exportar_alunos=True exporta os alunos mesmo sem mudança
+    # Se outro processo está exportando, espera ele terminar e completa o que faltar (em geral nada)
+    # Devolve False quando a trava não foi liberada a tempo: fica o que já está publicado, talvez antigo
+    def atualizar(self, exportar_alunos=False, espera_maxima=ESPERA_TRAVA_S):
+        with self._trava:
+            if not self._esperar_trava(espera_maxima):
+                self._carregar(self._ler_manifesto())
+                return False
+            try:
+                manifesto = self._ler_manifesto()
+                antes = {*manifesto['segmentos'], manifesto.get('alunos')}
+                conn = banco.abrir_conexao(self.caminho)
+                try:
+                    conn.execute("BEGIN")  # contagem, exportação e alunos vêem o mesmo momento do banco
+                    self._exportar_pendentes(conn, manifesto, exportar_alunos)
+                finally:
+                    conn.close()
+                self._gravar_manifesto(manifesto)
+            finally:
+                _remover(self._caminho(TRAVA))
+            for nome in antes - {*manifesto['segmentos'], manifesto['alunos'], None}:
+                _remover(self._caminho(nome))
+            self._carregar(manifesto)
+            self.estatisticas['atualizacoes'] += 1
+            return True
+
+    # Atualiza quando o estado do banco (SQL_ESTADO) mudou desde a última atualização, por gravação deste ou de
+    # qualquer outro processo, e a cada banco.TTL_CACHE_S como garantia para o que o estado não mostra
+    # (pagamento inserido com código antigo, banco restaurado por cima)
+    # exigir=True levanta InstantaneoDesatualizado em vez de seguir com o que está publicado: quem guarda o
+    # resultado em cache pela revisão das tabelas não pode guardar dados de antes dela
+    def garantir_atualizado(self, exigir=False):
+        with self._trava_estado:
+            versao = self._conn_estado.execute(SQL_ESTADO).fetchone()
+        if versao != self._versao or time.monotonic() - self._atualizado_em > banco.TTL_CACHE_S:
+            if self.atualizar():
+                self._versao, self._atualizado_em = versao, time.monotonic()
+            elif exigir:
+                raise InstantaneoDesatualizado(f"{self._caminho(TRAVA)} não foi liberada em {ESPERA_TRAVA_S}s")
+        return self
+
+    # Para restaurações de backup: o banco volta no tempo e o instantâneo pode ter o mesmo número de linhas
+    # com pagamentos diferentes; a próxima atualização (deste ou de qualquer processo) refaz tudo
+    def invalidar(self, espera_maxima=TRAVA_EXPIRA_S):
+        with self._trava:
+            if not self._esperar_trava(espera_maxima):
+                raise TimeoutError(f"{self._caminho(TRAVA)} não foi liberada")
+            try:
+                manifesto = self._ler_manifesto()
+                manifesto['linhas'] = -1  # nenhuma contagem de pagamentos bate com isso
+                self._gravar_manifesto(manifesto)
+            finally:
+                _remover(self._caminho(TRAVA))
+            self._versao = None
+
+    def informacoes(self):
+        return {
+            'pagamentos': self.pagamentos.num_rows,
+            'alunos': self.alunos.num_rows,
+            'segmentos': len(self._segmentos),
+            'ultimo_codigo': self._manifesto.get('ultimo_codigo', 0),
+            'atualizado_em': self._manifesto.get('atualizado_em'),
+            'megabytes': round((self.pagamentos.nbytes + self.alunos.nbytes) / 1024 / 1024, 1),
+            **self.estatisticas,
+        }
+
+
+# Um instantâneo por processo, atualizado antes de cada leitura
+@st.cache_resource
+def obter_instantaneo():
+    return InstantaneoAnalitico()
+
+def carregar_tabelas():
+    instantaneo = obter_instantaneo().garantir_atualizado()
+    return instantaneo.pagamentos, instantaneo.alunos
+
+def _data_texto(coluna):
+    return pc.cast(coluna, pa.string())
+
+# Função para montar a situação de cada aluno pelo último pagamento (mesmas colunas de vencimentos.consultar_situacao)
+# "tabelas" (pagamentos, alunos) dispensa a atualização do instantâneo, como em relatorio_em_lotes
+def consultar_situacao(filtro_status="Todos", hoje=None, tabelas=None):
+    hoje = hoje or date.today()
+    pagamentos, alunos = tabelas or carregar_tabelas()
+    pagamentos = pagamentos.filter(pc.and_(pc.is_valid(pagamentos['matricula']), pc.is_valid(pagamentos['data_vencimento'])))
+    # Maior vencimento de cada matrícula (no empate, o pagamento mais recente), como em ultimo_pagamento:
+    # vencimento e código viram uma só chave inteira e o máximo por matrícula sai de um group_by, sem ordenar
+    chave = pc.add(pc.multiply(pc.cast(pc.cast(pagamentos['data_vencimento'], pa.int32()), pa.int64()), 2 ** 32),
+                   pagamentos['codigo_pagamento'])
+    maiores = pa.table({'matricula': pagamentos['matricula'], 'chave': chave}).group_by('matricula').aggregate(
+        [('chave', 'max')])
+    codigos = pc.bit_wise_and(maiores['chave_max'], 2 ** 32 - 1)
+    ultimos = pagamentos.filter(pc.is_in(pagamentos['codigo_pagamento'], codigos))
+
+    atrasado = pc.less(ultimos['data_vencimento'], pa.scalar(hoje, pa.date32()))
+    situacao = pa.table({
+        'matricula': ultimos['matricula'],
+        'plano': ultimos['plano'],
+        'data_pagamento': _data_texto(ultimos['data_pagamento']),
+        'data_vencimento': _data_texto(ultimos['data_vencimento']),
+        'Status': pc.if_else(atrasado, "Atrasado", "Em dia"),
+    })
+    if filtro_status in ("Atrasado", "Em dia"):
+        situacao = situacao.filter(pc.equal(situacao['Status'], filtro_status))
+    situacao = situacao.join(alunos.select(['matricula', 'nome']), 'matricula', join_type='inner')
+    return situacao.sort_by('matricula').select(['nome', 'plano', 'data_pagamento', 'data_vencimento', 'Status']).to_pandas()
+
+# Função para percorrer o relatório em lotes (tabelas no ESQUEMA_RELATORIO, na ordem de relatorio.COLUNAS),
+# em ordem de data de pagamento e código. Na tabela inteira só passam o filtro e a ordenação das posições das
+# linhas; a junção com os alunos e a conversão das colunas são feitas lote a lote sobre o instantâneo.
+# O status do relatório é sempre o do vencimento na data de referência
+def relatorio_em_lotes(inicio, fim, unidade=None, plano=None, status=None, hoje=None, tabelas=None,
+                       tamanho=TAMANHO_LOTE):
+    pagamentos, alunos = tabelas or carregar_tabelas()
+    hoje = pa.scalar(hoje or date.today(), pa.date32())
+    filtro = pc.and_(pc.greater_equal(pagamentos['data_pagamento'], pa.scalar(inicio, pa.date32())),
+                     pc.less_equal(pagamentos['data_pagamento'], pa.scalar(fim, pa.date32())))
+    if unidade:
+        filtro = pc.and_(filtro, pc.equal(pagamentos['unidade'], unidade))
+    if plano:
+        filtro = pc.and_(filtro, pc.equal(pagamentos['plano'], plano))
+    if status == "Atrasado":
+        filtro = pc.and_(filtro, pc.less(pagamentos['data_vencimento'], hoje))
+    elif status == "Em dia":
+        filtro = pc.and_(filtro, pc.greater_equal(pagamentos['data_vencimento'], hoje))
+    posicoes = pc.indices_nonzero(filtro)
+    chaves = pa.table({
+        'data_pagamento': pc.take(pagamentos['data_pagamento'], posicoes),
+        'codigo_pagamento': pc.take(pagamentos['codigo_pagamento'], posicoes),
+    })
+    posicoes = pc.take(posicoes, pc.sort_indices(chaves, sort_keys=[('data_pagamento', 'ascending'),
+                                                                    ('codigo_pagamento', 'ascending')]))
+    for primeira in range(0, len(posicoes), tamanho):
+        lote = pagamentos.take(posicoes[primeira:primeira + tamanho])
+        # Aluno de cada pagamento pela posição da matrícula (nula se o aluno foi excluído), na ordem do lote
+        aluno = pc.index_in(lote['matricula'], value_set=alunos['matricula'])
+        yield pa.table({
+            'codigo_pagamento': lote['codigo_pagamento'],
+            'matricula': lote['matricula'],
+            'nome': pc.take(alunos['nome'], aluno),
+            'cpf': pc.take(alunos['cpf'], aluno),
+            'unidade': lote['unidade'],
+            'plano': lote['plano'],
+            'data_pagamento': _data_texto(lote['data_pagamento']),
+            'data_vencimento': _data_texto(lote['data_vencimento']),
+            'valor': lote['valor'],
+            'status': pc.if_else(pc.less(lote['data_vencimento'], hoje), "Atrasado", "Em dia"),
+        }, schema=ESQUEMA_RELATORIO)
+
+# Função para montar o relatório inteiro numa só tabela (a exportação do relatório percorre os lotes)
+def consultar_relatorio(inicio, fim, unidade=None, plano=None, status=None, hoje=None):
+    lotes = list(relatorio_em_lotes(inicio, fim, unidade, plano, status, hoje))
+    return pa.Table.from_batches([lote for tabela in lotes for lote in tabela.to_batches()], ESQUEMA_RELATORIO)
+
+# Permite refazer o instantâneo fora do Streamlit (ex.: depois de corrigir pagamentos direto no banco)
+if __name__ == "__main__":
+    import argparse
+    import shutil
+
+    import migracoes
+
+    parser = argparse.ArgumentParser(description="Instantâneo analítico de pagamentos e alunos")
+    parser.add_argument("acao", choices=["atualizar", "reconstruir"])
+    args = parser.parse_args()
+
+    migracoes.garantir_esquema()
+    if args.acao == "reconstruir":
+        shutil.rmtree(PASTA_ANALITICO, ignore_errors=True)
+    instantaneo = InstantaneoAnalitico()
+    instantaneo.atualizar(exportar_alunos=True)
+    print(instantaneo.informacoes())
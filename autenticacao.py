@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import bcrypt
+
+import banco
+import escrita
+
+PAPEL_PADRAO = "USER_N1"
+PAPEL_ADMIN = "USER_ADMIN"
+
+# Custo do bcrypt (2^custo rodadas); ajuste com GDE_BCRYPT_CUSTO após rodar benchmarks/bench_login.py
+CUSTO_BCRYPT = int(os.environ.get("GDE_BCRYPT_CUSTO", 12))
+
+SQL_CREDENCIAIS = '''
+    CREATE TABLE IF NOT EXISTS credenciais (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT NOT NULL,
+        papel TEXT NOT NULL,
+        senha_hash BLOB NOT NULL,
+        criado_em TEXT NOT NULL,
+        UNIQUE (usuario, papel)
+    )
+'''
+
+# Tabelas antigas (senha em texto puro) e o papel que cada uma representa
+TABELAS_ANTIGAS = {"usuarios": PAPEL_PADRAO, "admin": PAPEL_ADMIN}
+
+# Hash usado quando o usuário não existe, para a resposta levar o mesmo tempo de uma senha errada
+_HASH_FICTICIO = bcrypt.hashpw(b"usuario-inexistente", bcrypt.gensalt(CUSTO_BCRYPT))
+
+# Função para gerar o hash bcrypt de uma senha
+def gerar_hash(senha, custo=CUSTO_BCRYPT):
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(custo))
+
+# Função para conferir uma senha com o hash gravado
+def verificar_senha(senha, senha_hash):
+    return bcrypt.checkpw(senha.encode('utf-8'), senha_hash)
+
+# Função para ler o custo gravado dentro do hash ($2b$12$...)
+def custo_do_hash(senha_hash):
+    return int(senha_hash.split(b'$')[2])
+
+# Função para escolher o menor custo cujo hash leva pelo menos "alvo_ms" nesta máquina
+def calibrar_custo(alvo_ms=250, minimo=10, maximo=15):
+    for custo in range(minimo, maximo + 1):
+        inicio = time.perf_counter()
+        gerar_hash("calibracao", custo)
+        if (time.perf_counter() - inicio) * 1000 >= alvo_ms:
+            return custo
+    return maximo
+
+# Migração de novo.db: cria a tabela única de credenciais e move as senhas antigas já com hash
+def criar_estrutura(conn):
+    conn.execute(SQL_CREDENCIAIS)
+    existentes = {linha[0] for linha in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    for tabela, papel in TABELAS_ANTIGAS.items():
+        if tabela not in existentes:
+            continue
+        usuarios = conn.execute(f"SELECT user, senha FROM {tabela} WHERE user IS NOT NULL AND senha IS NOT NULL").fetchall()
+        conn.executemany(
+            "INSERT OR IGNORE INTO credenciais (usuario, papel, senha_hash, criado_em) VALUES (?, ?, ?, ?)",
+            [(usuario, papel, gerar_hash(senha), agora) for usuario, senha in usuarios],
+        )
+        # As senhas em texto puro não ficam mais gravadas
+        conn.execute(f"DROP TABLE {tabela}")
+
+# Função para autenticar: devolve a identidade verificada ou None
+# Hash com custo diferente do configurado é regravado no primeiro login correto
+def autenticar(usuario, senha, papel):
+    with banco.conexao(banco.BANCO_USUARIOS) as conn:
+        linha = conn.execute(
+            "SELECT id, senha_hash FROM credenciais WHERE usuario = ? AND papel = ?", (usuario, papel)
+        ).fetchone()
+
+    if linha is None:
+        verificar_senha(senha, _HASH_FICTICIO)
+        return None
+
+    id_usuario, senha_hash = linha
+    if not verificar_senha(senha, senha_hash):
+        return None
+
+    if custo_do_hash(senha_hash) != CUSTO_BCRYPT:
+        atualizar_senha(usuario, senha, papel)
+    return {'id': id_usuario, 'usuario': usuario, 'papel': papel}
+
+# Função para listar os usuários de um papel
+@banco.leitura_em_cache('credenciais', caminho=banco.BANCO_USUARIOS)
+def listar_usuarios(papel):
+    with banco.conexao(banco.BANCO_USUARIOS) as conn:
+        linhas = conn.execute("SELECT usuario FROM credenciais WHERE papel = ? ORDER BY usuario", (papel,)).fetchall()
+    return [linha[0] for linha in linhas]
+
+# Operação do gravador de novo.db: um comando em credenciais
+def _gravar_credencial(conn, sql, parametros):
+    conn.execute(sql, parametros)
+
+# Função para gravar em credenciais pelo gravador de novo.db (o hash é gerado antes, fora do gravador)
+def _gravar(sql, parametros):
+    escrita.executar(_gravar_credencial, sql, parametros, caminho=banco.BANCO_USUARIOS, altera=('credenciais',))
+
+# Função para criar um usuário; o UNIQUE (usuario, papel) recusa duplicados (retorna False)
+def criar_usuario(usuario, senha, papel):
+    senha_hash = gerar_hash(senha)
+    try:
+        _gravar("INSERT INTO credenciais (usuario, papel, senha_hash, criado_em) VALUES (?, ?, ?, ?)",
+                (usuario, papel, senha_hash, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+# Função para trocar a senha de um usuário
+def atualizar_senha(usuario, nova_senha, papel):
+    senha_hash = gerar_hash(nova_senha)
+    _gravar("UPDATE credenciais SET senha_hash = ? WHERE usuario = ? AND papel = ?", (senha_hash, usuario, papel))
+
+# Função para excluir um usuário
+def excluir_usuario(usuario, papel):
+    _gravar("DELETE FROM credenciais WHERE usuario = ? AND papel = ?", (usuario, papel))
@@ -1,132 +1,275 @@
-import sqlite3
-import streamlit as st
-from datetime import datetime
-
-# Função para criar as tabelas necessárias
-def criar_tabelas():
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    
-    # Criar tabela de alunos
-    c.execute(''' 
-        CREATE TABLE IF NOT EXISTS alunos (
-            matricula INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cpf TEXT NOT NULL UNIQUE,
-            data_nascimento DATE,
-            endereco TEXT,
-            telefone TEXT,
-            email TEXT
-        )
-    ''')
-
-    # Criar tabela de pagamentos
-    c.execute(''' 
-        CREATE TABLE IF NOT EXISTS pagamentos (
-            codigo_pagamento INTEGER PRIMARY KEY AUTOINCREMENT,
-            matricula INTEGER,
-            nome TEXT,
-            cpf TEXT,
-            data_pagamento DATE,
-            plano TEXT,
-            valor REAL,
-            FOREIGN KEY (matricula) REFERENCES alunos (matricula)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-# Função para buscar aluno
-def buscar_aluno(busca_por, valor):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    
-    if busca_por == "Matrícula":
-        c.execute("SELECT * FROM alunos WHERE matricula = ?", (valor,))
-    elif busca_por == "Nome":
-        c.execute("SELECT * FROM alunos WHERE nome LIKE ?", ('%' + valor + '%',))
-    elif busca_por == "CPF":
-        c.execute("SELECT * FROM alunos WHERE cpf = ?", (valor,))
-    
-    aluno = c.fetchone()
-    conn.close()
-    return aluno
-
-# Função para registrar pagamento
-def registrar_pagamento(matricula, nome, cpf, data_pagamento, plano, valor):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    try:
-        # Inserir os dados no banco, convertendo data_pagamento para o formato correto
-        data_pagamento_str = data_pagamento.strftime('%Y-%m-%d')
-        c.execute(''' 
-            INSERT INTO pagamentos (matricula, nome, cpf, data_pagamento, plano, valor) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (matricula, nome, cpf, data_pagamento_str, plano, valor))
-        
-        conn.commit()
-        codigo_pagamento = c.lastrowid  # Obtém o código de pagamento auto-incrementado
-        st.write(f"Dados inseridos: {codigo_pagamento}, {matricula}, {nome}, {cpf}, {data_pagamento}, {plano}, {valor}")  # Log
-    except sqlite3.Error as e:
-        st.write(f"Erro ao registrar pagamento: {e}")  # Log do erro
-        return None
-    finally:
-        conn.close()
-        
-    return codigo_pagamento  # Retorna o código do pagamento gerado
-
-# Interface do Streamlit
-# Função para limpar os campos após registrar o pagamento
-def limpar_campos():
-    st.session_state.aluno_encontrado = None
-    st.session_state.valor_mensalidade = 0.0
-    
-st.title("Registro de Pagamento de Mensalidade")
-
-# Criar tabelas se não existirem
-criar_tabelas()
-
-# Seleção de campo para pesquisa
-busca_por = st.selectbox("Buscar por", ["Matrícula", "Nome", "CPF"])
-valor_busca = st.text_input("Insira o valor para buscar")
-
-# Usar o estado da sessão para armazenar as informações do aluno
-if "aluno_encontrado" not in st.session_state:
-    st.session_state.aluno_encontrado = None
-
-if st.button("Buscar Aluno"):
-    if valor_busca:
-        aluno = buscar_aluno(busca_por, valor_busca)
-        if aluno:
-            st.session_state.aluno_encontrado = aluno
-            matricula, nome, cpf = aluno[0], aluno[1], aluno[2]
-            st.success(f"Aluno encontrado: {nome} - CPF: {cpf}")
-        else:
-            st.error("Aluno não encontrado.")
-    else:
-        st.warning("Por favor, insira um valor para buscar.")
-
-# Input para registrar pagamento
-if st.session_state.aluno_encontrado:
-    matricula, nome, cpf = st.session_state.aluno_encontrado[:3]
-    
-    st.text_input("Matrícula", value=matricula, disabled=True)
-    st.text_input("Nome", value=nome, disabled=True)
-    st.text_input("CPF", value=cpf, disabled=True)
-    
-    data_pagamento = st.date_input("Data de Pagamento", value=datetime.today())
-    plano = st.selectbox("Plano", ["Mensal", "Trimestral", "Semestral", "Anual"])
-    
-    valor_mensalidade = st.number_input("Valor da Mensalidade", min_value=0.0, step=0.01)
-
-    if st.button("Registrar Pagamento"):
-        if valor_mensalidade <= 0:
-            st.error("Por favor, insira um valor de mensalidade válido.")
-        else:
-            codigo = registrar_pagamento(matricula, nome, cpf, data_pagamento, plano, valor_mensalidade)
-            if codigo:
-                st.success(f"Pagamento registrado com sucesso! Código da transação: {codigo}")
-                limpar_campos()
-            else:
-                st.error("Falha ao registrar o pagamento.")
+# Cópias de segurança online de todos os bancos SQLite do app
+# A cópia usa a API de backup do SQLite em passos de PAGINAS_POR_PASSO páginas. Em bancos no modo WAL ela lê
+# de um instantâneo fixo (transação de leitura aberta do início ao fim): a recepção continua gravando durante
+# a cópia e nunca espera por ela. Cada cópia passa por PRAGMA integrity_check antes de ser comprimida (gzip)
+# na pasta de backups; a rotação mantém as mais recentes e uma por dia e por mês.
+# Uso: python backup.py executar | agendar | listar | verificar ARQUIVO | restaurar ARQUIVO
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+import banco
+
+PASTA_BACKUPS = os.environ.get("GDE_BACKUPS", "backups")
+BANCOS = (banco.BANCO_PRINCIPAL, banco.BANCO_USUARIOS, banco.BANCO_TREINOS, 'entradas.db', 'gym_membership.db',
+          'databade.db')
+
+PAGINAS_POR_PASSO = 256  # 1 MB com páginas de 4 KB: cada passo leva poucos milissegundos
+PAUSA_ENTRE_PASSOS_S = 0.001
+# integrity_check confere cada índice contra a tabela (~14 min num banco de 2,8 GB em 1 CPU);
+# quick_check pula essa conferência e leva segundos: GDE_VERIFICACAO_BACKUP=quick_check
+VERIFICACAO = os.environ.get("GDE_VERIFICACAO_BACKUP", "integrity_check")
+NIVEL_COMPRESSAO = 1  # nível 6 comprime ~10% mais e leva 3x o tempo
+TAMANHO_BLOCO = 1024 * 1024
+INTERVALO_BACKUP_S = int(os.environ.get("GDE_INTERVALO_BACKUP_S", 6 * 3600))
+
+# Rotação: as MANTER_RECENTES últimas cópias de cada banco, mais a última de cada dia e de cada mês
+MANTER_RECENTES = 8
+MANTER_DIARIAS = 14
+MANTER_MENSAIS = 12
+
+FORMATO_MOMENTO = "%Y%m%d-%H%M%S"
+PADRAO_ARQUIVO = re.compile(r"^(?P<banco>.+)_(?P<momento>\d{8}-\d{6})\.db\.gz$")
+
+
+# Função para montar o nome do arquivo de backup de um banco (ex.: database_20240131-230000.db.gz)
+def nome_backup(caminho_banco, momento):
+    base = os.path.splitext(os.path.basename(caminho_banco))[0]
+    return f"{base}_{momento.strftime(FORMATO_MOMENTO)}.db.gz"
+
+
+# Função para copiar um banco aberto em uso para outro arquivo, em passos curtos
+# Devolve quantas páginas foram copiadas, em quantos passos, e o tempo mais longo de um passo
+def copiar_banco(origem, destino, paginas_por_passo=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS_S):
+    conn_origem = sqlite3.connect(origem, timeout=banco.TIMEOUT_OCUPADO_MS / 1000, isolation_level=None)
+    conn_destino = sqlite3.connect(destino, isolation_level=None)
+    estatisticas = {'paginas': 0, 'passos': 0, 'maior_passo_ms': 0.0}
+    try:
+        instantaneo = conn_origem.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        if instantaneo:
+            # Leitores não bloqueiam quem grava no WAL; sem o instantâneo, cada gravação reiniciaria a cópia
+            conn_origem.execute("BEGIN")
+            conn_origem.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        conn_destino.execute("PRAGMA synchronous=OFF")  # arquivo novo, verificado antes de ser usado
+
+        ultimo_passo = [time.perf_counter()]
+
+        def progresso(status, restantes, total):
+            agora = time.perf_counter()
+            estatisticas['passos'] += 1
+            estatisticas['paginas'] = total
+            estatisticas['maior_passo_ms'] = max(estatisticas['maior_passo_ms'], (agora - ultimo_passo[0]) * 1000)
+            if pausa and restantes and not instantaneo:
+                time.sleep(pausa)  # no modo rollback é entre os passos que as gravações da recepção passam
+            ultimo_passo[0] = time.perf_counter()
+
+        conn_origem.backup(conn_destino, pages=paginas_por_passo, progress=progresso)
+        if instantaneo:
+            conn_origem.execute("COMMIT")
+        # A cópia herda o modo WAL da origem; no modo rollback o backup é um arquivo só, sem -wal e -shm
+        conn_destino.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn_destino.close()
+        conn_origem.close()
+    estatisticas['instantaneo_wal'] = instantaneo
+    return estatisticas
+
+
+# Função para verificar um arquivo de banco; devolve a lista de problemas (vazia quando está íntegro)
+def verificar_banco(caminho, verificacao=VERIFICACAO):
+    conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    try:
+        # A conferência dos índices lê a tabela em ordem aleatória: com o arquivo em memory map ela roda
+        # até 2x mais rápido que pelo cache de páginas, que fica trocando páginas
+        conn.execute(f"PRAGMA mmap_size={os.path.getsize(caminho)}")
+        problemas = [linha for linha, in conn.execute(f"PRAGMA {verificacao}")]
+    finally:
+        conn.close()
+    return [] if problemas == ['ok'] else problemas
+
+
+# Funções para comprimir e descomprimir em blocos; o arquivo final só aparece completo
+def comprimir(origem, destino, nivel=NIVEL_COMPRESSAO):
+    temporario = destino + ".tmp"
+    with open(origem, 'rb') as entrada, gzip.open(temporario, 'wb', compresslevel=nivel) as saida:
+        shutil.copyfileobj(entrada, saida, TAMANHO_BLOCO)
+    os.replace(temporario, destino)
+
+def descomprimir(origem, destino):
+    temporario = destino + ".tmp"
+    with gzip.open(origem, 'rb') as entrada, open(temporario, 'wb') as saida:
+        shutil.copyfileobj(entrada, saida, TAMANHO_BLOCO)
+    os.replace(temporario, destino)
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+# Função para fazer o backup de um banco: cópia online, integrity_check e compressão
+# A cópia sem compressão fica na própria pasta de backups (mesmo disco) e é apagada no fim
+def fazer_backup(caminho_banco, pasta=PASTA_BACKUPS, momento=None, paginas_por_passo=PAGINAS_POR_PASSO):
+    os.makedirs(pasta, exist_ok=True)
+    arquivo = os.path.join(pasta, nome_backup(caminho_banco, momento or datetime.now()))
+    copia = arquivo[:-len(".gz")] + ".parcial"
+    _remover(copia)
+    try:
+        inicio = time.perf_counter()
+        resultado = copiar_banco(caminho_banco, copia, paginas_por_passo)
+        resultado['copia_s'] = round(time.perf_counter() - inicio, 2)
+
+        inicio = time.perf_counter()
+        problemas = verificar_banco(copia)
+        resultado['verificacao_s'] = round(time.perf_counter() - inicio, 2)
+        if problemas:
+            raise sqlite3.DatabaseError(f"Cópia de {caminho_banco} falhou no {VERIFICACAO}: {problemas[:5]}")
+
+        inicio = time.perf_counter()
+        comprimir(copia, arquivo)
+        resultado['compressao_s'] = round(time.perf_counter() - inicio, 2)
+        resultado['megabytes'] = round(os.path.getsize(copia) / 1024 / 1024, 1)
+        resultado['megabytes_comprimido'] = round(os.path.getsize(arquivo) / 1024 / 1024, 1)
+    finally:
+        _remover(copia)
+    resultado['arquivo'] = arquivo
+    return resultado
+
+
+# Função para fazer o backup de todos os bancos existentes com o mesmo momento no nome, e rotacionar
+def fazer_backups(pasta=PASTA_BACKUPS, bancos=BANCOS):
+    momento = datetime.now()
+    resultados = {caminho: fazer_backup(caminho, pasta, momento) for caminho in bancos if os.path.exists(caminho)}
+    removidos = rotacionar(pasta)
+    return resultados, removidos
+
+
+# Função para listar os backups da pasta: (banco, momento, caminho), do mais recente para o mais antigo
+def listar_backups(pasta=PASTA_BACKUPS):
+    backups = []
+    if os.path.isdir(pasta):
+        for nome in os.listdir(pasta):
+            encontrado = PADRAO_ARQUIVO.match(nome)
+            if encontrado:
+                momento = datetime.strptime(encontrado['momento'], FORMATO_MOMENTO)
+                backups.append((encontrado['banco'], momento, os.path.join(pasta, nome)))
+    backups.sort(key=lambda backup: (backup[0], backup[1]), reverse=True)
+    return backups
+
+
+# Função para escolher os backups que saem na rotação (cada banco é rotacionado separadamente)
+def selecionar_para_remover(backups, recentes=MANTER_RECENTES, diarias=MANTER_DIARIAS, mensais=MANTER_MENSAIS):
+    manter, dias, meses = set(), {}, {}
+    vistos = {}
+    for nome_banco, momento, caminho in sorted(backups, key=lambda backup: backup[1], reverse=True):
+        vistos[nome_banco] = vistos.get(nome_banco, 0) + 1
+        if vistos[nome_banco] <= recentes:
+            manter.add(caminho)
+        for periodos, chave, limite in ((dias, momento.date(), diarias), (meses, (momento.year, momento.month), mensais)):
+            do_banco = periodos.setdefault(nome_banco, set())
+            if chave not in do_banco and len(do_banco) < limite:
+                do_banco.add(chave)
+                manter.add(caminho)  # o primeiro visto de cada período é o mais recente dele
+    return [caminho for _, _, caminho in backups if caminho not in manter]
+
+
+def rotacionar(pasta=PASTA_BACKUPS):
+    removidos = selecionar_para_remover(listar_backups(pasta))
+    for caminho in removidos:
+        _remover(caminho)
+    return removidos
+
+
+# Função para restaurar um backup sobre o banco em uso (padrão: o banco de onde o backup veio)
+# O backup já passou pelo integrity_check antes de ser comprimido e o gzip confere o CRC do conteúdo
+# na descompressão, então a restauração não verifica de novo. O conteúdo entra pela API de backup numa única
+# transação: quem está com o banco aberto vê o banco antigo ou o restaurado, nunca uma mistura, e os caches
+# do app percebem a troca pelo PRAGMA data_version
+def restaurar(arquivo, destino=None, pasta=PASTA_BACKUPS, salvar_atual=True):
+    encontrado = PADRAO_ARQUIVO.match(os.path.basename(arquivo))
+    if destino is None:
+        if not encontrado:
+            raise ValueError(f"Não foi possível saber o banco de origem de {arquivo}; informe o destino")
+        destino = encontrado['banco'] + ".db"
+
+    os.makedirs(pasta, exist_ok=True)
+    copia = os.path.join(pasta, os.path.basename(destino) + ".restaurando")
+    anterior = None
+    try:
+        descomprimir(arquivo, copia)
+        # Cópia do estado atual antes de sobrescrever, para desfazer uma restauração errada
+        if salvar_atual and os.path.exists(destino):
+            anterior = fazer_backup(destino, pasta)['arquivo']
+
+        conn_copia = sqlite3.connect(copia)
+        conn_destino = banco.abrir_conexao(destino)
+        try:
+            conn_copia.backup(conn_destino)
+        finally:
+            conn_destino.close()
+            conn_copia.close()
+    finally:
+        _remover(copia)
+
+    if os.path.basename(destino) == banco.BANCO_PRINCIPAL:
+        _depois_de_restaurar_principal(destino)
+    return anterior
+
+
+# O backup pode ser de uma versão anterior do esquema, e o instantâneo analítico pode ter pagamentos
+# que não existem mais com o mesmo número de linhas: as migrações rodam e o instantâneo é refeito
+def _depois_de_restaurar_principal(destino):
+    import analitico
+    import migracoes
+
+    conn = banco.abrir_conexao(destino)
+    try:
+        migracoes.aplicar_migracoes(conn, migracoes.MIGRACOES[banco.BANCO_PRINCIPAL])
+    finally:
+        conn.close()
+    analitico.obter_instantaneo().invalidar()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backup online dos bancos SQLite do app")
+    parser.add_argument("acao", choices=["executar", "agendar", "listar", "verificar", "restaurar"])
+    parser.add_argument("arquivo", nargs="?", help="backup a verificar ou restaurar")
+    parser.add_argument("--destino", help="banco a sobrescrever na restauração (padrão: o de origem do backup)")
+    parser.add_argument("--pasta", default=PASTA_BACKUPS)
+    parser.add_argument("--sem-copia-atual", action="store_true", help="não salva o banco atual antes de restaurar")
+    args = parser.parse_args()
+
+    if args.acao in ("executar", "agendar"):
+        while True:
+            resultados, removidos = fazer_backups(args.pasta)
+            for caminho, resultado in resultados.items():
+                print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {caminho}: {resultado}")
+            for caminho in removidos:
+                print(f"removido na rotação: {caminho}")
+            if args.acao == "executar":
+                break
+            time.sleep(INTERVALO_BACKUP_S)
+    elif args.acao == "listar":
+        for nome_banco, momento, caminho in listar_backups(args.pasta):
+            print(f"{nome_banco:<20} {momento:%Y-%m-%d %H:%M:%S} {os.path.getsize(caminho) / 1024 / 1024:>9.1f} MB  {caminho}")
+    elif not args.arquivo:
+        parser.error(f"{args.acao} precisa do arquivo de backup")
+    elif args.acao == "verificar":
+        copia = os.path.join(args.pasta, os.path.basename(args.arquivo) + ".verificando")
+        try:
+            descomprimir(args.arquivo, copia)
+            problemas = verificar_banco(copia)
+        finally:
+            _remover(copia)
+        print("ok" if not problemas else "\n".join(problemas))
+    else:
+        anterior = restaurar(args.arquivo, args.destino, args.pasta, salvar_atual=not args.sem_copia_atual)
+        print(f"Restaurado. Estado anterior salvo em: {anterior or 'nenhum (banco não existia)'}")
@@ -0,0 +1,278 @@
+import functools
+import os
+import queue
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import streamlit as st
+
+import cache_compartilhado
+import perfil
+
+BANCO_PRINCIPAL = 'database.db'
+BANCO_USUARIOS = 'novo.db'
+BANCO_TREINOS = 'treino_academia.db'
+
+# Bancos que ficam em arquivos próprios (credenciais longe dos dados dos alunos; catálogo de exercícios)
+# e são anexados (ATTACH) às conexões de leitura do banco principal: "usuarios.credenciais" e "treinos.exercicios"
+# entram no mesmo JOIN que alunos e pagamentos, na mesma conexão do pool
+# No modo WAL o commit é atômico em cada arquivo, não no conjunto: uma transação grava em um banco só, pelo
+# gravador daquele arquivo (escrita.py), que abre a conexão sem anexos
+ANEXOS = {'usuarios': BANCO_USUARIOS, 'treinos': BANCO_TREINOS}
+
+TAMANHO_POOL = 4
+TIMEOUT_POOL_S = 10
+TIMEOUT_OCUPADO_MS = 5000
+CACHE_COMANDOS = 256
+TTL_CACHE_S = 600  # rede de segurança: nenhuma leitura fica em cache mais que isso
+
+# Pragmas aplicados uma única vez, quando a conexão é aberta pelo pool
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={TIMEOUT_OCUPADO_MS}",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+)
+# journal_mode e synchronous valem por arquivo: repetidos em cada banco anexado
+PRAGMAS_ANEXOS = (
+    "PRAGMA {esquema}.journal_mode=WAL",
+    "PRAGMA {esquema}.synchronous=NORMAL",
+)
+
+
+# Revisão de cada tabela (por banco), incrementada a cada escrita feita pelo app; usada como chave dos caches de leitura
+# Tabelas mantidas por gatilhos (ultimo_pagamento, resumos, alunos_fts) seguem a revisão da tabela de origem
+_revisoes = Counter()
+_trava_revisoes = threading.Lock()
+
+# Tabela de um banco anexado ("usuarios.credenciais") usada pelo banco principal: a revisão é a do arquivo dela
+def _chave(caminho, tabela):
+    esquema, _, nome = tabela.rpartition('.')
+    if esquema in ANEXOS and caminho == BANCO_PRINCIPAL:
+        return ANEXOS[esquema], nome
+    return caminho, tabela
+
+# Bancos cujas gravações de fora do app invalidam as leituras dessas tabelas
+def arquivos(caminho, tabelas):
+    return sorted({caminho, *(_chave(caminho, tabela)[0] for tabela in tabelas)})
+
+def revisao(tabela, caminho=BANCO_PRINCIPAL):
+    return _revisoes[_chave(caminho, tabela)]
+
+# Com vários workers a revisão também vai para o cache compartilhado; escrita sem tabelas informadas não entra,
+# e os outros workers a tratam como alteração externa (todas as leituras do arquivo)
+def registrar_escrita(caminho, *tabelas):
+    chaves = [_chave(caminho, tabela) for tabela in tabelas]
+    with _trava_revisoes:
+        for chave in chaves:
+            _revisoes[chave] += 1
+    compartilhado = cache_compartilhado.obter_cache()
+    if compartilhado and chaves:
+        compartilhado.registrar_escrita(chaves, arquivos(caminho, tabelas))
+
+
+# Função para anexar os bancos auxiliares, procurados na pasta do banco principal
+def _anexar(conn, caminho):
+    pasta = os.path.dirname(caminho)
+    for esquema, arquivo in ANEXOS.items():
+        conn.execute(f"ATTACH DATABASE ? AS {esquema}", (os.path.join(pasta, arquivo),))
+        for pragma in PRAGMAS_ANEXOS:
+            conn.execute(pragma.format(esquema=esquema))
+
+
+# Função para abrir uma conexão já configurada (pool e gravadores em segundo plano)
+# anexar=False deixa o banco principal sem os auxiliares: o BEGIN IMMEDIATE de uma conexão com anexos trava a
+# escrita de todos os arquivos anexados, e cada gravador deve travar só o seu
+def abrir_conexao(caminho=BANCO_PRINCIPAL, anexar=True):
+    # cached_statements mantém os comandos já preparados por conexão
+    conn = sqlite3.connect(
+        caminho,
+        timeout=TIMEOUT_OCUPADO_MS / 1000,
+        check_same_thread=False,
+        cached_statements=CACHE_COMANDOS,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if anexar and os.path.basename(caminho) == BANCO_PRINCIPAL:
+        _anexar(conn, caminho)
+    return conn
+
+
+# Pool de conexões reaproveitadas entre as execuções das páginas
+class PoolConexoes:
+    def __init__(self, caminho, tamanho=TAMANHO_POOL):
+        self.caminho = caminho
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+
+    def _abrir(self):
+        return abrir_conexao(self.caminho)
+
+    def obter(self):
+        if not self._vagas.acquire(timeout=TIMEOUT_POOL_S):
+            raise sqlite3.OperationalError(f"Nenhuma conexão livre para {self.caminho}")
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            try:
+                return self._abrir()
+            except Exception:
+                self._vagas.release()
+                raise
+
+    def devolver(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._livres.put(conn)
+        finally:
+            self._vagas.release()
+
+
+# Um pool por arquivo de banco, compartilhado por todas as sessões do processo
+@st.cache_resource
+def obter_pool(caminho=BANCO_PRINCIPAL):
+    return PoolConexoes(caminho)
+
+
+# Função para usar uma conexão do pool (somente leitura ou controle manual)
+@contextmanager
+def conexao(caminho=BANCO_PRINCIPAL):
+    pool = obter_pool(caminho)
+    with perfil.secao('sql'):
+        conn = pool.obter()
+        try:
+            yield conn
+        finally:
+            pool.devolver(conn)
+
+
+# Função para executar comandos em uma transação (commit ou rollback automático)
+# As tabelas informadas em "altera" têm a revisão incrementada após o commit
+# Usada pelas ferramentas de linha de comando; as páginas gravam pelo gravador único (escrita.py)
+@contextmanager
+def transacao(caminho=BANCO_PRINCIPAL, altera=()):
+    with conexao(caminho) as conn:
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        if altera:
+            # A conexão do pool não sabe se outro processo gravou desde o seu último uso: conta como externa
+            for arquivo in arquivos(caminho, altera):
+                monitor = obter_monitor(arquivo)
+                monitor.sincronizar()
+                monitor.registrar_externa()
+    registrar_escrita(caminho, *altera)
+
+
+# Observa o PRAGMA data_version em uma conexão dedicada: o valor muda quando qualquer outra conexão
+# (outro processo, cron, sqlite3 na linha de comando ou o próprio pool) grava no arquivo
+class MonitorAlteracoes:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._trava = threading.Lock()
+        self._versao = self._ler_versao()
+        self.geracao = 0
+
+    def _ler_versao(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # Mudança não registrada pelo app: invalida todas as leituras em cache deste banco
+    def verificar(self):
+        with self._trava:
+            versao = self._ler_versao()
+            if versao != self._versao:
+                self._versao = versao
+                self.geracao += 1
+            return self.geracao
+
+    # Chamado logo após um commit do app, que já incrementou as revisões das tabelas alteradas
+    # O valor lido aqui inclui qualquer gravação de outra conexão desde a última leitura: quem grava confere
+    # depois, na própria conexão, se houve alguma, e chama registrar_externa
+    def sincronizar(self):
+        with self._trava:
+            self._versao = self._ler_versao()
+
+    # Gravação de outra conexão percebida por quem grava (o data_version da conexão dele mudou)
+    # Com vários workers os outros também precisam saber: o cache compartilhado não distingue essa gravação
+    # do commit do app que veio junto
+    def registrar_externa(self):
+        with self._trava:
+            self.geracao += 1
+        compartilhado = cache_compartilhado.obter_cache()
+        if compartilhado:
+            compartilhado.registrar_externa(self.caminho)
+
+
+@st.cache_resource
+def obter_monitor(caminho=BANCO_PRINCIPAL):
+    return MonitorAlteracoes(caminho)
+
+
+# Acertos e faltas de cada leitura em cache (faltas = vezes que o banco foi consultado)
+_estatisticas = Counter()
+
+def estatisticas_cache():
+    nomes = sorted({nome for nome, _ in _estatisticas})
+    return [
+        {
+            'leitura': nome,
+            'chamadas': _estatisticas[(nome, 'chamadas')],
+            'acertos': _estatisticas[(nome, 'chamadas')] - _estatisticas[(nome, 'faltas')],
+            'faltas': _estatisticas[(nome, 'faltas')],
+        }
+        for nome in nomes
+    ]
+
+
+# Decorador para leituras servidas da memória até que uma das tabelas informadas mude
+# A chave do cache inclui a revisão das tabelas e a geração do monitor de alterações externas
+# Com o cache compartilhado ligado a chave é a versão compartilhada entre os workers, e a falta no cache do
+# processo procura o resultado no cache compartilhado antes de ir ao banco
+# Tabelas de bancos anexados entram como "esquema.tabela" (ex.: 'usuarios.credenciais')
+def leitura_em_cache(*tabelas, caminho=BANCO_PRINCIPAL, max_entries=100, ttl=TTL_CACHE_S):
+    chaves = [_chave(caminho, tabela) for tabela in tabelas]
+    bancos = arquivos(caminho, tabelas)
+
+    def decorador(funcao):
+        nome = f"{funcao.__module__}.{funcao.__qualname__}"
+
+        def calcular(*args, **kwargs):
+            with _trava_revisoes:
+                _estatisticas[(nome, 'faltas')] += 1
+            return funcao(*args, **kwargs)
+
+        def consultar(versao, *args, **kwargs):
+            if versao[0] == 'compartilhado':
+                return cache_compartilhado.obter_cache().ler_ou_calcular(
+                    nome, versao, args, kwargs, lambda: calcular(*args, **kwargs), ttl or TTL_CACHE_S)
+            return calcular(*args, **kwargs)
+
+        # Nome próprio para cada função decorada ter o seu cache no Streamlit
+        consultar.__module__ = funcao.__module__
+        consultar.__qualname__ = funcao.__qualname__
+        consultar = st.cache_data(max_entries=max_entries, ttl=ttl, show_spinner=False)(consultar)
+
+        @functools.wraps(funcao)
+        def leitura(*args, **kwargs):
+            with _trava_revisoes:
+                _estatisticas[(nome, 'chamadas')] += 1
+                revisoes = tuple(_revisoes[chave] for chave in chaves)
+            geracoes = {arquivo: obter_monitor(arquivo).verificar() for arquivo in bancos}
+            compartilhado = cache_compartilhado.obter_cache()
+            versao = compartilhado.versao(chaves, geracoes) if compartilhado else None
+            if versao is not None:
+                return consultar(('compartilhado', versao), *args, **kwargs)
+            return consultar((tuple(geracoes.values()), revisoes), *args, **kwargs)
+
+        leitura.limpar = consultar.clear
+        return leitura
+    return decorador
@@ -0,0 +1,80 @@
+# Benchmark da decisão de acesso na catraca: caminho antigo (aluno + pagamentos + cálculo do status),
+# consulta SQL única e índice em memória
+# Uso: python -m benchmarks.bench_acesso --pasta /tmp/bench --consultas 2000
+import argparse
+import logging
+import os
+import random
+import statistics
+import time
+from datetime import date
+
+import pandas as pd
+
+import banco
+import catraca
+import treino
+
+# Caminho antigo: busca o aluno, lê todos os pagamentos dele e calcula o status do último
+def decidir_caminho_antigo(matricula):
+    aluno = treino.buscar_aluno("Matrícula", matricula)
+    with banco.conexao() as conn:
+        pagamentos = pd.read_sql_query("SELECT data_pagamento, plano FROM pagamentos WHERE matricula = ?",
+                                       conn, params=(matricula,))
+    if aluno is None or pagamentos.empty:
+        return False
+    ultimo = pagamentos.sort_values('data_pagamento').iloc[-1]
+    return treino.alerta_proximo_pagamento(ultimo['data_pagamento'], ultimo['plano']) == "Em dia"
+
+def decidir_sql(matricula):
+    with banco.conexao() as conn:
+        aluno = catraca.consultar_acesso(conn, matricula)
+    return aluno is not None and catraca.acesso_liberado(aluno[3])
+
+def medir(funcao, amostra):
+    tempos = []
+    for matricula in amostra:
+        inicio = time.perf_counter()
+        funcao(matricula)
+        tempos.append((time.perf_counter() - inicio) * 1e6)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--consultas", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+    with banco.conexao() as conn:
+        matriculas = [linha[0] for linha in conn.execute("SELECT matricula FROM alunos")]
+    amostra = random.Random(7).choices(matriculas, k=args.consultas)
+
+    indice = catraca.IndiceAcesso()
+    inicio = time.perf_counter()
+    indice.consultar(amostra[0])  # primeira consulta carrega o índice
+    carga = time.perf_counter() - inicio
+    memoria = indice.tamanho_memoria()
+    print(f"Índice: {memoria['alunos']} alunos carregados em {carga * 1000:.0f} ms, "
+          f"{memoria['bytes'] / 1024 / 1024:.1f} MB ({memoria['bytes'] / max(1, memoria['alunos']):.0f} bytes/aluno)")
+
+    hoje = date.today()
+    def decidir_indice(matricula):
+        aluno = indice.consultar(matricula)
+        return aluno is not None and catraca.acesso_liberado(aluno[3], hoje)
+
+    # As três formas têm que concordar antes de comparar os tempos
+    divergentes = sum(decidir_sql(m) != decidir_indice(m) for m in amostra[:200])
+    print(f"Decisões divergentes entre SQL e índice (200 amostras): {divergentes}")
+
+    print(f"\n{'caminho':<22} {'mediana (µs)':>13} {'p99 (µs)':>10}")
+    for nome, funcao, consultas in (("antigo (3 passos)", decidir_caminho_antigo, amostra[:max(1, len(amostra) // 10)]),
+                                    ("consulta SQL única", decidir_sql, amostra),
+                                    ("índice em memória", decidir_indice, amostra)):
+        mediana, p99 = medir(funcao, consultas)
+        print(f"{nome:<22} {mediana:>13.1f} {p99:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Benchmark do instantâneo analítico: leituras dos painéis no SQLite x no Arrow por memory map,
+# custo da exportação inicial e da atualização incremental, e a latência de quem grava enquanto os painéis leem
+# Uso: python -m benchmarks.bench_analitico --pasta /tmp/bench
+# Grava pagamentos e cria a pasta analitico/ na pasta medida (gerada por benchmarks.gerar_dados): nunca use a pasta do app
+import argparse
+import logging
+import os
+import random
+import shutil
+import statistics
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+
+import analitico
+import banco
+import pagamentos
+import vencimentos
+
+SQL_RELATORIO = f'''
+    SELECT p.codigo_pagamento, p.matricula, a.nome, a.cpf, p.unidade, p.plano, p.data_pagamento,
+           p.data_vencimento, p.valor
+    FROM pagamentos p
+    LEFT JOIN alunos a ON a.matricula = p.matricula
+    WHERE p.codigo_pagamento IN (
+        SELECT codigo_pagamento FROM pagamentos_base
+        WHERE data_pagamento BETWEEN {pagamentos.sql_dias('?')} AND {pagamentos.sql_dias('?')}
+    )
+    ORDER BY p.data_pagamento
+'''
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+# Consultas dos painéis nas duas fontes (SQLite pelo pool x instantâneo Arrow)
+def medir_leituras(repeticoes):
+    hoje = date.today()
+    inicio_ano = hoje.replace(month=1, day=1)
+
+    def sql(consulta, parametros=()):
+        with banco.conexao() as conn:
+            return pd.read_sql_query(consulta, conn, params=parametros)
+
+    def situacao_sql():
+        with banco.conexao() as conn:
+            return vencimentos.consultar_situacao(conn)
+
+    return {
+        "situação dos alunos": (cronometrar(situacao_sql, repeticoes),
+                                cronometrar(lambda: analitico.consultar_situacao(), repeticoes)),
+        "relatório do ano": (cronometrar(lambda: sql(SQL_RELATORIO, (inicio_ano.isoformat(), hoje.isoformat())), repeticoes),
+                             cronometrar(lambda: analitico.consultar_relatorio(inicio_ano, hoje).to_pandas(), repeticoes)),
+    }
+
+# Latência de cada pagamento gravado enquanto "leitores" threads repetem a leitura de um painel
+def medir_escrita_concorrente(leitura, leitores, gravacoes, matriculas):
+    parar = threading.Event()
+
+    def ler():
+        while not parar.is_set():
+            leitura()
+
+    threads = [threading.Thread(target=ler, daemon=True) for _ in range(leitores)]
+    for thread in threads:
+        thread.start()
+    tempos = []
+    for i in range(gravacoes):
+        inicio = time.perf_counter()
+        with banco.transacao(altera=('pagamentos',)) as conn:
+            pagamentos.inserir(conn, (matriculas[i % len(matriculas)], "Academia I", date.today().isoformat(), "Mensal",
+                                      100.0, "Em dia", None))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--leitores", type=int, default=3)
+    parser.add_argument("--gravacoes", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos e a pasta analitico/ são abertos pelo nome relativo, como no app
+    shutil.rmtree(analitico.PASTA_ANALITICO, ignore_errors=True)
+    with banco.conexao() as conn:
+        matriculas = [linha[0] for linha in conn.execute("SELECT matricula FROM alunos ORDER BY random() LIMIT 1000")]
+    random.Random(7).shuffle(matriculas)
+
+    instantaneo = analitico.obter_instantaneo()
+    inicio = time.perf_counter()
+    instantaneo.atualizar(exportar_alunos=True)
+    print(f"Exportação inicial: {time.perf_counter() - inicio:.1f}s | {instantaneo.informacoes()}")
+
+    with banco.transacao(altera=('pagamentos',)) as conn:
+        pagamentos.inserir_varios(conn, [(matricula, "Academia I", date.today().isoformat(), "Mensal", 100.0, "Em dia",
+                                          None) for matricula in matriculas[:100]])
+    inicio = time.perf_counter()
+    instantaneo.atualizar()
+    print(f"Atualização incremental (100 pagamentos novos): {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    print(f"\n{'leitura (mediana)':<26} {'SQLite (ms)':>12} {'Arrow (ms)':>11}")
+    for leitura, (sqlite, arrow) in medir_leituras(args.repeticoes).items():
+        print(f"{leitura:<26} {sqlite:>12.2f} {arrow:>11.2f}")
+
+    print(f"\nGravação de pagamentos com {args.leitores} painéis lendo ao mesmo tempo (mediana / p99, ms):")
+    def situacao_sql():
+        with banco.conexao() as conn:
+            vencimentos.consultar_situacao(conn)
+    for nome, leitura in (("lendo do SQLite", situacao_sql),
+                          ("lendo do instantâneo", lambda: analitico.consultar_situacao())):
+        mediana, p99 = medir_escrita_concorrente(leitura, args.leitores, args.gravacoes, matriculas)
+        print(f"  {nome:<22} {mediana:>8.2f} / {p99:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Benchmark do backup online: duração da cópia, verificação, compressão e restauração, e a maior espera
+# de quem grava pagamentos enquanto o backup roda (comparada com a mesma gravação sem backup)
+# Uso: python -m benchmarks.bench_backup --pasta /tmp/bench
+# Grava pagamentos no banco da pasta medida (gerada por benchmarks.gerar_dados): nunca use a pasta do app
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+
+import backup
+import banco
+import pagamentos
+
+# Grava um pagamento por transação, como a recepção, até "parar"; guarda a latência de cada commit
+def gravar_continuamente(parar, tempos, matriculas, intervalo):
+    i = 0
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        with banco.transacao(altera=('pagamentos',)) as conn:
+            pagamentos.inserir(conn, (matriculas[i % len(matriculas)], "Academia I", date.today().isoformat(),
+                                      "Mensal", 100.0, "Em dia", None))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        i += 1
+        time.sleep(intervalo)
+
+def resumir(tempos):
+    tempos = sorted(tempos)
+    return {'gravacoes': len(tempos), 'mediana_ms': statistics.median(tempos),
+            'p99_ms': tempos[int(len(tempos) * 0.99)], 'max_ms': tempos[-1]}
+
+# Roda "tarefa" com o gravador em paralelo; devolve o resultado da tarefa, a duração e as latências de gravação
+def com_gravador(tarefa, matriculas, intervalo):
+    parar, tempos = threading.Event(), []
+    gravador = threading.Thread(target=gravar_continuamente, args=(parar, tempos, matriculas, intervalo))
+    gravador.start()
+    time.sleep(0.2)  # o gravador já está em regime quando a tarefa começa
+    inicio = time.perf_counter()
+    try:
+        resultado = tarefa()
+    finally:
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        gravador.join()
+    return resultado, duracao, resumir(tempos)
+
+def tamanho_wal(caminho):
+    try:
+        return os.path.getsize(caminho + "-wal") / 1024 / 1024
+    except OSError:
+        return 0.0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--paginas", default="64,256,1024,-1", help="páginas por passo a comparar (-1 = tudo de uma vez)")
+    parser.add_argument("--intervalo-ms", type=float, default=2.0, help="pausa do gravador entre um pagamento e outro")
+    parser.add_argument("--sem-gravador-s", type=float, default=5.0, help="duração da medição de referência")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+    caminho = banco.BANCO_PRINCIPAL
+    intervalo = args.intervalo_ms / 1000
+    rascunho = tempfile.mkdtemp(prefix="backup_", dir=".")  # mesmo disco dos bancos, como a pasta de backups
+    with banco.conexao() as conn:
+        matriculas = [linha[0] for linha in conn.execute("SELECT matricula FROM alunos ORDER BY random() LIMIT 1000")]
+    print(f"{caminho}: {os.path.getsize(caminho) / 1024 / 1024 / 1024:.2f} GB")
+
+    try:
+        _, _, referencia = com_gravador(lambda: time.sleep(args.sem_gravador_s), matriculas, intervalo)
+        print(f"\n{'cenário':<26} {'duração (s)':>11} {'maior passo (ms)':>17} {'gravações':>10} "
+              f"{'mediana (ms)':>13} {'p99 (ms)':>9} {'max (ms)':>9} {'WAL (MB)':>9}")
+        print(f"{'sem backup':<26} {args.sem_gravador_s:>11.1f} {'-':>17} {referencia['gravacoes']:>10} "
+              f"{referencia['mediana_ms']:>13.2f} {referencia['p99_ms']:>9.2f} {referencia['max_ms']:>9.2f} "
+              f"{tamanho_wal(caminho):>9.1f}")
+
+        for paginas in (int(valor) for valor in args.paginas.split(",")):
+            destino = os.path.join(rascunho, f"copia_{paginas}.db")
+            estatisticas, duracao, gravacao = com_gravador(
+                lambda: backup.copiar_banco(caminho, destino, paginas_por_passo=paginas), matriculas, intervalo)
+            wal = tamanho_wal(caminho)
+            os.remove(destino)
+            print(f"{f'cópia, {paginas} páginas/passo':<26} {duracao:>11.1f} {estatisticas['maior_passo_ms']:>17.1f} "
+                  f"{gravacao['gravacoes']:>10} {gravacao['mediana_ms']:>13.2f} {gravacao['p99_ms']:>9.2f} "
+                  f"{gravacao['max_ms']:>9.2f} {wal:>9.1f}")
+            with banco.conexao() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # cada cenário começa com o WAL vazio
+
+        resultado, duracao, gravacao = com_gravador(lambda: backup.fazer_backup(caminho, rascunho), matriculas, intervalo)
+        print(f"\nBackup completo com gravações em paralelo: {duracao:.1f}s (cópia {resultado['copia_s']}s, "
+              f"{backup.VERIFICACAO} {resultado['verificacao_s']}s, compressão {resultado['compressao_s']}s) | "
+              f"{resultado['megabytes']:.0f} MB -> {resultado['megabytes_comprimido']:.0f} MB | "
+              f"gravações: mediana {gravacao['mediana_ms']:.2f} ms, max {gravacao['max_ms']:.2f} ms")
+
+        restaurado = os.path.join(rascunho, "restaurado.db")
+        inicio = time.perf_counter()
+        backup.restaurar(resultado['arquivo'], restaurado, rascunho)
+        print(f"Restauração em um banco novo (descompressão e cópia): "
+              f"{time.perf_counter() - inicio:.1f}s")
+    finally:
+        shutil.rmtree(rascunho, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
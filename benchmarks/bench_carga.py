@@ -0,0 +1,152 @@
+# Teste de carga do modo com vários workers: sobe N processos do Streamlit sobre uma pasta gerada por
+# benchmarks.gerar_dados, como os workers do docker-compose.yml, e mede a latência interativa (do pedido de
+# rerun até o script_finished, pelo websocket do Streamlit) com U usuários simultâneos. Cada usuário fica num
+# worker só, como na sessão fixa do nginx, e alterna entre as páginas com uma pausa para "pensar".
+# Uso: python -m benchmarks.bench_carga --pasta /tmp/bench --workers 1,2,4 --usuarios 16 --duracao 30
+# Sem o nginx na frente: ele só repassa os bytes do websocket; o que muda de 1 para N workers é quantos
+# interpretadores Python (e GILs) dividem as sessões, e o ganho vai até o número de CPUs da máquina.
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORTA_INICIAL = 8610
+PAGINAS = "Cadastro Aluno,Pagamentos,Gestão de Entrada,Montar Treino"
+TIMEOUT_INICIO_S = 60
+TAMANHO_MAXIMO_MENSAGEM = 256 * 1024 * 1024
+
+# Script de cada worker: a página vem da URL, sem a tela de login (como em benchmarks.bench_paginas)
+SCRIPT_WORKER = '''
+import streamlit as st
+import migracoes
+import paginas
+migracoes.garantir_esquema()
+paginas.renderizar(st.query_params["pagina"])
+'''
+
+def derrubar(processos):
+    for processo in processos:
+        processo.terminate()
+    for processo in processos:
+        processo.wait()
+
+# Função para subir os workers nas portas PORTA_INICIAL.. e esperar cada um responder em /_stcore/health
+def subir_workers(quantidade, pasta, script, compartilhado):
+    ambiente = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [RAIZ, os.environ.get("PYTHONPATH")]))}
+    ambiente.pop("GDE_CACHE_COMPARTILHADO", None)
+    if compartilhado:
+        ambiente["GDE_CACHE_COMPARTILHADO"] = os.path.join(pasta, "cache_compartilhado.db")
+    processos = [
+        subprocess.Popen([
+            sys.executable, "-m", "streamlit", "run", script, f"--server.port={PORTA_INICIAL + i}",
+            "--server.address=127.0.0.1", "--server.headless=true", "--server.fileWatcherType=none",
+            "--browser.gatherUsageStats=false",
+        ], cwd=pasta, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for i in range(quantidade)
+    ]
+    limite = time.monotonic() + TIMEOUT_INICIO_S
+    for i in range(quantidade):
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{PORTA_INICIAL + i}/_stcore/health", timeout=1):
+                    break
+            except OSError:
+                if time.monotonic() > limite:
+                    derrubar(processos)
+                    raise RuntimeError(f"Worker na porta {PORTA_INICIAL + i} não respondeu em {TIMEOUT_INICIO_S}s")
+                time.sleep(0.2)
+    return processos
+
+# Um usuário: pede o rerun de uma página e espera o fim da execução; só mede depois do aquecimento
+async def usuario(porta, paginas, inicio_medicao, fim, pausa_s, rng, latencias, erros):
+    conexao = await websocket_connect(f"ws://127.0.0.1:{porta}/_stcore/stream", subprotocols=["streamlit"],
+                                      max_message_size=TAMANHO_MAXIMO_MENSAGEM)
+    try:
+        vez = rng.randrange(len(paginas))
+        while time.monotonic() < fim:
+            pedido = BackMsg()
+            pedido.rerun_script.query_string = urlencode({'pagina': paginas[vez % len(paginas)]})
+            vez += 1
+            inicio = time.perf_counter()
+            await conexao.write_message(pedido.SerializeToString(), binary=True)
+            com_erro = False
+            while True:
+                dados = await conexao.read_message()
+                if dados is None:
+                    raise ConnectionError(f"Worker na porta {porta} fechou o websocket")
+                resposta = ForwardMsg()
+                resposta.ParseFromString(dados)
+                tipo = resposta.WhichOneof('type')
+                if tipo == 'delta' and resposta.delta.new_element.WhichOneof('type') == 'exception':
+                    com_erro = True
+                elif tipo == 'script_finished' and resposta.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    break
+            if time.monotonic() >= inicio_medicao:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                erros[0] += com_erro
+            await asyncio.sleep(rng.uniform(0, 2 * pausa_s))
+    finally:
+        conexao.close()
+
+async def carga(workers, usuarios, paginas, aquecimento_s, duracao_s, pausa_s):
+    latencias, erros = [], [0]
+    rng = random.Random(7)
+    inicio_medicao = time.monotonic() + aquecimento_s
+    fim = inicio_medicao + duracao_s
+    await asyncio.gather(*(
+        usuario(PORTA_INICIAL + i % workers, paginas, inicio_medicao, fim, pausa_s, random.Random(rng.random()),
+                latencias, erros)
+        for i in range(usuarios)
+    ))
+    return latencias, erros[0]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--workers", default="1,2,4", help="quantidades de workers medidas")
+    parser.add_argument("--usuarios", type=int, default=16, help="usuários simultâneos")
+    parser.add_argument("--paginas", default=PAGINAS, help="títulos de paginas.PAGINAS separados por vírgula")
+    parser.add_argument("--duracao", type=float, default=30, help="segundos medidos em cada cenário")
+    parser.add_argument("--aquecimento", type=float, default=10, help="segundos descartados no início")
+    parser.add_argument("--pausa", type=float, default=1.0, help="pausa média do usuário entre duas interações (s)")
+    parser.add_argument("--sem-cache-compartilhado", action="store_true")
+    args = parser.parse_args()
+
+    pasta = os.path.abspath(args.pasta)
+    paginas = args.paginas.split(",")
+    print(f"{os.cpu_count()} CPUs | {args.usuarios} usuários | páginas: {', '.join(paginas)} | "
+          f"cache compartilhado: {'não' if args.sem_cache_compartilhado else 'sim'}")
+    print(f"{'workers':>7} {'reruns/s':>9} {'mediana (ms)':>12} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+    with tempfile.TemporaryDirectory() as temporaria:
+        script = os.path.join(temporaria, "carga.py")
+        with open(script, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(SCRIPT_WORKER)
+        for workers in (int(valor) for valor in args.workers.split(",")):
+            processos = subir_workers(workers, pasta, script, not args.sem_cache_compartilhado)
+            try:
+                latencias, erros = asyncio.run(carga(workers, args.usuarios, paginas, args.aquecimento,
+                                                     args.duracao, args.pausa))
+            finally:
+                derrubar(processos)
+            if not latencias:
+                print(f"{workers:>7} {'-':>9} {'-':>12} {'-':>9} {'-':>9} {erros:>6}")
+                continue
+            latencias.sort()
+            print(f"{workers:>7} {len(latencias) / args.duracao:>9.1f} {statistics.median(latencias):>12.1f} "
+                  f"{latencias[int(len(latencias) * 0.95)]:>9.1f} {latencias[int(len(latencias) * 0.99)]:>9.1f} "
+                  f"{erros:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Benchmark da conciliação do extrato: cruzamento em lote x busca e registro linha a linha
+# Uso: python -m benchmarks.bench_conciliacao --pasta /tmp/bench --linhas 20000
+# Registra pagamentos na pasta medida (gerada por benchmarks.gerar_dados): nunca use a pasta do app
+import argparse
+import io
+import logging
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import banco
+import conciliacao
+import treino
+
+# Função para montar um extrato de um mês das duas unidades: CPF no histórico do PIX, matrícula
+# em coluna própria, pagadores desconhecidos, linhas sem identificação e débitos
+def gerar_extrato(linhas, semente=7):
+    rng = np.random.default_rng(semente)
+    with banco.conexao() as conn:
+        alunos = pd.read_sql_query("SELECT matricula, cpf FROM alunos ORDER BY random() LIMIT ?", conn, params=(linhas,))
+    alunos = alunos.sample(linhas, replace=True, random_state=semente).reset_index(drop=True)
+    inicio = date.today().replace(day=1) - timedelta(days=1)
+    datas = [(inicio - timedelta(days=int(d))).strftime('%d/%m/%Y') for d in rng.integers(0, 28, linhas)]
+    tipo = rng.choice(["cpf", "matricula", "desconhecido", "sem_id", "debito"], linhas, p=[0.7, 0.2, 0.04, 0.03, 0.03])
+    cpf_formatado = alunos['cpf'].str.replace(r'(\d{3})(\d{3})(\d{3})(\d{2})', r'\1.\2.\3-\4', regex=True)
+    historico = np.where(tipo == "cpf", "PIX RECEBIDO " + cpf_formatado,
+                np.where(tipo == "desconhecido", "PIX RECEBIDO 123.456.789-09", "DEPOSITO"))
+    extrato = pd.DataFrame({
+        'Data': datas,
+        'Histórico': historico,
+        'Matrícula': np.where(tipo == "matricula", alunos['matricula'].astype(str), ""),
+        'Valor': np.where(tipo == "debito", "-50,00", "100,00"),
+        'FITID': [f"T{i}" for i in range(linhas)],
+    })
+    return extrato.to_csv(index=False, sep=';').encode('utf-8')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--linha-a-linha", type=int, default=200, help="linhas medidas no caminho antigo")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+    conteudo = gerar_extrato(args.linhas)
+
+    inicio = time.perf_counter()
+    extrato = conciliacao.ler_extrato(io.BytesIO(conteudo), "extrato.csv")
+    leitura = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    pagamentos, revisao, resumo = conciliacao.conciliar(extrato)
+    cruzamento = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    registrados = conciliacao.registrar_conciliados(pagamentos)
+    gravacao = time.perf_counter() - inicio
+    _, revisao_repetida, resumo_repetido = conciliacao.conciliar(extrato)
+
+    print(f"Extrato: {resumo}")
+    print(f"Revisão: {revisao['motivo'].value_counts().to_dict()}")
+    print(f"Em lote: leitura {leitura * 1000:.0f} ms, cruzamento {cruzamento * 1000:.0f} ms, "
+          f"gravação de {registrados} pagamentos {gravacao * 1000:.0f} ms, total {leitura + cruzamento + gravacao:.2f} s")
+    print(f"Mesmo extrato de novo: {resumo_repetido['conciliados']} conciliados, "
+          f"{(revisao_repetida['motivo'] == 'Pagamento já registrado').sum()} já registrados")
+
+    # Caminho antigo: para cada linha, busca o aluno e registra o pagamento com o seu próprio commit
+    amostra = pagamentos.head(args.linha_a_linha)
+    inicio = time.perf_counter()
+    for linha in amostra.itertuples():
+        matricula, unidade, nome, cpf, *_ = treino.buscar_aluno("Matrícula", int(linha.matricula))
+        treino.registrar_pagamento(matricula, unidade, nome, cpf, pd.Timestamp(linha.data_pagamento), linha.plano, linha.valor)
+    por_linha = (time.perf_counter() - inicio) / max(1, len(amostra))
+    print(f"Linha a linha: {por_linha * 1000:.2f} ms por pagamento, "
+          f"~{por_linha * resumo['conciliados']:.1f} s para o extrato inteiro")
+
+if __name__ == "__main__":
+    main()
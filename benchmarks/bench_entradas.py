@@ -0,0 +1,80 @@
+# Benchmark da gravação de entradas num pico de catraca: um commit por entrada x fila com gravador em lotes
+# Uso: python -m benchmarks.bench_entradas --pasta /tmp/bench --entradas 20000 --threads 16
+# Grava entradas na pasta medida (gerada por benchmarks.gerar_dados): nunca use a pasta do app
+import argparse
+import logging
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import banco
+import catraca
+
+# Função para resumir as latências de quem registrou (o que a recepção sente)
+def resumir(latencias, total_s, quantidade):
+    latencias.sort()
+    return (f"{quantidade / total_s:>10.0f} {statistics.median(latencias) * 1000:>12.3f} "
+            f"{latencias[int(len(latencias) * 0.99)] * 1000:>10.3f} {latencias[-1] * 1000:>10.3f}")
+
+def disparar(registrar, quantidade, threads, matriculas):
+    def registrar_medindo(i):
+        inicio = time.perf_counter()
+        registrar(matriculas[i % len(matriculas)])
+        return time.perf_counter() - inicio
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(registrar_medindo, range(quantidade)))
+
+# Referência: cada entrada abre a sua transação e disputa o lock de escrita com as outras
+def medir_commit_por_entrada(quantidade, threads, matriculas):
+    def registrar(matricula):
+        with banco.transacao(altera=('entradas',)) as conn:
+            conn.execute(catraca.SQL_INSERIR, (matricula, "Academia I", "benchmark",
+                                               datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 1))
+    inicio = time.perf_counter()
+    latencias = disparar(registrar, quantidade, threads, matriculas)
+    return latencias, time.perf_counter() - inicio
+
+# Fila: quem registra só enfileira; o tempo total inclui esperar o gravador esvaziar a fila
+def medir_fila(quantidade, threads, matriculas, tamanho_lote):
+    gravador = catraca.GravadorEntradas(tamanho_fila=quantidade, tamanho_lote=tamanho_lote)
+    inicio = time.perf_counter()
+    latencias = disparar(lambda matricula: gravador.registrar(matricula, "Academia I", "benchmark", True),
+                         quantidade, threads, matriculas)
+    gravador.descarregar()
+    total = time.perf_counter() - inicio
+    estatisticas = gravador.estatisticas()
+    gravador.encerrar()
+    return latencias, total, estatisticas
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--entradas", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=16, help="sessões/catracas registrando ao mesmo tempo")
+    parser.add_argument("--lote", type=int, default=catraca.TAMANHO_LOTE)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+    with banco.conexao() as conn:
+        matriculas = [linha[0] for linha in conn.execute("SELECT matricula FROM alunos LIMIT 1000")]
+        antes = conn.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+
+    referencia = max(1, args.entradas // 10)  # um commit por entrada é lento demais para o volume todo
+    print(f"{'modo':<20} {'entradas':>9} {'entradas/s':>10} {'mediana (ms)':>12} {'p99 (ms)':>10} {'máx (ms)':>10}")
+    latencias, total = medir_commit_por_entrada(referencia, args.threads, matriculas)
+    print(f"{'commit por entrada':<20} {referencia:>9} {resumir(latencias, total, referencia)}")
+    latencias, total, estatisticas = medir_fila(args.entradas, args.threads, matriculas, args.lote)
+    print(f"{'fila + lotes':<20} {args.entradas:>9} {resumir(latencias, total, args.entradas)}")
+    print(f"\nLotes gravados: {estatisticas.get('lotes', 0)} | maior lote: {estatisticas.get('maior_lote', 0)} | "
+          f"recusadas: {estatisticas.get('recusadas', 0)} | perdidas: {estatisticas.get('perdidas', 0)} | "
+          f"incertas: {estatisticas.get('incertas', 0)}")
+
+    with banco.conexao() as conn:
+        gravadas = conn.execute("SELECT COUNT(*) FROM entradas").fetchone()[0] - antes
+    print(f"Entradas no banco: {gravadas} de {referencia + args.entradas}")
+
+if __name__ == "__main__":
+    main()
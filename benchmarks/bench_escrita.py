@@ -0,0 +1,77 @@
+# Benchmark das gravações concorrentes das sessões: cada sessão com a sua transação (caminho antigo) x gravador
+# único com group commit (escrita.py), de 1 a N sessões gravando pagamentos ao mesmo tempo
+# Uso: python -m benchmarks.bench_escrita --pasta /tmp/bench --sessoes 1,4,16,32 --gravacoes 2000
+# Grava pagamentos no banco da pasta medida (gerada por benchmarks.gerar_dados): nunca use a pasta do app
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import banco
+import escrita
+import pagamentos
+
+def linha_pagamento(matricula):
+    return (matricula, "Academia I", date.today().isoformat(), "Mensal", 100.0, "Em dia", None)
+
+# Caminho antigo: a sessão abre a transação e disputa o lock de escrita com as outras
+def gravar_direto(matricula):
+    with banco.transacao(altera=('pagamentos',)) as conn:
+        return pagamentos.inserir(conn, linha_pagamento(matricula))
+
+def gravar_pelo_gravador(matricula):
+    return escrita.executar(pagamentos.inserir, linha_pagamento(matricula), altera=('pagamentos',))
+
+# Dispara "quantidade" gravações divididas entre "sessoes" threads; devolve latências, erros e duração
+def disparar(gravar, quantidade, sessoes, matriculas):
+    def gravar_medindo(i):
+        inicio = time.perf_counter()
+        try:
+            gravar(matriculas[i % len(matriculas)])
+            return time.perf_counter() - inicio, None
+        except sqlite3.Error as e:
+            return time.perf_counter() - inicio, type(e).__name__
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        resultados = list(executor.map(gravar_medindo, range(quantidade)))
+    return resultados, time.perf_counter() - inicio
+
+def resumir(resultados, total_s):
+    latencias = sorted(latencia for latencia, erro in resultados if erro is None)
+    erros = len(resultados) - len(latencias)
+    if not latencias:
+        return f"{0:>10} {'-':>12} {'-':>10} {erros:>6}"
+    return (f"{len(latencias) / total_s:>10.0f} {statistics.median(latencias) * 1000:>12.2f} "
+            f"{latencias[int(len(latencias) * 0.99)] * 1000:>10.2f} {erros:>6}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--sessoes", default="1,4,16,32", help="sessões gravando ao mesmo tempo")
+    parser.add_argument("--gravacoes", type=int, default=2000, help="pagamentos gravados em cada cenário")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+    with banco.conexao() as conn:
+        matriculas = [linha[0] for linha in conn.execute("SELECT matricula FROM alunos LIMIT 1000")]
+    # No modo direto as sessões também disputam as banco.TAMANHO_POOL conexões do pool, como no app
+
+    print(f"{'modo':<12} {'sessões':>8} {'gravações/s':>10} {'mediana (ms)':>12} {'p99 (ms)':>10} {'erros':>6}")
+    for sessoes in (int(valor) for valor in args.sessoes.split(",")):
+        resultados, total = disparar(gravar_direto, args.gravacoes, sessoes, matriculas)
+        print(f"{'direto':<12} {sessoes:>8} {resumir(resultados, total)}")
+        resultados, total = disparar(gravar_pelo_gravador, args.gravacoes, sessoes, matriculas)
+        print(f"{'gravador':<12} {sessoes:>8} {resumir(resultados, total)}")
+
+    estatisticas = escrita.obter_gravador(banco.BANCO_PRINCIPAL).estatisticas()
+    print(f"\nGravador: {estatisticas.get('lotes', 0)} commits para {estatisticas.get('gravadas', 0)} gravações | "
+          f"maior lote: {estatisticas.get('maior_lote', 0)} | repetições: {estatisticas.get('repeticoes', 0)} | "
+          f"recusadas: {estatisticas.get('recusadas', 0)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Benchmark da vazão de login por custo do bcrypt, para escolher o GDE_BCRYPT_CUSTO
+# Uso: python -m benchmarks.bench_login --custos 10 11 12 13 --threads 4 --usuarios 60
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import autenticacao
+
+def medir_custo(custo, threads, logins):
+    senha_hash = autenticacao.gerar_hash("senha-de-teste", custo)
+
+    latencias = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        autenticacao.verificar_senha("senha-de-teste", senha_hash)
+        latencias.append(time.perf_counter() - inicio)
+
+    # O bcrypt libera o GIL: várias threads conferem senhas em paralelo, como no servidor
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: autenticacao.verificar_senha("senha-de-teste", senha_hash), range(logins)))
+    vazao = logins / (time.perf_counter() - inicio)
+    return statistics.median(latencias), vazao
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--custos", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=16, help="logins conferidos por custo na medição de vazão")
+    parser.add_argument("--usuarios", type=int, default=60, help="logins simultâneos na troca de turno")
+    parser.add_argument("--alvo-ms", type=int, default=250)
+    args = parser.parse_args()
+
+    print(f"Custo configurado: {autenticacao.CUSTO_BCRYPT} | calibrado para {args.alvo_ms} ms: "
+          f"{autenticacao.calibrar_custo(args.alvo_ms)}")
+    print(f"{'custo':>5} {'latência (ms)':>14} {'logins/s':>9} {f'{args.usuarios} logins (s)':>16}")
+    for custo in args.custos:
+        latencia, vazao = medir_custo(custo, args.threads, args.logins)
+        print(f"{custo:>5} {latencia * 1000:>14.1f} {vazao:>9.1f} {args.usuarios / vazao:>16.1f}")
+
+if __name__ == "__main__":
+    main()
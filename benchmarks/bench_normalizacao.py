@@ -0,0 +1,124 @@
+# Benchmark da migração 9: tabela pagamentos com nome, CPF e textos repetidos x pagamentos_base compacta
+# Uso: python -m benchmarks.bench_normalizacao --pasta /tmp/bench
+# A pasta deve ser gerada com --versao-maxima 8; as duas versões são medidas em cópias, a pasta não é alterada
+import argparse
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date
+
+import banco
+import migracoes
+import pagamentos
+import resumos
+
+# Consulta do relatório antes da migração (filtros em texto sobre a tabela larga)
+SQL_RELATORIO_ANTES = '''
+    SELECT p.codigo_pagamento, p.matricula, a.nome, a.cpf, p.unidade, p.plano, p.data_pagamento,
+           p.data_vencimento, p.valor,
+           CASE WHEN p.data_vencimento < :hoje THEN 'Atrasado' ELSE 'Em dia' END AS status
+    FROM pagamentos p
+    LEFT JOIN alunos a ON a.matricula = p.matricula
+    WHERE p.data_pagamento BETWEEN :inicio AND :fim AND p.unidade = :unidade
+    ORDER BY p.data_pagamento
+'''
+# A mesma consulta na tabela compacta: filtros comparam dias e códigos gravados e usam os índices
+SQL_RELATORIO_DEPOIS = f'''
+    SELECT p.codigo_pagamento, p.matricula, a.nome, a.cpf, u.nome, pl.nome, {pagamentos.sql_data('p.data_pagamento')},
+           {pagamentos.sql_data('p.data_vencimento')}, p.valor_centavos / 100.0,
+           CASE WHEN p.data_vencimento < :hoje THEN 'Atrasado' ELSE 'Em dia' END AS status
+    FROM pagamentos_base p
+    LEFT JOIN alunos a ON a.matricula = p.matricula
+    LEFT JOIN unidades u ON u.codigo = p.unidade
+    LEFT JOIN planos pl ON pl.codigo = p.plano
+    WHERE p.data_pagamento BETWEEN {pagamentos.sql_dias(':inicio')} AND {pagamentos.sql_dias(':fim')}
+      AND p.unidade = (SELECT codigo FROM unidades WHERE nome = :unidade)
+    ORDER BY p.data_pagamento
+'''
+
+# Função para medir o espaço de cada tabela e índice de pagamentos (dbstat)
+def espaco(conn):
+    return dict(conn.execute('''
+        SELECT name, SUM(pgsize) FROM dbstat
+        WHERE name LIKE '%pagamento%' OR name IN ('unidades', 'planos')
+        GROUP BY name ORDER BY 2 DESC
+    '''))
+
+def cronometrar(conn, sql, parametros, repeticoes):
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        conn.execute(sql, parametros(i)).fetchall()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+# Função para medir as consultas de leitura mais usadas em uma das cópias
+def medir_consultas(conn, sql_relatorio, parametros_relatorio, matriculas, cpfs, repeticoes):
+    sql_receita = resumos._origens(conn)['resumo_receita']
+    return {
+        "relatório de um mês (unidade)": cronometrar(conn, sql_relatorio, lambda i: parametros_relatorio, repeticoes),
+        "histórico por matrícula": cronometrar(conn, "SELECT * FROM pagamentos WHERE matricula = ?",
+                                               lambda i: (matriculas[i],), repeticoes),
+        "histórico por CPF": cronometrar(conn, "SELECT * FROM pagamentos WHERE cpf = ?", lambda i: (cpfs[i],), repeticoes),
+        "receita por unidade/plano/mês": cronometrar(conn, sql_receita, lambda i: (), max(1, repeticoes // 20)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados --versao-maxima 8")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    rascunho = tempfile.mkdtemp(prefix="normalizacao_")
+    antes, depois = os.path.join(rascunho, "antes.db"), os.path.join(rascunho, "depois.db")
+    with sqlite3.connect(os.path.join(args.pasta, banco.BANCO_PRINCIPAL)) as origem:
+        if origem.execute("SELECT MAX(versao) FROM versao_esquema").fetchone()[0] != 8:
+            raise SystemExit("A pasta precisa estar na versão 8 do esquema (gerar_dados --versao-maxima 8).")
+        origem.execute("VACUUM INTO ?", (antes,))
+    shutil.copy(antes, depois)
+
+    conn_depois = sqlite3.connect(depois, isolation_level=None)
+    inicio = time.perf_counter()
+    migracoes.aplicar_migracoes(conn_depois, migracoes.MIGRACOES[banco.BANCO_PRINCIPAL])
+    tempo_migracao = time.perf_counter() - inicio
+    conn_depois.execute("VACUUM")
+    conn_antes = sqlite3.connect(antes, isolation_level=None)
+
+    print(f"Migração 9: {tempo_migracao:.1f}s")
+    print(f"\n{'arquivo':<12} {'MB':>10}")
+    for nome, caminho in (("antes", antes), ("depois", depois)):
+        print(f"{nome:<12} {os.path.getsize(caminho) / 1024 / 1024:>10.1f}")
+    for nome, conn in (("antes", conn_antes), ("depois", conn_depois)):
+        print(f"\nEspaço por objeto ({nome}):")
+        for objeto, tamanho in espaco(conn).items():
+            print(f"  {objeto:<42} {tamanho / 1024 / 1024:>8.1f} MB")
+
+    rng = random.Random(7)
+    alunos = conn_antes.execute("SELECT matricula, cpf FROM alunos").fetchall()
+    amostra = [alunos[rng.randrange(len(alunos))] for _ in range(args.repeticoes)]
+    matriculas, cpfs = [m for m, _ in amostra], [c for _, c in amostra]
+    hoje = date.today()
+    inicio_mes = hoje.replace(day=1)
+    parametros = {'inicio': inicio_mes.isoformat(), 'fim': hoje.isoformat(), 'hoje': hoje.isoformat(),
+                  'unidade': "Academia I"}
+    parametros_depois = {**parametros, 'hoje': (hoje - date(1970, 1, 1)).days}
+
+    resultados_antes = medir_consultas(conn_antes, SQL_RELATORIO_ANTES, parametros, matriculas, cpfs, args.repeticoes)
+    resultados_depois = medir_consultas(conn_depois, SQL_RELATORIO_DEPOIS, parametros_depois, matriculas, cpfs,
+                                        args.repeticoes)
+    print(f"\n{'consulta (mediana)':<32} {'antes (ms)':>11} {'depois (ms)':>12}")
+    for consulta, tempo in resultados_antes.items():
+        print(f"{consulta:<32} {tempo:>11.3f} {resultados_depois[consulta]:>12.3f}")
+
+    conn_antes.close()
+    conn_depois.close()
+    shutil.rmtree(rascunho)
+
+if __name__ == "__main__":
+    main()
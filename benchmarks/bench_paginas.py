@@ -0,0 +1,51 @@
+# Benchmark da latência por execução de cada página: exec do arquivo (versão antiga) x registro de páginas
+# Uso (na pasta com os bancos): python -m benchmarks.bench_paginas --execucoes 20
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import paginas
+
+# Roteamento antigo de login.py: lê, compila e executa o arquivo da página a cada interação
+SCRIPT_EXEC = '''
+exec(open({arquivo!r}, encoding='utf-8').read(), globals())
+'''
+
+# Roteamento novo: a página já importada só executa render()
+SCRIPT_REGISTRO = '''
+import paginas
+paginas.renderizar({titulo!r})
+'''
+
+def medir(script, execucoes):
+    app = AppTest.from_string(script, default_timeout=120)
+    app.run()  # aquecimento: importações e caches do processo
+    tempos = []
+    for _ in range(execucoes):
+        inicio = time.perf_counter()
+        app.run()
+        tempos.append(time.perf_counter() - inicio)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return statistics.median(tempos)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--execucoes", type=int, default=20)
+    args = parser.parse_args()
+
+    disponiveis, indisponiveis = paginas.carregar_paginas()
+    print(f"{'Página':<20} {'exec (ms)':>10} {'render (ms)':>12} {'ganho':>7}")
+    for titulo in disponiveis:
+        arquivo = os.path.join(os.path.dirname(paginas.__file__), f"{paginas.PAGINAS[titulo]}.py")
+        antigo = medir(SCRIPT_EXEC.format(arquivo=arquivo), args.execucoes)
+        novo = medir(SCRIPT_REGISTRO.format(titulo=titulo), args.execucoes)
+        print(f"{titulo:<20} {antigo * 1000:>10.1f} {novo * 1000:>12.1f} {antigo / novo:>6.1f}x")
+    for titulo, motivo in indisponiveis.items():
+        print(f"{titulo:<20} indisponível: {motivo}")
+
+if __name__ == "__main__":
+    main()
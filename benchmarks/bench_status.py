@@ -0,0 +1,75 @@
+# Benchmark do cálculo de status: apply linha a linha (versão antiga) x motor vetorizado
+# Uso: python -m benchmarks.bench_status --linhas 1000000
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+import status_pagamento
+
+PLANOS = ["Mensal", "Trimestral", "Semestral", "Anual"]
+
+# Cópia da função antiga de entrada.py, usada como referência
+def calcular_status_pagamento(data_pagamento_str, plano):
+    if pd.isnull(data_pagamento_str):
+        return "Data inválida"
+
+    try:
+        data_pagamento = pd.to_datetime(data_pagamento_str, format='%Y-%m-%d')
+    except ValueError:
+        return "Data inválida"
+
+    periodicidade = {
+        'mensal': 1,
+        'trimestral': 3,
+        'semestral': 6,
+        'anual': 12
+    }
+
+    plano = plano.lower()
+
+    if plano not in periodicidade:
+        return None
+
+    proximo_pagamento = data_pagamento + relativedelta(months=periodicidade[plano])
+
+    return "Atrasado" if proximo_pagamento.date() < datetime.now().date() else "Em dia"
+
+# Função para gerar pagamentos sintéticos no mesmo formato da tabela pagamentos
+def gerar_pagamentos(linhas, semente=42):
+    rng = np.random.default_rng(semente)
+    datas = np.datetime64('2020-01-01') + rng.integers(0, 5 * 365, linhas).astype('timedelta64[D]')
+    return pd.DataFrame({
+        'data_pagamento': pd.Series(datas).dt.strftime('%Y-%m-%d'),
+        'plano': rng.choice(PLANOS, linhas),
+    })
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    dados = gerar_pagamentos(args.linhas)
+
+    vetorizado, tempo_vetorizado = cronometrar(
+        lambda: status_pagamento.calcular_status(dados['data_pagamento'], dados['plano']))
+    antigo, tempo_antigo = cronometrar(
+        lambda: dados.apply(lambda row: calcular_status_pagamento(row['data_pagamento'], row['plano']), axis=1))
+
+    assert antigo.equals(vetorizado), "Resultados diferentes entre as duas versões"
+
+    print(f"Linhas:        {args.linhas}")
+    print(f"apply (antigo): {tempo_antigo:.2f}s")
+    print(f"vetorizado:     {tempo_vetorizado:.3f}s")
+    print(f"Ganho:          {tempo_antigo / tempo_vetorizado:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Benchmark das fichas de treino: abrir as fichas de um aluno (consulta pelo índice), salvar uma ficha editada,
+# carregar o catálogo de exercícios em memória e montar a impressão de um lote de alunos
+# Uso: python -m benchmarks.bench_treinos --pasta /tmp/bench --exercicios 5000 --fichas 300000
+# Grava exercícios e fichas nos bancos da pasta medida (gerada por benchmarks.gerar_dados): nunca use a pasta do app
+import argparse
+import logging
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+
+import banco
+import fichas_treino
+import migracoes
+
+CATEGORIAS = ["Peito", "Costas", "Pernas", "Ombros", "Bíceps", "Tríceps", "Abdômen", "Glúteos", "Panturrilha", "Cardio"]
+VARIACOES = ["com barra", "com halteres", "na máquina", "no cabo", "unilateral", "inclinado", "declinado", "sentado"]
+
+# Função para completar o catálogo e as fichas até as quantidades pedidas (o histórico fica arquivado)
+def popular(qtd_exercicios, qtd_fichas, itens_por_ficha, rng):
+    with banco.conexao(banco.BANCO_TREINOS) as conn:
+        existentes = conn.execute("SELECT COUNT(*) FROM exercicios").fetchone()[0]
+    if existentes < qtd_exercicios:
+        with banco.transacao(banco.BANCO_TREINOS, altera=('exercicios',)) as conn:
+            conn.executemany("INSERT INTO exercicios (nome, categoria) VALUES (?, ?)", [
+                (f"Exercício {i} {rng.choice(VARIACOES)}", rng.choice(CATEGORIAS))
+                for i in range(existentes, qtd_exercicios)
+            ])
+
+    with banco.conexao() as conn:
+        existentes = conn.execute("SELECT COUNT(*) FROM fichas_treino").fetchone()[0]
+        matriculas = [linha[0] for linha in conn.execute("SELECT matricula FROM alunos")]
+        ids = [linha[0] for linha in conn.execute("SELECT id FROM treinos.exercicios")]
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with banco.transacao(altera=('fichas_treino', 'itens_ficha')) as conn:
+        for _ in range(existentes, qtd_fichas):
+            codigo = conn.execute('''
+                INSERT INTO fichas_treino (matricula, nome, criada_em, atualizada_em, arquivada)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (rng.choice(matriculas), f"Treino {rng.choice('ABC')}", agora, agora, int(rng.random() < 0.7))).lastrowid
+            conn.executemany('''
+                INSERT INTO itens_ficha (ficha, ordem, exercicio, series, repeticoes, carga_gramas, descanso_s)
+                VALUES (?, ?, ?, 3, '12', ?, 60)
+            ''', [(codigo, ordem, rng.choice(ids), rng.randrange(5, 100) * 1000) for ordem in range(1, itens_por_ficha + 1)])
+    return matriculas
+
+def medir(funcao, amostra):
+    tempos = []
+    for argumento in amostra:
+        inicio = time.perf_counter()
+        funcao(argumento)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--exercicios", type=int, default=5000)
+    parser.add_argument("--fichas", type=int, default=300_000, help="fichas no banco, 70%% arquivadas (histórico)")
+    parser.add_argument("--itens", type=int, default=10, help="exercícios por ficha")
+    parser.add_argument("--operacoes", type=int, default=500)
+    parser.add_argument("--lote", type=int, default=200, help="alunos na impressão em lote")
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+    migracoes.garantir_esquema()
+    rng = random.Random(7)
+    inicio = time.perf_counter()
+    matriculas = popular(args.exercicios, args.fichas, args.itens, rng)
+    print(f"Dados prontos em {time.perf_counter() - inicio:.0f}s")
+
+    catalogo = fichas_treino.CatalogoExercicios()
+    inicio = time.perf_counter()
+    tamanho = catalogo.tamanho()  # primeiro uso carrega o catálogo
+    print(f"Catálogo: {tamanho['exercicios']} exercícios em {tamanho['categorias']} categorias, "
+          f"carregado em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    categoria = catalogo.categorias()[0]
+    mediana, p99 = medir(lambda _: catalogo.exercicios(categoria), range(args.operacoes))
+    print(f"{'exercícios de uma categoria':<34} mediana {mediana:.3f} ms, p99 {p99:.3f} ms")
+
+    # Sem o cache de leitura: cada abertura vai ao banco, como a primeira vez que o instrutor abre o aluno
+    consultar = fichas_treino.consultar_fichas.__wrapped__
+    amostra = rng.choices(matriculas, k=args.operacoes)
+    mediana, p99 = medir(consultar, amostra)
+    print(f"{'abrir as fichas de um aluno':<34} mediana {mediana:.3f} ms, p99 {p99:.3f} ms")
+
+    ids = [id_exercicio for _, id_exercicio in catalogo.exercicios()]
+    def salvar(matricula):
+        fichas = consultar(matricula)
+        itens = [(rng.choice(ids), 4, "10", 20.0, 90) for _ in range(args.itens)]
+        fichas_treino.salvar_ficha(matricula, "Treino A", itens, fichas[0]['codigo'] if fichas else None)
+    mediana, p99 = medir(salvar, amostra)
+    print(f"{'abrir e salvar uma ficha':<34} mediana {mediana:.3f} ms, p99 {p99:.3f} ms")
+
+    inicio = time.perf_counter()
+    lote = fichas_treino.alunos_com_ficha(matriculas=amostra[:args.lote])
+    arquivos = fichas_treino.gerar_impressao(lote, catalogo)
+    print(f"Impressão de {len(lote)} alunos: {(time.perf_counter() - inicio) * 1000:.0f} ms, "
+          f"{len(arquivos)} arquivos, {sum(len(documento) for _, documento in arquivos) / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main()
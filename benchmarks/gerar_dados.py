@@ -0,0 +1,139 @@
+# Gerador de dados sintéticos: cria database.db e novo.db em uma pasta de rascunho
+# Uso: python -m benchmarks.gerar_dados --pasta /tmp/bench --alunos 100000 --pagamentos 5000000
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import autenticacao
+import banco
+import migracoes
+import pagamentos
+import status_pagamento
+
+UNIDADES = ["Academia I", "Academia II"]
+PLANOS = ["Mensal", "Trimestral", "Semestral", "Anual"]
+VALORES = {"Mensal": 100.0, "Trimestral": 270.0, "Semestral": 510.0, "Anual": 960.0}
+PRIMEIROS_NOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+                   "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sabrina", "Thiago", "Vitória", "Wesley"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa"]
+TAMANHO_LOTE = 50_000
+
+# Função para gerar CPFs únicos com dígitos verificadores válidos
+def gerar_cpfs(quantidade, rng):
+    bases = rng.choice(10**9, size=quantidade, replace=False)
+    digitos = (bases[:, None] // 10 ** np.arange(8, -1, -1)) % 10
+    dv1 = (digitos @ np.arange(10, 1, -1)) * 10 % 11 % 10
+    digitos = np.column_stack([digitos, dv1])
+    dv2 = (digitos @ np.arange(11, 1, -1)) * 10 % 11 % 10
+    digitos = np.column_stack([digitos, dv2])
+    return [''.join(map(str, linha)) for linha in digitos]
+
+# Função para gerar os alunos (matrícula sequencial a partir de 1)
+def gerar_alunos(quantidade, rng):
+    nascimento = np.datetime64('1960-01-01') + rng.integers(0, 45 * 365, quantidade).astype('timedelta64[D]')
+    return pd.DataFrame({
+        'nome': (pd.Series(rng.choice(PRIMEIROS_NOMES, quantidade)) + " "
+                 + pd.Series(rng.choice(SOBRENOMES, quantidade)) + " "
+                 + pd.Series(rng.choice(SOBRENOMES, quantidade))),
+        'cpf': gerar_cpfs(quantidade, rng),
+        'data_nascimento': pd.Series(nascimento).dt.strftime('%Y-%m-%d'),
+        'endereco': "Rua " + pd.Series(rng.choice(SOBRENOMES, quantidade)) + ", " + pd.Series(rng.integers(1, 2000, quantidade)).astype(str),
+        'telefone': "11 9" + pd.Series(rng.integers(10**7, 10**8, quantidade)).astype(str),
+        'email': [f"aluno{i}@exemplo.com" for i in range(1, quantidade + 1)],
+        'unidade': rng.choice(UNIDADES, quantidade),
+    })
+
+# Função para gerar um lote de pagamentos espalhados entre 2019 e hoje
+def gerar_pagamentos(quantidade, alunos, rng, hoje):
+    dias = (np.datetime64(hoje) - np.datetime64('2019-01-01')).astype(int)
+    indices = rng.integers(0, len(alunos), quantidade)
+    planos = rng.choice(PLANOS, quantidade, p=[0.6, 0.2, 0.1, 0.1])
+    datas = pd.Series(np.datetime64('2019-01-01') + rng.integers(0, dias, quantidade).astype('timedelta64[D]'))
+    lote = pd.DataFrame({
+        'matricula': indices + 1,
+        'unidade': alunos['unidade'].to_numpy()[indices],
+        'nome': alunos['nome'].to_numpy()[indices],
+        'cpf': alunos['cpf'].to_numpy()[indices],
+        'data_pagamento': datas.dt.strftime('%Y-%m-%d'),
+        'plano': planos,
+        'valor': pd.Series(planos).map(VALORES),
+    })
+    lote['status'] = status_pagamento.calcular_status(datas, lote['plano'], hoje)
+    lote['data_vencimento'] = status_pagamento.calcular_vencimentos(datas, lote['plano']).dt.strftime('%Y-%m-%d')
+    return lote
+
+# Função para criar a pasta de rascunho com os bancos já migrados e populados
+# versao_maxima limita as migrações aplicadas (ex.: gerar o banco de antes de uma migração para compará-la)
+def gerar(pasta, qtd_alunos, qtd_pagamentos, qtd_usuarios, semente=42, versao_maxima=None):
+    if os.path.abspath(pasta) == os.path.dirname(os.path.abspath(migracoes.__file__)):
+        raise SystemExit("A pasta de rascunho não pode ser a pasta do app (os bancos seriam apagados).")
+    os.makedirs(pasta, exist_ok=True)
+    for nome in (banco.BANCO_PRINCIPAL, banco.BANCO_USUARIOS):
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(os.path.join(pasta, nome + sufixo)):
+                os.remove(os.path.join(pasta, nome + sufixo))
+
+    rng = np.random.default_rng(semente)
+    hoje = date.today()
+
+    conn = sqlite3.connect(os.path.join(pasta, banco.BANCO_PRINCIPAL))
+    conn.execute("PRAGMA journal_mode=WAL")
+    migracoes.aplicar_migracoes(conn, [migracao for migracao in migracoes.MIGRACOES[banco.BANCO_PRINCIPAL]
+                                       if versao_maxima is None or migracao[0] <= versao_maxima])
+    compacta = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'pagamentos_base'").fetchone() is not None
+
+    alunos = gerar_alunos(qtd_alunos, rng)
+    with conn:
+        conn.executemany(
+            "INSERT INTO alunos (nome, cpf, data_nascimento, endereco, telefone, email, unidade) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            alunos.itertuples(index=False, name=None),
+        )
+
+    # Pagamentos em lotes: os gatilhos mantêm ultimo_pagamento e os resumos como no uso real
+    colunas = "matricula, unidade, nome, cpf, data_pagamento, plano, valor, status, data_vencimento"
+    for inicio in range(0, qtd_pagamentos, TAMANHO_LOTE):
+        lote = gerar_pagamentos(min(TAMANHO_LOTE, qtd_pagamentos - inicio), alunos, rng, hoje)
+        with conn:
+            if compacta:
+                pagamentos.inserir_varios(conn, lote[list(pagamentos.COLUNAS)].itertuples(index=False, name=None))
+            else:
+                conn.executemany(f"INSERT INTO pagamentos ({colunas}) VALUES ({', '.join('?' * 9)})",
+                                 lote.itertuples(index=False, name=None))
+    conn.execute("ANALYZE")
+    conn.close()
+
+    conn = sqlite3.connect(os.path.join(pasta, banco.BANCO_USUARIOS))
+    migracoes.aplicar_migracoes(conn, migracoes.MIGRACOES[banco.BANCO_USUARIOS])
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    senha_hash = autenticacao.gerar_hash("senha123")  # mesmo hash para todos: gerar um por usuário levaria minutos
+    with conn:
+        conn.executemany(
+            "INSERT INTO credenciais (usuario, papel, senha_hash, criado_em) VALUES (?, ?, ?, ?)",
+            [(f"usuario{i}", autenticacao.PAPEL_PADRAO if i % 10 else autenticacao.PAPEL_ADMIN, senha_hash, agora)
+             for i in range(qtd_usuarios)],
+        )
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta de rascunho (nunca a pasta do app)")
+    parser.add_argument("--alunos", type=int, default=100_000)
+    parser.add_argument("--pagamentos", type=int, default=5_000_000)
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--versao-maxima", type=int, help="última migração aplicada (padrão: todas)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    gerar(args.pasta, args.alunos, args.pagamentos, args.usuarios, args.semente, args.versao_maxima)
+    print(f"{args.alunos} alunos e {args.pagamentos} pagamentos gerados em {args.pasta} "
+          f"({time.perf_counter() - inicio:.0f}s)")
+
+if __name__ == "__main__":
+    main()
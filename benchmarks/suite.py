@@ -0,0 +1,159 @@
+# Suíte de benchmarks dos caminhos de dados, sobre uma pasta gerada por benchmarks.gerar_dados
+# Uso: python -m benchmarks.suite --pasta /tmp/bench --saida resultados.json [--comparar anterior.json]
+# Os benchmarks de escrita inserem alunos e pagamentos na pasta medida: gere uma nova a cada comparação
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+import alunos
+import autenticacao
+import banco
+import busca_alunos
+import entrada
+import status_pagamento
+import treino
+
+# Função para cronometrar uma função várias vezes; "preparar" roda antes de cada medição, fora do tempo
+def cronometrar(funcao, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'repeticoes': repeticoes,
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+        'min_ms': round(tempos[0], 3),
+    }
+
+# Função para ler a versão do código (commit atual) que está sendo medida
+def versao_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(alunos.__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+# Função para situar a carga de dados da pasta medida
+def tamanho_dados():
+    with banco.conexao() as conn:
+        return {
+            'alunos': conn.execute("SELECT COUNT(*) FROM alunos").fetchone()[0],
+            'pagamentos': conn.execute("SELECT COUNT(*) FROM pagamentos").fetchone()[0],
+        }
+
+def executar(repeticoes):
+    rng = random.Random(7)
+    with banco.conexao() as conn:
+        amostra = conn.execute("SELECT matricula, nome, cpf, unidade FROM alunos ORDER BY random() LIMIT 200").fetchall()
+    with banco.conexao(banco.BANCO_USUARIOS) as conn:
+        usuarios = [linha[0] for linha in conn.execute(
+            "SELECT usuario FROM credenciais WHERE papel = ? LIMIT 50", (autenticacao.PAPEL_PADRAO,))]
+    sortear = lambda: rng.choice(amostra)
+    hoje = date.today()
+
+    # Leituras em cache são medidas frias (cache limpo antes de cada medição) e quentes
+    def limpar(*leituras):
+        def preparar():
+            for leitura in leituras:
+                leitura.limpar()
+            return ()
+        return preparar
+
+    novos_cpfs = iter(range(10**10, 10**11))
+    resultados = {
+        'buscar_aluno_matricula': cronometrar(lambda a: alunos.buscar_aluno("Matrícula", a[0]), repeticoes, lambda: (sortear(),)),
+        'buscar_aluno_cpf': cronometrar(lambda a: alunos.buscar_aluno("CPF", a[2]), repeticoes, lambda: (sortear(),)),
+        'buscar_aluno_nome_frio': cronometrar(lambda a: alunos.buscar_aluno("Nome", a[1]), repeticoes,
+                                              lambda: limpar(busca_alunos.buscar_por_nome)() + (sortear(),)),
+        'adicionar_aluno': cronometrar(
+            lambda: alunos.adicionar_aluno("Aluno Benchmark", str(next(novos_cpfs)), None, "", "", "", "Academia I"),
+            repeticoes),
+        'registrar_pagamento': cronometrar(
+            lambda a: treino.registrar_pagamento(a[0], a[3], a[1], a[2], datetime.now(), "Mensal", 100.0),
+            repeticoes, lambda: (sortear(),)),
+        'consultar_alunos_frio': cronometrar(alunos.consultar_alunos, max(3, repeticoes // 5), limpar(alunos.consultar_alunos)),
+        'consultar_alunos_quente': cronometrar(alunos.consultar_alunos, repeticoes),
+        'listar_alunos_pagina': cronometrar(lambda: alunos.listar_alunos(0, 51), repeticoes, limpar(alunos.listar_alunos)),
+        'carregar_dados_frio': cronometrar(lambda: entrada.carregar_dados("Todos", hoje), max(3, repeticoes // 5),
+                                           limpar(entrada.carregar_dados)),
+        'carregar_dados_quente': cronometrar(lambda: entrada.carregar_dados("Todos", hoje), repeticoes),
+        'carregar_resumos_frio': cronometrar(lambda: entrada.carregar_resumos(hoje), repeticoes, limpar(entrada.carregar_resumos)),
+        'listar_usuarios_frio': cronometrar(lambda: autenticacao.listar_usuarios(autenticacao.PAPEL_PADRAO), repeticoes,
+                                            limpar(autenticacao.listar_usuarios)),
+        'autenticar_usuario': cronometrar(lambda u: autenticacao.autenticar(u, "senha123", autenticacao.PAPEL_PADRAO),
+                                          max(3, repeticoes // 5), lambda: (rng.choice(usuarios),)),
+    }
+
+    # Status de todos os pagamentos com o motor vetorizado (leitura + cálculo)
+    def status_de_todos():
+        with banco.conexao() as conn:
+            pagamentos = pd.read_sql_query("SELECT data_pagamento, plano FROM pagamentos", conn)
+        status_pagamento.calcular_status(pagamentos['data_pagamento'], pagamentos['plano'])
+    resultados['calcular_status_todos'] = cronometrar(status_de_todos, max(3, repeticoes // 5))
+    return resultados
+
+# Função para comparar com um arquivo de resultados anterior (razão > 1 = ficou mais lento)
+def comparar(relatorio, caminho_anterior):
+    with open(caminho_anterior, encoding='utf-8') as arquivo:
+        relatorio_anterior = json.load(arquivo)
+    if relatorio_anterior['dados'] != relatorio['dados']:
+        print(f"\nAtenção: volumes diferentes ({relatorio_anterior['dados']} x {relatorio['dados']}); "
+              f"compare pastas geradas com os mesmos parâmetros.")
+    anterior, resultados = relatorio_anterior['resultados'], relatorio['resultados']
+    print(f"\n{'benchmark':<28} {'antes (ms)':>11} {'agora (ms)':>11} {'razão':>7}")
+    for nome, medida in resultados.items():
+        if nome in anterior:
+            antes = anterior[nome]['mediana_ms']
+            razao = medida['mediana_ms'] / antes if antes else float('inf')
+            alerta = "  <- regressão" if razao > 1.2 else ""
+            print(f"{nome:<28} {antes:>11.3f} {medida['mediana_ms']:>11.3f} {razao:>6.2f}x{alerta}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pasta", required=True, help="pasta gerada por benchmarks.gerar_dados")
+    parser.add_argument("--saida", default="resultados_benchmark.json")
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--comparar", help="arquivo de resultados de outra versão")
+    args = parser.parse_args()
+
+    saida = os.path.abspath(args.saida)
+    anterior = os.path.abspath(args.comparar) if args.comparar else None
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    os.chdir(args.pasta)  # os bancos são abertos pelo nome relativo, como no app
+
+    dados = tamanho_dados()  # medido antes dos benchmarks de escrita
+    resultados = executar(args.repeticoes)
+    relatorio = {
+        'versao': versao_codigo(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'dados': dados,
+        'resultados': resultados,
+    }
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+    print(f"{'benchmark':<28} {'mediana (ms)':>13} {'p95 (ms)':>10}")
+    for nome, medida in resultados.items():
+        print(f"{nome:<28} {medida['mediana_ms']:>13.3f} {medida['p95_ms']:>10.3f}")
+    print(f"\nResultados gravados em {saida}")
+    if anterior:
+        comparar(relatorio, anterior)
+
+if __name__ == "__main__":
+    main()
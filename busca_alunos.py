@@ -0,0 +1,79 @@
+import re
+
+import banco
+
+# Índice de texto completo do nome, sem acentos e sem diferenciar maiúsculas
+SQL_INDICE = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS alunos_fts USING fts5(
+        nome,
+        content='alunos',
+        content_rowid='matricula',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+'''
+
+# Gatilhos que mantêm o índice sincronizado com a tabela alunos
+SQL_GATILHOS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_alunos_fts_insercao AFTER INSERT ON alunos BEGIN
+        INSERT INTO alunos_fts (rowid, nome) VALUES (NEW.matricula, NEW.nome);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_alunos_fts_exclusao AFTER DELETE ON alunos BEGIN
+        INSERT INTO alunos_fts (alunos_fts, rowid, nome) VALUES ('delete', OLD.matricula, OLD.nome);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_alunos_fts_atualizacao AFTER UPDATE OF nome ON alunos BEGIN
+        INSERT INTO alunos_fts (alunos_fts, rowid, nome) VALUES ('delete', OLD.matricula, OLD.nome);
+        INSERT INTO alunos_fts (rowid, nome) VALUES (NEW.matricula, NEW.nome);
+    END
+    ''',
+)
+
+# A ordenação e a paginação são feitas só no índice; apenas a página é buscada em alunos
+SQL_BUSCA = '''
+    SELECT a.matricula, a.nome, a.cpf, a.unidade
+    FROM (
+        SELECT rowid, rank FROM alunos_fts
+        WHERE alunos_fts MATCH ?
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    ) f
+    JOIN alunos a ON a.matricula = f.rowid
+    ORDER BY f.rank
+'''
+
+# Função para criar o índice e os gatilhos, preenchendo o índice com os alunos já cadastrados
+def criar_indice(conn):
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alunos_fts'").fetchone()
+    conn.execute(SQL_INDICE)
+    for sql in SQL_GATILHOS:
+        conn.execute(sql)
+    if not existe:
+        conn.execute("INSERT INTO alunos_fts (alunos_fts) VALUES ('rebuild')")
+
+# Função para montar a expressão de busca por prefixo de cada palavra digitada
+def montar_expressao(termo):
+    palavras = re.findall(r'\w+', termo or '')
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+# Função para buscar alunos pelo nome, ordenados por relevância e paginados
+# Retorna os candidatos (matricula, nome, cpf, unidade) e se existe uma próxima página
+@banco.leitura_em_cache('alunos', max_entries=200)
+def buscar_por_nome(termo, pagina=0, por_pagina=10):
+    expressao = montar_expressao(termo)
+    if not expressao:
+        return [], False
+
+    with banco.conexao() as conn:
+        candidatos = conn.execute(SQL_BUSCA, (expressao, por_pagina + 1, pagina * por_pagina)).fetchall()
+    return candidatos[:por_pagina], len(candidatos) > por_pagina
+
+# Função para obter a matrícula do candidato mais relevante
+def melhor_matricula(termo):
+    candidatos, _ = buscar_por_nome(termo, por_pagina=1)
+    return candidatos[0][0] if candidatos else None
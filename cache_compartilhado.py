@@ -0,0 +1,196 @@
+# Cache de leituras compartilhado entre os processos do app (modo com vários workers atrás do balanceador)
+# Cada worker do Streamlit tem o seu cache em memória (st.cache_data), com chaves feitas de revisões que só
+# aquele processo conhece. Com vários workers, a consulta feita por um serve os outros quando o resultado e as
+# revisões ficam num lugar comum: um arquivo SQLite na pasta dos bancos (sem servidor, funciona sem rede) com
+# - revisoes: revisão de cada tabela, incrementada após cada commit do app em qualquer worker, e a geração de
+#   alterações externas de cada arquivo (sqlite3 na linha de comando, ferramenta que não usa o banco.py)
+# - leituras: o resultado de cada leitura em cache (pickle), pela chave função + revisões + argumentos
+# Ativado por GDE_CACHE_COMPARTILHADO=<arquivo>; sem a variável cada processo usa só o próprio cache.
+# É um cache: arquivo ocupado ou com erro vira uma falta (a leitura vai ao banco), nunca um erro na página.
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import streamlit as st
+
+ARQUIVO = os.environ.get("GDE_CACHE_COMPARTILHADO")
+TIMEOUT_OCUPADO_MS = 1000
+MAXIMO_LEITURAS = 5000
+PODAR_A_CADA = 200  # gravações de leitura entre duas limpezas das expiradas
+
+# Pseudo-tabelas de cada arquivo: commits do app (qualquer worker) e alterações feitas fora do app
+ESCRITAS = '*'
+EXTERNAS = '+'
+# Geração global, incrementada por cada processo que começa: ninguém sabe o que mudou enquanto estava parado
+INICIO = ('', EXTERNAS)
+
+SQL_ESTRUTURA = (
+    '''
+    CREATE TABLE IF NOT EXISTS revisoes (
+        banco TEXT NOT NULL,
+        tabela TEXT NOT NULL,
+        revisao INTEGER NOT NULL,
+        PRIMARY KEY (banco, tabela)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS leituras (
+        chave BLOB PRIMARY KEY,
+        valor BLOB NOT NULL,
+        expira_em REAL NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_leituras_expira ON leituras (expira_em)",
+)
+
+SQL_INCREMENTAR = '''
+    INSERT INTO revisoes (banco, tabela, revisao) VALUES (?, ?, 1)
+    ON CONFLICT (banco, tabela) DO UPDATE SET revisao = revisao + 1
+'''
+
+log = logging.getLogger("gde.cache_compartilhado")
+
+_FALTA = object()
+# Erros que fazem a leitura ir ao banco: arquivo do cache ocupado ou corrompido, valor que não vira pickle
+ERROS_CACHE = (sqlite3.Error, pickle.PickleError, EOFError, TypeError, AttributeError)
+
+
+class CacheCompartilhado:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._conn = sqlite3.connect(caminho, timeout=TIMEOUT_OCUPADO_MS / 1000, check_same_thread=False,
+                                     isolation_level=None)
+        self._trava = threading.Lock()
+        self._vistas = {}  # arquivo -> (geração do monitor, commits do app) na última leitura das revisões
+        self._gravacoes = 0
+        self.estatisticas = Counter()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for comando in SQL_ESTRUTURA:
+            self._conn.execute(comando)
+        self.incrementar([INICIO])
+
+    # Função para incrementar revisões numa só transação (chaves = [(banco, tabela)])
+    def incrementar(self, chaves):
+        with self._trava:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(SQL_INCREMENTAR, chaves)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Chamada após cada commit do app: tabelas alteradas (chaves de banco._chave) e arquivos gravados
+    def registrar_escrita(self, chaves, arquivos):
+        try:
+            self.incrementar([*chaves, *((arquivo, ESCRITAS) for arquivo in arquivos)])
+        except sqlite3.Error as e:
+            # Os outros workers podem servir a leitura anterior dessas tabelas até o TTL
+            self.estatisticas['erros'] += 1
+            log.error("Revisões de %s não registradas no cache compartilhado: %s", sorted(arquivos), e)
+
+    # Chamada por quem grava ao perceber, na própria conexão, uma gravação de fora do app no arquivo
+    def registrar_externa(self, arquivo):
+        try:
+            self.incrementar([(arquivo, EXTERNAS)])
+            self.estatisticas['externas'] += 1
+        except sqlite3.Error as e:
+            self.estatisticas['erros'] += 1
+            log.error("Alteração externa de %s não registrada no cache compartilhado: %s", arquivo, e)
+
+    # Função para montar a versão compartilhada de uma leitura: revisões das tabelas, alterações externas dos
+    # arquivos e a geração global. "geracoes" traz a geração do monitor de cada arquivo (banco.MonitorAlteracoes)
+    # O monitor vê os commits de qualquer conexão; se o arquivo mudou e nenhum worker registrou commit nele desde
+    # a última olhada, a mudança veio de fora do app e invalida as leituras desse arquivo em todos os workers.
+    # Um commit de outro worker visto antes de ele registrar a revisão também conta como externo (só uma falta a mais)
+    # Devolve None se o arquivo do cache não responde: a leitura usa só o cache do processo
+    def versao(self, chaves, geracoes):
+        try:
+            with self._trava:
+                revisoes = {(banco, tabela): revisao for banco, tabela, revisao in self._conn.execute(
+                    "SELECT banco, tabela, revisao FROM revisoes")}
+                externos = []
+                for arquivo, geracao in geracoes.items():
+                    escritas = revisoes.get((arquivo, ESCRITAS), 0)
+                    anterior = self._vistas.get(arquivo)
+                    if anterior is not None and anterior[0] != geracao and anterior[1] == escritas:
+                        externos.append((arquivo, EXTERNAS))
+                        revisoes[(arquivo, EXTERNAS)] = revisoes.get((arquivo, EXTERNAS), 0) + 1
+                    self._vistas[arquivo] = (geracao, escritas)
+            if externos:
+                self.estatisticas['externas'] += len(externos)
+                self.incrementar(externos)
+        except sqlite3.Error as e:
+            self.estatisticas['erros'] += 1
+            log.warning("Cache compartilhado indisponível: %s", e)
+            return None
+        return (
+            tuple(revisoes.get(chave, 0) for chave in chaves),
+            tuple(revisoes.get((arquivo, EXTERNAS), 0) for arquivo in sorted(geracoes)),
+            revisoes.get(INICIO, 0),
+        )
+
+    def _ler(self, chave):
+        with self._trava:
+            linha = self._conn.execute("SELECT valor FROM leituras WHERE chave = ? AND expira_em > ?",
+                                       (chave, time.time())).fetchone()
+        return pickle.loads(linha[0]) if linha else _FALTA
+
+    def _guardar(self, chave, valor, ttl):
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._trava:
+            self._conn.execute("INSERT OR REPLACE INTO leituras (chave, valor, expira_em) VALUES (?, ?, ?)",
+                               (chave, dados, time.time() + ttl))
+            self._gravacoes += 1
+            if self._gravacoes % PODAR_A_CADA == 0:
+                self._podar()
+
+    # Remove as leituras expiradas e, acima de MAXIMO_LEITURAS, as que expiram primeiro
+    def _podar(self):
+        self._conn.execute("DELETE FROM leituras WHERE expira_em <= ?", (time.time(),))
+        self._conn.execute('''
+            DELETE FROM leituras WHERE chave IN (
+                SELECT chave FROM leituras ORDER BY expira_em DESC LIMIT -1 OFFSET ?
+            )
+        ''', (MAXIMO_LEITURAS,))
+
+    # Função para servir uma leitura do cache compartilhado ou calculá-la e guardá-la para os outros workers
+    def ler_ou_calcular(self, nome, versao, args, kwargs, calcular, ttl):
+        try:
+            chave = hashlib.sha256(pickle.dumps((nome, versao, args, sorted(kwargs.items())))).digest()
+            valor = self._ler(chave)
+        except ERROS_CACHE as e:
+            self.estatisticas['erros'] += 1
+            log.warning("Leitura %s fora do cache compartilhado: %s", nome, e)
+            return calcular()
+        if valor is not _FALTA:
+            self.estatisticas['acertos'] += 1
+            return valor
+        self.estatisticas['faltas'] += 1
+        valor = calcular()
+        try:
+            self._guardar(chave, valor, ttl)
+        except ERROS_CACHE as e:
+            self.estatisticas['erros'] += 1
+            log.warning("Leitura %s não guardada no cache compartilhado: %s", nome, e)
+        return valor
+
+    def tamanho(self):
+        with self._trava:
+            linhas, tamanho = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(valor)), 0) FROM leituras").fetchone()
+        return {'leituras': linhas, 'megabytes': round(tamanho / 1024 / 1024, 1), **self.estatisticas}
+
+
+# Um cache por processo, aberto no primeiro uso; None quando o modo compartilhado está desligado
+@st.cache_resource
+def obter_cache(caminho=ARQUIVO):
+    if not caminho:
+        return None
+    return CacheCompartilhado(caminho)
@@ -0,0 +1,389 @@
+import atexit
+import logging
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+
+import streamlit as st
+
+import banco
+import escrita
+
+# Fila limitada: num pico maior que a capacidade de gravação a catraca recusa em vez de acumular memória
+TAMANHO_FILA = int(os.environ.get("GDE_FILA_ENTRADAS", 10000))
+TAMANHO_LOTE = 500
+TIMEOUT_FILA_S = 0.05  # espera máxima de quem registra quando a fila está cheia
+TENTATIVAS_GRAVACAO = 5
+TIMEOUT_ENCERRAMENTO_S = 10
+INTERVALO_VERIFICACAO_S = 5  # atraso máximo para o índice perceber gravações de fora do app
+
+log = logging.getLogger("gde.catraca")
+
+# Cada passagem pela catraca (liberada ou bloqueada), gravada pelo gravador em segundo plano
+SQL_ENTRADAS = '''
+    CREATE TABLE IF NOT EXISTS entradas (
+        id INTEGER PRIMARY KEY,
+        matricula INTEGER NOT NULL,
+        unidade TEXT,
+        dispositivo TEXT,
+        registrada_em TEXT NOT NULL,
+        liberada INTEGER NOT NULL
+    )
+'''
+SQL_INDICES = (
+    "CREATE INDEX IF NOT EXISTS idx_entradas_data ON entradas (registrada_em)",
+    "CREATE INDEX IF NOT EXISTS idx_entradas_matricula ON entradas (matricula, registrada_em)",
+)
+SQL_INSERIR = '''
+    INSERT INTO entradas (matricula, unidade, dispositivo, registrada_em, liberada)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Migração: cria a tabela de entradas e seus índices
+def criar_estrutura(conn):
+    conn.execute(SQL_ENTRADAS)
+    for sql in SQL_INDICES:
+        conn.execute(sql)
+
+# Operação do gravador do banco: um lote de entradas
+def _inserir_entradas(conn, lote):
+    conn.executemany(SQL_INSERIR, lote)
+
+# Função para consultar o aluno (por matrícula ou CPF) e o vencimento do último pagamento
+def consultar_acesso(conn, identificacao):
+    identificacao = re.sub(r'\D', '', str(identificacao))
+    if not identificacao:
+        return None
+    # Os dois índices são consultados (CPFs antigos nem sempre têm 11 dígitos); o CPF tem preferência
+    return conn.execute('''
+        SELECT a.matricula, a.nome, a.unidade, u.data_vencimento
+        FROM alunos a
+        LEFT JOIN ultimo_pagamento u ON u.matricula = a.matricula
+        WHERE a.cpf = :id OR a.matricula = :id
+        ORDER BY a.cpf = :id DESC
+        LIMIT 1
+    ''', {'id': identificacao}).fetchone()
+
+# Função para decidir se a entrada é liberada (vencimento a partir de hoje)
+def acesso_liberado(data_vencimento, hoje=None):
+    return data_vencimento is not None and data_vencimento >= (hoje or date.today()).strftime('%Y-%m-%d')
+
+# Função para normalizar a identificação digitada (só os dígitos)
+def _normalizar(identificacao):
+    return re.sub(r'\D', '', str(identificacao))
+
+
+# Alterações do índice, aplicadas aos mapas (matrícula -> dados, CPF -> matrícula) recebidos
+def _remover_aluno(por_matricula, por_cpf, matricula):
+    dados = por_matricula.pop(matricula, None)
+    if dados and por_cpf.get(dados[3]) == matricula:
+        del por_cpf[dados[3]]
+    return dados
+
+def _aplicar_aluno(por_matricula, por_cpf, matricula, cpf, nome, unidade):
+    anterior = _remover_aluno(por_matricula, por_cpf, matricula)
+    cpf = _normalizar(cpf) if cpf else None
+    por_matricula[matricula] = (nome, unidade and sys.intern(unidade), anterior and anterior[2], cpf)
+    if cpf:
+        por_cpf[cpf] = matricula
+
+def _aplicar_pagamento(por_matricula, por_cpf, matricula, data_vencimento):
+    dados = por_matricula.get(matricula)
+    if dados is not None and (dados[2] is None or data_vencimento >= dados[2]):
+        por_matricula[matricula] = (dados[0], dados[1], sys.intern(data_vencimento), dados[3])
+
+
+# Índice em memória para decidir a entrada sem consultar o banco: matrícula -> (nome, unidade, vencimento, CPF)
+# e CPF normalizado -> matrícula. Carregado por uma única consulta no primeiro uso e mantido pelas
+# funções que gravam alunos e pagamentos; gravações de fora do app (percebidas pelo monitor de
+# alterações, no máximo a cada INTERVALO_VERIFICACAO_S) fazem o índice ser recarregado, e ele também é
+# recarregado inteiro a cada banco.TTL_CACHE_S, o mesmo prazo das leituras em cache
+# A recarga roda numa thread própria, fora da trava das consultas: a catraca continua decidindo pelos mapas
+# anteriores, e as alterações avisadas durante a recarga são repetidas nos mapas novos antes da troca.
+# Só a primeira carga (ainda não há mapas) faz a consulta esperar
+class IndiceAcesso:
+    def __init__(self, caminho=banco.BANCO_PRINCIPAL):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self._trava_carga = threading.Lock()  # uma carga por vez
+        self._monitor = banco.obter_monitor(caminho)
+        self._por_matricula = {}
+        self._por_cpf = {}
+        self._carregado = False
+        self._recarregando = False
+        self._pendentes = None  # alterações avisadas durante uma carga: [(função, argumentos)]
+        self._geracao = None
+        self._verificado_em = 0.0
+        self._carregado_em = 0.0
+
+    # Chamado com _trava_carga (uma carga por vez); a consulta e a montagem dos mapas correm sem _trava
+    def _carregar(self):
+        with self._trava:
+            self._pendentes = []
+        try:
+            with banco.conexao(self.caminho) as conn:
+                geracao = self._monitor.verificar()
+                linhas = conn.execute('''
+                    SELECT a.matricula, a.cpf, a.nome, a.unidade, u.data_vencimento
+                    FROM alunos a
+                    LEFT JOIN ultimo_pagamento u ON u.matricula = a.matricula
+                ''').fetchall()
+            # Unidades e datas se repetem entre os alunos: sys.intern guarda uma cópia de cada
+            por_matricula, por_cpf = {}, {}
+            for matricula, cpf, nome, unidade, vencimento in linhas:
+                cpf = _normalizar(cpf) if cpf else None
+                por_matricula[matricula] = (nome, unidade and sys.intern(unidade), vencimento and sys.intern(vencimento), cpf)
+                if cpf:
+                    por_cpf[cpf] = matricula
+        except BaseException:
+            with self._trava:
+                self._pendentes = None
+            raise
+        with self._trava:
+            for funcao, args in self._pendentes:
+                funcao(por_matricula, por_cpf, *args)
+            self._pendentes = None
+            self._por_matricula, self._por_cpf = por_matricula, por_cpf
+            self._geracao, self._carregado = geracao, True
+            self._verificado_em = self._carregado_em = time.monotonic()
+
+    def _recarregar(self):
+        try:
+            with self._trava_carga:
+                self._carregar()
+        except Exception:
+            log.exception("Erro ao recarregar o índice de acesso; segue com o anterior")
+        finally:
+            with self._trava:
+                self._recarregando = False
+
+    # Chamado com a trava: decide se o índice precisa ser recarregado e dispara a recarga em segundo plano
+    # Devolve True quando ainda não há índice e quem consulta precisa esperar a primeira carga
+    def _verificar_recarga(self):
+        if not self._carregado:
+            return True
+        agora = time.monotonic()
+        recarregar = agora - self._carregado_em > banco.TTL_CACHE_S
+        if not recarregar and agora - self._verificado_em > INTERVALO_VERIFICACAO_S:
+            self._verificado_em = agora
+            recarregar = self._monitor.verificar() != self._geracao
+        if recarregar and not self._recarregando:
+            self._recarregando = True
+            self._verificado_em = agora
+            threading.Thread(target=self._recarregar, name="recarga-indice-acesso", daemon=True).start()
+        return False
+
+    # Função para consultar o aluno (por CPF ou matrícula) no mesmo formato de consultar_acesso
+    def consultar(self, identificacao):
+        identificacao = _normalizar(identificacao)
+        if not identificacao:
+            return None
+        with self._trava:
+            primeira_carga = self._verificar_recarga()
+        if primeira_carga:
+            with self._trava_carga:
+                if not self._carregado:
+                    self._carregar()
+        with self._trava:
+            matricula = self._por_cpf.get(identificacao)
+            if matricula is None:
+                matricula = int(identificacao)
+            dados = self._por_matricula.get(matricula)
+        return None if dados is None else (matricula, *dados[:3])
+
+    # Aplica uma alteração aos mapas atuais e guarda para repetir nos mapas da carga em andamento
+    def _aplicar(self, funcao, *args):
+        with self._trava:
+            if self._carregado:
+                funcao(self._por_matricula, self._por_cpf, *args)
+            if self._pendentes is not None:
+                self._pendentes.append((funcao, args))
+
+    # Chamado depois do commit de um aluno novo ou editado (índice ainda não carregado: nada a fazer)
+    def atualizar_aluno(self, matricula, cpf, nome, unidade):
+        self._aplicar(_aplicar_aluno, matricula, cpf, nome, unidade)
+
+    # Chamado depois do commit de um pagamento; vale o maior vencimento, como no gatilho de ultimo_pagamento
+    def registrar_pagamento(self, matricula, data_vencimento):
+        if data_vencimento is not None:
+            self._aplicar(_aplicar_pagamento, matricula, data_vencimento)
+
+    # Chamado depois da exclusão de um aluno
+    def remover_aluno(self, matricula):
+        self._aplicar(_remover_aluno, matricula)
+
+    # Para gravações em massa (importação, restauração): recarrega em segundo plano no próximo uso
+    # (até a troca, alunos importados ainda não aparecem)
+    def invalidar(self):
+        with self._trava:
+            self._carregado_em = float('-inf')
+
+    # Memória ocupada pelos dicionários, tuplas e textos do índice (cada objeto contado uma vez)
+    def tamanho_memoria(self):
+        with self._trava:
+            vistos, total = set(), 0
+            pilha = [self._por_matricula, self._por_cpf]
+            while pilha:
+                objeto = pilha.pop()
+                if id(objeto) in vistos:
+                    continue
+                vistos.add(id(objeto))
+                total += sys.getsizeof(objeto)
+                if isinstance(objeto, dict):
+                    pilha.extend(objeto.keys())
+                    pilha.extend(objeto.values())
+                elif isinstance(objeto, tuple):
+                    pilha.extend(objeto)
+            return {'alunos': len(self._por_matricula), 'cpfs': len(self._por_cpf), 'bytes': total}
+
+
+# Um índice por processo, compartilhado por todas as sessões
+@st.cache_resource
+def obter_indice(caminho=banco.BANCO_PRINCIPAL):
+    return IndiceAcesso(caminho)
+
+
+# Recebe as entradas de todas as sessões numa fila em memória e junta em lotes numa thread própria; cada lote é
+# uma operação do gravador único do banco (escrita.py), que faz o commit junto com as demais gravações do app
+# Quem registra nunca espera pelo gravador: só pela fila de entradas, e apenas quando ela está cheia
+class GravadorEntradas:
+    def __init__(self, caminho=banco.BANCO_PRINCIPAL, tamanho_fila=TAMANHO_FILA, tamanho_lote=TAMANHO_LOTE):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+        self._estatisticas = Counter()
+        # A thread não tem ScriptRunContext: gravador obtido aqui, fora dos caches do Streamlit
+        self._escrita = escrita.obter_gravador(caminho)
+        self._thread = threading.Thread(target=self._executar, name="gravador-entradas", daemon=True)
+        self._thread.start()
+
+    def _contar(self, chave, quantidade=1):
+        with self._trava:
+            self._estatisticas[chave] += quantidade
+
+    # Função para enfileirar uma entrada; devolve False quando a fila está cheia ou o gravador encerrado
+    def registrar(self, matricula, unidade, dispositivo, liberada, momento=None):
+        if self._parar.is_set():
+            return False
+        evento = (matricula, unidade, dispositivo,
+                  (momento or datetime.now()).strftime('%Y-%m-%d %H:%M:%S'), int(bool(liberada)))
+        try:
+            self._fila.put(evento, timeout=TIMEOUT_FILA_S)
+        except queue.Full:
+            self._contar('recusadas')
+            return False
+        self._contar('enfileiradas')
+        return True
+
+    # Espera a primeira entrada e junta as que chegaram enquanto o lote anterior era gravado
+    def _proximo_lote(self):
+        try:
+            lote = [self._fila.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    # Grava o lote pelo gravador do banco e espera o commit
+    # Fila do gravador cheia ou banco ocupado além das tentativas dele (lote desfeito): tentado de novo com
+    # espera crescente. Sem resposta no prazo o lote pode ter sido gravado: não é repetido, para não registrar
+    # as passagens duas vezes, e fica no log como incerto
+    def _gravar(self, lote):
+        for tentativa in range(1, TENTATIVAS_GRAVACAO + 1):
+            try:
+                self._escrita.executar(_inserir_entradas, lote, altera=('entradas',))
+                self._contar('gravadas', len(lote))
+                self._contar('lotes')
+                with self._trava:
+                    self._estatisticas['maior_lote'] = max(self._estatisticas['maior_lote'], len(lote))
+                return
+            except escrita.EscritaSemResposta as e:
+                self._contar('incertas', len(lote))
+                log.error("Entradas com gravação não confirmada (%s): %s", e, lote)
+                return
+            except sqlite3.OperationalError as e:
+                log.warning("Falha ao gravar %d entradas (tentativa %d): %s", len(lote), tentativa, e)
+                time.sleep(0.1 * 2 ** tentativa)
+        self._contar('perdidas', len(lote))
+        log.error("Entradas não gravadas após %d tentativas: %s", TENTATIVAS_GRAVACAO, lote)
+
+    def _executar(self):
+        while not (self._parar.is_set() and self._fila.empty()):
+            lote = self._proximo_lote()
+            if not lote:
+                continue
+            try:
+                self._gravar(lote)
+            except Exception:
+                self._contar('perdidas', len(lote))
+                log.exception("Erro inesperado ao gravar %d entradas", len(lote))
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+
+    # Função para esperar até que tudo o que já foi enfileirado esteja gravado
+    def descarregar(self):
+        self._fila.join()
+
+    # Recusa novas entradas, grava o que restou na fila e para a thread
+    def encerrar(self, timeout=TIMEOUT_ENCERRAMENTO_S):
+        self._parar.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.error("Gravador de entradas encerrado com %d entradas na fila", self._fila.qsize())
+
+    def estatisticas(self):
+        with self._trava:
+            estatisticas = dict(self._estatisticas)
+        estatisticas['na_fila'] = self._fila.qsize()
+        return estatisticas
+
+
+# Um gravador por processo, compartilhado por todas as sessões; descarrega a fila quando o processo termina
+@st.cache_resource
+def obter_gravador(caminho=banco.BANCO_PRINCIPAL):
+    gravador = GravadorEntradas(caminho)
+    atexit.register(gravador.encerrar)
+    return gravador
+
+# Função para registrar a passagem de um aluno pela catraca
+# Devolve (aluno, liberada, enfileirada); aluno é None quando a identificação não existe
+def registrar_entrada(identificacao, dispositivo, hoje=None):
+    aluno = obter_indice().consultar(identificacao)
+    if aluno is None:
+        return None, False, False
+    matricula, _, unidade, data_vencimento = aluno
+    liberada = acesso_liberado(data_vencimento, hoje)
+    return aluno, liberada, obter_gravador().registrar(matricula, unidade, dispositivo, liberada)
+
+# Função para consultar as entradas de um dia, das mais recentes para as mais antigas
+@banco.leitura_em_cache('entradas', 'alunos')
+def consultar_entradas(dia, limite=200):
+    inicio = dia.strftime('%Y-%m-%d')
+    with banco.conexao() as conn:
+        resumo = conn.execute('''
+            SELECT COUNT(*), IFNULL(SUM(liberada), 0)
+            FROM entradas
+            WHERE registrada_em >= ? AND registrada_em < date(?, '+1 day')
+        ''', (inicio, inicio)).fetchone()
+        ultimas = conn.execute('''
+            SELECT e.registrada_em, e.matricula, a.nome, e.unidade, e.dispositivo, e.liberada
+            FROM entradas e
+            LEFT JOIN alunos a ON a.matricula = e.matricula
+            WHERE e.registrada_em >= ? AND e.registrada_em < date(?, '+1 day')
+            ORDER BY e.registrada_em DESC, e.id DESC
+            LIMIT ?
+        ''', (inicio, inicio, limite)).fetchall()
+    return resumo, ultimas
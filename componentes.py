@@ -0,0 +1,37 @@
+import streamlit as st
+
+import busca_alunos
+
+# Componente para escolher um aluno entre os resultados da busca por nome
+# Retorna a matrícula selecionada ou None quando não há resultados
+def selecionar_aluno(termo, chave, por_pagina=10):
+    chave_pagina = f"pagina_{chave}"
+    pagina = st.session_state.get(chave_pagina, 0)
+
+    candidatos, tem_mais = busca_alunos.buscar_por_nome(termo, pagina, por_pagina)
+    if not candidatos:
+        st.error("Aluno não encontrado.")
+        return None
+
+    opcoes = {
+        f"{matricula} - {nome} - CPF: {cpf} ({unidade or 'Sem unidade'})": matricula
+        for matricula, nome, cpf, unidade in candidatos
+    }
+    escolha = st.selectbox(f"Selecione o aluno (página {pagina + 1})", list(opcoes), key=f"selecao_{chave}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if pagina > 0 and st.button("⬅ Página anterior", key=f"anterior_{chave}"):
+            st.session_state[chave_pagina] = pagina - 1
+            st.rerun()
+    with col2:
+        if tem_mais and st.button("Próxima página ➡", key=f"proxima_{chave}"):
+            st.session_state[chave_pagina] = pagina + 1
+            st.rerun()
+
+    return opcoes[escolha]
+
+# Função para iniciar uma nova busca por nome a partir da primeira página
+def iniciar_busca(termo, chave):
+    st.session_state[f"termo_{chave}"] = termo
+    st.session_state[f"pagina_{chave}"] = 0
@@ -0,0 +1,202 @@
+import io
+import re
+import unicodedata
+
+import pandas as pd
+
+import banco
+import catraca
+import escrita
+import pagamentos as tabela_pagamentos
+import status_pagamento
+
+PLANOS = ["Mensal", "Trimestral", "Semestral", "Anual"]
+
+# Cabeçalhos usuais dos extratos em CSV (comparados sem acentos e sem maiúsculas)
+SINONIMOS_EXTRATO = {
+    "data_lancamento": "data", "data_do_lancamento": "data", "data_pagamento": "data", "dtposted": "data",
+    "historico": "descricao", "memo": "descricao", "lancamento": "descricao", "nome_pagador": "descricao",
+    "documento": "cpf", "cpf_cnpj": "cpf", "cpf_pagador": "cpf", "cpf_do_pagador": "cpf",
+    "valor_r": "valor", "trnamt": "valor", "fitid": "identificador", "id_transacao": "identificador",
+}
+
+# CPF e matrícula escritos no histórico do PIX/depósito ("PIX RECEBIDO 123.456.789-09", "MAT 1234")
+RE_CPF = re.compile(r'(?<!\d)(\d{3}\.?\d{3}\.?\d{3}-?\d{2})(?!\d)')
+RE_MATRICULA = re.compile(r'MAT(?:R[IÍ]CULA)?\W*(\d+)', re.IGNORECASE)
+RE_OFX_TRANSACAO = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+RE_OFX_CAMPO = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+COLUNAS_EXTRATO = ["linha", "data", "valor", "descricao", "cpf", "matricula", "plano", "identificador"]
+COLUNAS_REVISAO = ["linha", "data", "valor", "descricao", "cpf", "matricula", "motivo"]
+
+# Função para normalizar o nome de uma coluna do extrato ("Histórico" -> "descricao")
+def _normalizar_coluna(nome):
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode().lower()
+    nome = re.sub(r'\W+', '_', nome).strip('_')
+    return SINONIMOS_EXTRATO.get(nome, nome)
+
+# Função para normalizar CPFs: só dígitos e sem zeros à esquerda (o Excel costuma apagá-los)
+def normalizar_cpf(cpfs):
+    return cpfs.fillna('').astype(str).str.replace(r'\D', '', regex=True).str.lstrip('0').replace('', None)
+
+# Função para converter valores "1.234,56" ou "1234.56" em número
+def _converter_valores(valores):
+    valores = valores.fillna('').astype(str).str.strip().str.replace(r'[R$\s]', '', regex=True)
+    brasileiro = valores.str.contains(',', regex=False)
+    valores = valores.where(~brasileiro, valores.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(valores, errors='coerce')
+
+# Função para converter datas "dd/mm/aaaa", "aaaa-mm-dd" ou "aaaammdd" (OFX)
+def _converter_datas(datas):
+    datas = datas.fillna('').astype(str).str.strip()
+    convertidas = pd.to_datetime(datas, format='%d/%m/%Y', errors='coerce')
+    for formato, texto in (('%Y-%m-%d', datas.str[:10]), ('%Y%m%d', datas.str[:8])):
+        convertidas = convertidas.fillna(pd.to_datetime(texto, format=formato, errors='coerce'))
+    return convertidas
+
+# Função para ler as transações de um arquivo OFX (só os campos usados na conciliação)
+def _ler_ofx(texto):
+    transacoes = []
+    for bloco in RE_OFX_TRANSACAO.findall(texto):
+        campos = {nome.upper(): valor.strip() for nome, valor in RE_OFX_CAMPO.findall(bloco)}
+        transacoes.append({
+            'data': campos.get('DTPOSTED', ''),
+            'valor': campos.get('TRNAMT', ''),
+            'descricao': " ".join(filter(None, (campos.get('NAME'), campos.get('MEMO')))),
+            'identificador': campos.get('FITID'),
+        })
+    return pd.DataFrame(transacoes, columns=['data', 'valor', 'descricao', 'identificador'])
+
+# Função para ler o extrato (CSV ou OFX) em um DataFrame com as colunas de COLUNAS_EXTRATO
+def ler_extrato(arquivo, nome_arquivo):
+    conteudo = arquivo.read()
+    if nome_arquivo.lower().endswith('.ofx'):
+        try:
+            texto = conteudo.decode('utf-8')
+        except UnicodeDecodeError:
+            texto = conteudo.decode('latin-1')  # OFX de banco brasileiro costuma vir em latin-1
+        extrato = _ler_ofx(texto)
+    else:
+        # sep=None detecta o separador (";" do Excel brasileiro ou ",")
+        extrato = pd.read_csv(io.BytesIO(conteudo), sep=None, engine='python', dtype=str, keep_default_na=False,
+                              encoding='utf-8-sig').rename(columns=_normalizar_coluna)
+
+    extrato = extrato.reindex(columns=COLUNAS_EXTRATO[1:])
+    extrato.insert(0, 'linha', range(1, len(extrato) + 1))
+    extrato['data'] = _converter_datas(extrato['data'])
+    extrato['valor'] = _converter_valores(extrato['valor'])
+    descricao = extrato['descricao'].fillna('').astype(str)
+    extrato['descricao'] = descricao
+    extrato['identificador'] = extrato['identificador'].replace('', None)
+
+    # CPF e matrícula informados na coluna própria; senão, procurados no histórico
+    extrato['cpf'] = normalizar_cpf(extrato['cpf']).fillna(normalizar_cpf(descricao.str.extract(RE_CPF)[0]))
+    # Em texto (dtype 'string'): no OFX a coluna vem toda NaN e o fillna sobre object avisa do downcasting
+    matriculas = extrato['matricula'].astype('string').str.replace(r'\D', '', regex=True).replace('', pd.NA)
+    extrato['matricula'] = pd.to_numeric(matriculas.fillna(descricao.str.extract(RE_MATRICULA)[0]), errors='coerce').astype('Int64')
+    return extrato
+
+# Função para carregar, de uma só vez, os alunos usados no cruzamento (uma leitura, sem consulta por linha)
+def _carregar_alunos(conn):
+    alunos = pd.read_sql_query("SELECT matricula, cpf AS cpf_cadastro, nome, unidade FROM alunos", conn)
+    alunos['cpf'] = normalizar_cpf(alunos['cpf_cadastro'])
+    alunos['matricula'] = alunos['matricula'].astype('Int64')
+    return alunos
+
+# Função para separar os pagamentos que já estão no banco (mesma matrícula, data e valor)
+def marcar_ja_registrados(conn, pagamentos):
+    if pagamentos.empty:
+        return pd.Series(False, index=pagamentos.index)
+    existentes = pd.read_sql_query(f'''
+        SELECT matricula, {tabela_pagamentos.sql_data('data_pagamento')} AS data_pagamento, valor_centavos / 100.0 AS valor
+        FROM pagamentos_base
+        WHERE data_pagamento BETWEEN {tabela_pagamentos.sql_dias('?')} AND {tabela_pagamentos.sql_dias('?')}
+    ''', conn, params=(pagamentos['data_pagamento'].min(), pagamentos['data_pagamento'].max()))
+    chave = pd.MultiIndex.from_frame(pd.DataFrame({
+        'matricula': pagamentos['matricula'].astype('int64'),
+        'data_pagamento': pagamentos['data_pagamento'],
+        'valor': pagamentos['valor'].round(2),
+    }))
+    registrados = pd.MultiIndex.from_frame(existentes.astype({'matricula': 'int64'}))
+    return pd.Series(chave.isin(registrados), index=pagamentos.index)
+
+# Função para conciliar o extrato com os alunos: cruza primeiro pelo CPF e depois pela matrícula
+# Devolve os pagamentos prontos para registrar, as linhas para revisão e um resumo das quantidades
+def conciliar(extrato, plano_padrao="Mensal", hoje=None):
+    creditos = extrato[~(extrato['valor'] <= 0)]  # débitos do extrato não são mensalidades
+    revisao = []
+
+    invalidas = creditos['data'].isna() | creditos['valor'].isna()
+    revisao.append(creditos[invalidas].assign(motivo="Data ou valor inválido"))
+    creditos = creditos[~invalidas]
+
+    repetidas = creditos['identificador'].notna() & creditos.duplicated('identificador')
+    revisao.append(creditos[repetidas].assign(motivo="Transação repetida no extrato"))
+    creditos = creditos[~repetidas]
+
+    with banco.conexao() as conn:
+        alunos = _carregar_alunos(conn)
+        # CPFs que, normalizados, aparecem em mais de um cadastro não servem para identificar o aluno
+        por_cpf = alunos.dropna(subset=['cpf']).drop_duplicates('cpf', keep=False).set_index('cpf')
+        por_matricula = alunos.set_index('matricula')
+
+        sem_identificacao = creditos['cpf'].isna() & creditos['matricula'].isna()
+        pelo_cpf = creditos['cpf'].map(por_cpf['matricula'])
+        pela_matricula = creditos['matricula'].where(creditos['matricula'].isin(por_matricula.index))
+        matriculas = pelo_cpf.fillna(pela_matricula).astype('Int64')
+
+        # Na revisão fica a identificação como veio no extrato
+        sem_aluno = matriculas.isna()
+        revisao.append(creditos[sem_aluno & sem_identificacao].assign(motivo="Sem CPF ou matrícula"))
+        revisao.append(creditos[sem_aluno & ~sem_identificacao].assign(motivo="Aluno não encontrado"))
+        encontrados = creditos[~sem_aluno].assign(matricula=matriculas[~sem_aluno])
+
+        planos = encontrados['plano'].fillna('').str.strip().str.capitalize()
+        planos = planos.where(planos.isin(PLANOS), plano_padrao)
+        pagamentos = pd.DataFrame({
+            'matricula': encontrados['matricula'],
+            'unidade': encontrados['matricula'].map(por_matricula['unidade']),
+            'nome': encontrados['matricula'].map(por_matricula['nome']),
+            'cpf': encontrados['matricula'].map(por_matricula['cpf_cadastro']),
+            'data_pagamento': encontrados['data'].dt.strftime('%Y-%m-%d'),
+            'plano': planos,
+            'valor': encontrados['valor'],
+        })
+        ja_registrados = marcar_ja_registrados(conn, pagamentos)
+
+    revisao.append(encontrados[ja_registrados].assign(motivo="Pagamento já registrado"))
+    pagamentos = pagamentos[~ja_registrados].copy()
+
+    # Mesmo cálculo do registro manual: pagamento em atraso entra como "Pago"
+    status = status_pagamento.calcular_status(pagamentos['data_pagamento'], pagamentos['plano'], hoje)
+    pagamentos['status'] = status.replace(status_pagamento.ATRASADO, "Pago")
+    vencimentos = status_pagamento.calcular_vencimentos(pagamentos['data_pagamento'], pagamentos['plano'])
+    pagamentos['data_vencimento'] = vencimentos.dt.strftime('%Y-%m-%d')
+
+    revisao = pd.concat(revisao)[COLUNAS_REVISAO].sort_values('linha')
+    resumo = {
+        'linhas': len(extrato),
+        'debitos_ignorados': int((extrato['valor'] <= 0).sum()),
+        'conciliados': len(pagamentos),
+        'revisao': len(revisao),
+    }
+    return pagamentos.reset_index(drop=True), revisao.reset_index(drop=True), resumo
+
+# Operação do gravador: grava os pagamentos ainda não registrados e devolve os que entraram
+def _inserir_conciliados(conn, pagamentos):
+    colunas = list(tabela_pagamentos.COLUNAS)
+    pagamentos = pagamentos[~marcar_ja_registrados(conn, pagamentos)]
+    tabela_pagamentos.inserir_varios(
+        conn, pagamentos[colunas].astype(object).where(pagamentos[colunas].notna(), None).itertuples(index=False, name=None))
+    return pagamentos
+
+# Função para registrar os pagamentos conciliados em uma única transação
+# Os já registrados são conferidos de novo pelo gravador, que grava um lote por vez (extrato enviado duas vezes,
+# duas sessões)
+def registrar_conciliados(pagamentos):
+    pagamentos = escrita.executar(_inserir_conciliados, pagamentos, altera=('pagamentos',))
+
+    indice = catraca.obter_indice()
+    for matricula, data_vencimento in zip(pagamentos['matricula'], pagamentos['data_vencimento']):
+        indice.registrar_pagamento(int(matricula), data_vencimento)
+    return len(pagamentos)
@@ -0,0 +1,253 @@
+# Consolidação dos bancos espalhados pela pasta do app em database.db
+# databade.db e entradas.db são cópias antigas do esquema de alunos/pagamentos; gym_membership.db é o banco
+# que cadastro_aluno.py usava (alunos com CPF e mensalidades) e, nas instalações mais antigas, members/payments.
+# Os alunos são unificados pelo CPF normalizado (só dígitos, sem zeros à esquerda), inclusive os cadastros
+# repetidos dentro de database.db; os pagamentos entram pela matrícula unificada, sem repetir os que já existem.
+# novo.db (credenciais) e treino_academia.db (exercícios) continuam separados e são anexados pelo banco.py.
+# Uso: python consolidacao.py [--executar]   (sem --executar tudo roda e é desfeito no fim, só para o relatório)
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+import backup
+import banco
+import catraca
+import conciliacao
+import pagamentos as tabela_pagamentos
+import status_pagamento
+
+ORIGENS = ('databade.db', 'entradas.db', 'gym_membership.db')
+SUFIXO_CONSOLIDADO = ".consolidado"
+COLUNAS_ALUNOS = ("nome", "cpf", "data_nascimento", "endereco", "telefone", "email", "unidade")
+PLANO_PADRAO = "Mensal"
+
+SQL_CONSOLIDACOES = '''
+    CREATE TABLE IF NOT EXISTS consolidacoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        arquivo TEXT NOT NULL,
+        alunos_novos INTEGER NOT NULL,
+        alunos_existentes INTEGER NOT NULL,
+        pagamentos INTEGER NOT NULL,
+        ignorados INTEGER NOT NULL,
+        consolidado_em TEXT NOT NULL
+    )
+'''
+
+# O cadastro repetido passa o último pagamento para o que fica (vale o maior vencimento, como no gatilho)
+SQL_MOVER_ULTIMO_PAGAMENTO = '''
+    INSERT INTO ultimo_pagamento (matricula, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento, status)
+    SELECT ?, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento, status
+    FROM ultimo_pagamento WHERE matricula = ?
+    ON CONFLICT (matricula) DO UPDATE SET
+        codigo_pagamento = excluded.codigo_pagamento,
+        unidade = excluded.unidade,
+        plano = excluded.plano,
+        data_pagamento = excluded.data_pagamento,
+        data_vencimento = excluded.data_vencimento,
+        status = excluded.status
+    WHERE excluded.data_vencimento >= ultimo_pagamento.data_vencimento
+'''
+
+# Totais de usuários, alunos, pagamentos e exercícios numa única consulta (bancos anexados)
+SQL_VISAO_GERAL = '''
+    SELECT (SELECT COUNT(*) FROM usuarios.credenciais),
+           (SELECT COUNT(*) FROM alunos),
+           (SELECT COUNT(*) FROM pagamentos_base),
+           (SELECT COUNT(*) FROM treinos.exercicios)
+'''
+
+def _tabelas(conn):
+    return {
+        tabela: {coluna[1] for coluna in conn.execute(f"PRAGMA table_info({tabela})")}
+        for tabela, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+
+# Função para unificar os cadastros de database.db com o mesmo CPF: fica a menor matrícula, que recebe
+# os campos vazios, os pagamentos, as entradas e as fichas de treino dos demais.
+# Devolve {matrícula removida: matrícula mantida}
+def unificar_cadastros(conn):
+    alunos = pd.read_sql_query(f"SELECT matricula, {', '.join(COLUNAS_ALUNOS)} FROM alunos ORDER BY matricula", conn)
+    alunos['cpf_normalizado'] = conciliacao.normalizar_cpf(alunos['cpf'])
+    repetidos = alunos.dropna(subset=['cpf_normalizado'])
+    repetidos = repetidos[repetidos.duplicated('cpf_normalizado', keep=False)]
+    tabelas = _tabelas(conn)
+
+    unificados = {}
+    for _, grupo in repetidos.groupby('cpf_normalizado'):
+        manter, *remover = grupo['matricula'].tolist()
+        for matricula in remover:
+            unificados[matricula] = manter
+            conn.execute(SQL_MOVER_ULTIMO_PAGAMENTO, (manter, matricula))
+            conn.execute("UPDATE pagamentos_base SET matricula = ? WHERE matricula = ?", (manter, matricula))
+            for tabela in ('entradas', 'fichas_treino'):
+                if tabela in tabelas:
+                    conn.execute(f"UPDATE {tabela} SET matricula = ? WHERE matricula = ?", (manter, matricula))
+            dados = conn.execute(f"SELECT {', '.join(COLUNAS_ALUNOS[2:])} FROM alunos WHERE matricula = ?",
+                                 (matricula,)).fetchone()
+            conn.execute("DELETE FROM alunos WHERE matricula = ?", (matricula,))
+            conn.execute(f'''
+                UPDATE alunos SET {", ".join(f"{coluna} = COALESCE({coluna}, ?)" for coluna in COLUNAS_ALUNOS[2:])}
+                WHERE matricula = ?
+            ''', (*dados, manter))
+    return unificados
+
+def _matriculas_por_cpf(conn):
+    cadastrados = pd.read_sql_query("SELECT matricula, cpf FROM alunos", conn)
+    cadastrados['cpf'] = conciliacao.normalizar_cpf(cadastrados['cpf'])
+    cadastrados = cadastrados.dropna(subset=['cpf'])  # senão o pandas casa os CPFs vazios com o NaN de quem não achou
+    return dict(zip(cadastrados['cpf'], cadastrados['matricula']))
+
+# Função para ler os alunos e os pagamentos de um banco antigo
+# Devolve alunos (colunas de COLUNAS_ALUNOS + id de origem), pagamentos (id ou CPF do aluno, data, plano, valor)
+# e quantas linhas não têm como ser unificadas (sem CPF)
+def ler_origem(caminho):
+    origem = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    try:
+        tabelas = _tabelas(origem)
+        alunos = pd.DataFrame(columns=["id_origem", *COLUNAS_ALUNOS])
+        pagamentos = pd.DataFrame(columns=["id_origem", "cpf", "unidade", "data_pagamento", "plano", "valor", "status"])
+        ignorados = 0
+
+        if 'cpf' in tabelas.get('alunos', ()):
+            chave = 'matricula' if 'matricula' in tabelas['alunos'] else 'id'
+            colunas = [coluna for coluna in COLUNAS_ALUNOS if coluna in tabelas['alunos']]
+            alunos = pd.read_sql_query(f"SELECT {chave} AS id_origem, {', '.join(colunas)} FROM alunos", origem)
+
+        if {'matricula', 'data_pagamento', 'valor'} <= tabelas.get('pagamentos', set()):
+            colunas = {coluna: coluna if coluna in tabelas['pagamentos'] else "NULL"
+                       for coluna in ("cpf", "unidade", "plano", "status")}
+            pagamentos = pd.read_sql_query(f'''
+                SELECT matricula AS id_origem, {colunas['cpf']} AS cpf, {colunas['unidade']} AS unidade,
+                       data_pagamento, {colunas['plano']} AS plano, valor, {colunas['status']} AS status
+                FROM pagamentos
+            ''', origem)
+        elif {'aluno_cpf', 'ultimo_pagamento'} <= tabelas.get('mensalidades', set()):
+            # cadastro_aluno.py guardava só o último pagamento de cada mensalidade
+            pagamentos = pd.read_sql_query('''
+                SELECT NULL AS id_origem, aluno_cpf AS cpf, NULL AS unidade, ultimo_pagamento AS data_pagamento,
+                       plano, valor, NULL AS status
+                FROM mensalidades
+                WHERE ultimo_pagamento IS NOT NULL
+            ''', origem)
+
+        # members/payments nunca tiveram CPF: não há como saber se já são alunos de database.db
+        for tabela in ('members', 'payments'):
+            if tabela in tabelas:
+                ignorados += origem.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+    finally:
+        origem.close()
+    return alunos, pagamentos, ignorados
+
+# Função para trazer os alunos e pagamentos de um banco antigo para database.db (na transação de conn)
+def consolidar_origem(conn, caminho):
+    alunos, pagamentos, ignorados = ler_origem(caminho)
+    alunos['cpf_normalizado'] = conciliacao.normalizar_cpf(alunos['cpf'])
+    incompletos = alunos['cpf_normalizado'].isna() | alunos['nome'].isna()
+    ignorados += int(incompletos.sum())
+    alunos = alunos[~incompletos].drop_duplicates('cpf_normalizado')
+
+    por_cpf = _matriculas_por_cpf(conn)
+    novos = alunos[~alunos['cpf_normalizado'].isin(por_cpf.keys())]
+    colunas = [coluna for coluna in COLUNAS_ALUNOS if coluna in novos.columns]
+    conn.executemany(
+        f"INSERT INTO alunos ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+        novos[colunas].astype(object).where(novos[colunas].notna(), None).itertuples(index=False, name=None),
+    )
+    por_cpf = _matriculas_por_cpf(conn)
+
+    # O pagamento chega ao aluno pelo id de origem (CPF do cadastro de origem) ou pelo CPF gravado nele
+    cpf_por_id = dict(zip(alunos['id_origem'], alunos['cpf_normalizado']))
+    cpfs = pagamentos['id_origem'].map(cpf_por_id).fillna(conciliacao.normalizar_cpf(pagamentos['cpf']))
+    lidos = len(pagamentos)
+    pagamentos = pagamentos.assign(matricula=cpfs.map(por_cpf)).dropna(subset=['matricula', 'data_pagamento', 'valor'])
+    unidades = dict(conn.execute("SELECT matricula, unidade FROM alunos"))
+    pagamentos = pd.DataFrame({
+        'matricula': pagamentos['matricula'].astype('int64'),
+        'unidade': pagamentos['unidade'].fillna(pagamentos['matricula'].map(unidades)),
+        'data_pagamento': pd.to_datetime(pagamentos['data_pagamento'], errors='coerce').dt.strftime('%Y-%m-%d'),
+        'plano': pagamentos['plano'].where(pagamentos['plano'].isin(tabela_pagamentos.PLANOS), PLANO_PADRAO),
+        'valor': pagamentos['valor'].astype(float).round(2),
+        'status': pagamentos['status'],
+    }).dropna(subset=['data_pagamento'])
+    ignorados += lidos - len(pagamentos)
+    pagamentos = pagamentos.drop_duplicates(['matricula', 'data_pagamento', 'valor'])
+    pagamentos = pagamentos[~conciliacao.marcar_ja_registrados(conn, pagamentos)]
+
+    # Mesmo cálculo do registro manual para o status que não veio gravado
+    status = status_pagamento.calcular_status(pagamentos['data_pagamento'], pagamentos['plano'])
+    pagamentos['status'] = pagamentos['status'].where(pagamentos['status'].isin(tabela_pagamentos.STATUS_CODIGOS),
+                                                      status.replace(status_pagamento.ATRASADO, "Pago"))
+    vencimentos = status_pagamento.calcular_vencimentos(pagamentos['data_pagamento'], pagamentos['plano'])
+    pagamentos['data_vencimento'] = vencimentos.dt.strftime('%Y-%m-%d')
+    colunas = list(tabela_pagamentos.COLUNAS)
+    tabela_pagamentos.inserir_varios(
+        conn, pagamentos[colunas].astype(object).where(pagamentos[colunas].notna(), None).itertuples(index=False, name=None))
+
+    resultado = {'alunos_novos': len(novos), 'alunos_existentes': len(alunos) - len(novos),
+                 'pagamentos': len(pagamentos), 'ignorados': ignorados}
+    conn.execute(SQL_CONSOLIDACOES)
+    conn.execute('''
+        INSERT INTO consolidacoes (arquivo, alunos_novos, alunos_existentes, pagamentos, ignorados, consolidado_em)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (caminho, *resultado.values(), datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    return resultado
+
+# Função para consolidar tudo em uma única transação; sem "executar" ela é desfeita no fim
+# Os bancos antigos consolidados ganham o sufixo .consolidado (nenhuma página grava mais neles)
+def consolidar(origens=ORIGENS, executar=False):
+    origens = [caminho for caminho in origens if os.path.exists(caminho)]
+    with banco.transacao(altera=('alunos', 'pagamentos')) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        unificados = unificar_cadastros(conn)
+        resultados = {caminho: consolidar_origem(conn, caminho) for caminho in origens}
+        if not executar:
+            conn.rollback()
+    if not executar:
+        return unificados, resultados
+
+    for caminho in origens:
+        origem = sqlite3.connect(caminho)
+        try:
+            origem.execute("PRAGMA journal_mode=DELETE")  # sem -wal pendente, o arquivo renomeado está completo
+        finally:
+            origem.close()
+        os.replace(caminho, caminho + SUFIXO_CONSOLIDADO)
+
+    # Matrículas unificadas mudam pagamentos já exportados e o índice da catraca
+    catraca.obter_indice().invalidar()
+    if unificados:
+        import analitico
+
+        analitico.obter_instantaneo().invalidar()
+    return unificados, resultados
+
+def visao_geral():
+    with banco.conexao() as conn:
+        usuarios, alunos, pagamentos, exercicios = conn.execute(SQL_VISAO_GERAL).fetchone()
+    return {'usuarios': usuarios, 'alunos': alunos, 'pagamentos': pagamentos, 'exercicios': exercicios}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import migracoes
+
+    parser = argparse.ArgumentParser(description="Consolida os bancos antigos em database.db")
+    parser.add_argument("--executar", action="store_true", help="grava a consolidação (sem isso, só o relatório)")
+    parser.add_argument("--sem-backup", action="store_true", help="não faz backup dos bancos antes de gravar")
+    args = parser.parse_args()
+
+    migracoes.garantir_esquema()
+    if args.executar and not args.sem_backup:
+        resultados_backup, _ = backup.fazer_backups()
+        print(f"Backup antes da consolidação: {[resultado['arquivo'] for resultado in resultados_backup.values()]}")
+
+    unificados, resultados = consolidar(executar=args.executar)
+    print(f"Cadastros repetidos em {banco.BANCO_PRINCIPAL} unificados pelo CPF: {len(unificados)}")
+    for matricula, manter in sorted(unificados.items()):
+        print(f"  matrícula {matricula} -> {manter}")
+    for caminho, resultado in resultados.items():
+        print(f"{caminho}: {resultado}")
+    print(visao_geral() if args.executar else "Nada foi gravado (use --executar).")
@@ -1,80 +1,111 @@
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import sqlite3
-import pandas as pd
-import streamlit as st
-import matplotlib.pyplot as plt
-
-# Função para calcular o status do próximo pagamento
-def calcular_status_pagamento(data_pagamento_str, plano):
-    if pd.isnull(data_pagamento_str):
-        return "Data inválida"
-
-    try:
-        data_pagamento = pd.to_datetime(data_pagamento_str, format='%Y-%m-%d')
-    except ValueError:
-        return "Data inválida"
-
-    periodicidade = {
-        'mensal': 1,
-        'trimestral': 3,
-        'semestral': 6,
-        'anual': 12
-    }
-
-    plano = plano.lower()
-    
-    if plano not in periodicidade:
-        return None
-
-    proximo_pagamento = data_pagamento + relativedelta(months=periodicidade[plano])
-    
-    return "Atrasado" if proximo_pagamento.date() < datetime.now().date() else "Em dia"
-
-def carregar_dados(conexao):
-    query = "SELECT nome, plano, data_pagamento FROM pagamentos"
-    return pd.read_sql_query(query, conexao)
-    
-
-def plotar_grafico_status(dados):
-    status_counts = dados['Status'].value_counts()
-    fig, ax = plt.subplots()
-    ax.bar(status_counts.index, status_counts.values, color=['red', 'green'])
-    ax.set_title('Status dos Pagamentos')
-    ax.set_xlabel('Status')
-    ax.set_ylabel('Quantidade')
-    st.pyplot(fig)
-
-def main():
-    
-    st.title("Painel de Pagamentos de Alunos")
-    st.write("Visualize o status das mensalidades dos alunos com base no plano e último pagamento registrado.")
-
-    # Conectar ao banco de dados
-    conn = sqlite3.connect('database.db')
-
-    try:
-        # Carregar dados
-        dados = carregar_dados(conn)
-
-        # Aplicar a função de status de pagamento
-        dados['Status'] = dados.apply(lambda row: calcular_status_pagamento(row['data_pagamento'], row['plano']), axis=1)
-
-        # Filtrar por status
-        filtro_status = st.selectbox("Filtrar por status", ["Todos", "Atrasado", "Em dia"])
-        if filtro_status != "Todos":
-            dados = dados[dados["Status"] == filtro_status]
-
-        # Exibir dados em tabela
-        st.dataframe(dados[['nome', 'plano', 'Status']])
-
-        # Plotar gráfico de status
-        plotar_grafico_status(dados)
-
-    except Exception as e:
-        st.error(f"Ocorreu um erro ao carregar os dados: {str(e)}")
-    finally:
-        conn.close()
-
-if __name__ == "__main__":
-    main()
+import io
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+from matplotlib.figure import Figure
+from dateutil.relativedelta import relativedelta
+
+import analitico
+import banco
+import migracoes
+import perfil
+import resumos
+import vencimentos
+
+# Situação de cada aluno pelo último pagamento, a partir do instantâneo analítico
+# Em memória até a próxima escrita em alunos ou pagamentos; "hoje" faz parte da chave do cache
+# Só entra no cache com o instantâneo atualizado até a revisão da chave
+@banco.leitura_em_cache('alunos', 'pagamentos')
+def _carregar_situacao(filtro_status, hoje):
+    instantaneo = analitico.obter_instantaneo().garantir_atualizado(exigir=True)
+    return analitico.consultar_situacao(filtro_status, hoje, (instantaneo.pagamentos, instantaneo.alunos))
+
+# Função para carregar a situação dos alunos; com outro processo ainda exportando o instantâneo, mostra o
+# que já está publicado sem guardar no cache (a próxima execução tenta de novo)
+def carregar_dados(filtro_status="Todos", hoje=None):
+    try:
+        return _carregar_situacao(filtro_status, hoje)
+    except analitico.InstantaneoDesatualizado:
+        instantaneo = analitico.obter_instantaneo()
+        return analitico.consultar_situacao(filtro_status, hoje, (instantaneo.pagamentos, instantaneo.alunos))
+
+carregar_dados.limpar = _carregar_situacao.limpar
+
+# Função para carregar os resumos de situação e de receita dos últimos 12 meses
+@banco.leitura_em_cache('pagamentos')
+def carregar_resumos(hoje):
+    with banco.conexao() as conn:
+        situacao = resumos.contar_situacao(conn, hoje)
+        receita = resumos.consultar_receita(conn, (hoje - relativedelta(months=11)).strftime('%Y-%m'))
+    return situacao, receita
+    
+
+# Função para montar a contagem de status a partir do resumo de vencimentos (sem ler os pagamentos)
+def contar_status(situacao, filtro_status="Todos"):
+    status_counts = pd.Series({"Atrasado": situacao['atrasados'].sum(), "Em dia": situacao['ativos'].sum()})
+    return status_counts if filtro_status == "Todos" else status_counts[[filtro_status]]
+
+# Função para desenhar o gráfico de status como PNG, em cache pela impressão digital das contagens
+# Usa Figure diretamente (sem pyplot): a figura não fica registrada e é liberada ao sair da função
+@st.cache_data(max_entries=64, show_spinner=False)
+def desenhar_grafico_status(impressao_digital):
+    status, quantidades = zip(*impressao_digital) if impressao_digital else ((), ())
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(status, quantidades, color=['red' if s == 'Atrasado' else 'green' for s in status])
+    ax.set_title('Status dos Pagamentos')
+    ax.set_xlabel('Status')
+    ax.set_ylabel('Quantidade')
+    imagem = io.BytesIO()
+    fig.savefig(imagem, format='png')
+    return imagem.getvalue()
+
+# Exibe o gráfico de status; o modo nativo do Streamlit dispensa o matplotlib
+def plotar_grafico_status(status_counts, nativo=False):
+    if nativo:
+        st.bar_chart(status_counts.rename("Quantidade"))
+    else:
+        impressao_digital = tuple((str(s), int(q)) for s, q in status_counts.items())
+        st.image(desenhar_grafico_status(impressao_digital))
+
+def render():
+    
+    st.title("Painel de Pagamentos de Alunos")
+    st.write("Visualize o status das mensalidades dos alunos com base no plano e último pagamento registrado.")
+
+    try:
+        migracoes.garantir_esquema()
+        vencimentos.executar_recalculo_periodico()
+
+        # Filtrar por status direto na consulta
+        filtro_status = st.selectbox("Filtrar por status", ["Todos", "Atrasado", "Em dia"])
+
+        # Carregar dados
+        hoje = date.today()
+        dados = carregar_dados(filtro_status, hoje)
+        situacao, receita = carregar_resumos(hoje)
+
+        # Exibir dados em tabela
+        perfil.exibir_dataframe(dados[['nome', 'plano', 'Status']])
+
+        # Plotar gráfico de status (só redesenha quando as contagens ou o filtro mudam)
+        grafico_nativo = st.checkbox("Gráfico simplificado (mais rápido)", key="grafico_nativo")
+        with perfil.secao('grafico'):
+            plotar_grafico_status(contar_status(situacao, filtro_status), grafico_nativo)
+
+        # Receita dos últimos 12 meses por unidade, lida do resumo mantido pelos gatilhos
+        st.subheader("Receita por mês")
+        if not receita.empty:
+            with perfil.secao('dataframe'):
+                receita_mensal = receita.pivot_table(index='mes', columns='unidade', values='total', aggfunc='sum')
+            with perfil.secao('grafico'):
+                st.bar_chart(receita_mensal)
+        else:
+            st.write("Nenhum pagamento nos últimos 12 meses.")
+
+    except Exception as e:
+        st.error(f"Ocorreu um erro ao carregar os dados: {str(e)}")
+
+if __name__ == "__main__":
+    render()
@@ -0,0 +1,226 @@
+# Caminho único de escrita do app: as gravações de todas as sessões entram numa fila e uma única thread por
+# arquivo de banco executa todas, juntando as que estão pendentes numa só transação (group commit: um commit
+# para o lote inteiro em vez de um por sessão, sem sessões disputando o lock de escrita do SQLite).
+# Cada operação roda num SAVEPOINT próprio: o erro de uma (CPF repetido, por exemplo) desfaz só ela e volta
+# para quem pediu, as outras do lote seguem. Banco ocupado por outro processo além do busy_timeout desfaz o
+# lote inteiro, que é tentado de novo com espera crescente.
+# A fila é limitada: quando está cheia quem grava espera até TIMEOUT_FILA_S e recebe EscritaRecusada.
+# Uma operação é uma função (conn, *args) que não faz commit; o valor que ela devolve volta para quem pediu.
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as TempoEsgotado
+
+import streamlit as st
+
+import banco
+
+TAMANHO_FILA = int(os.environ.get("GDE_FILA_ESCRITA", 1000))
+TAMANHO_LOTE = 100
+TIMEOUT_FILA_S = 2  # espera máxima de quem grava quando a fila está cheia
+TIMEOUT_RESULTADO_S = 60
+TENTATIVAS_GRAVACAO = 5
+TIMEOUT_ENCERRAMENTO_S = 10
+
+log = logging.getLogger("gde.escrita")
+
+
+# Gravação recusada antes de entrar na fila (fila cheia ou gravador encerrado): nada foi gravado e pode ser
+# tentada de novo. É um sqlite3.OperationalError, tratado como os demais erros de banco por quem já trata sqlite3.Error
+class EscritaRecusada(sqlite3.OperationalError):
+    pass
+
+# Gravação que entrou na fila e ficou sem resposta no prazo: o resultado é desconhecido (ainda pode ser
+# gravada), e repeti-la pode gravar duas vezes
+class EscritaSemResposta(sqlite3.OperationalError):
+    pass
+
+
+def _ocupado(erro):
+    mensagem = str(erro).lower()
+    return isinstance(erro, sqlite3.OperationalError) and ("locked" in mensagem or "busy" in mensagem)
+
+
+class GravadorUnico:
+    def __init__(self, caminho=banco.BANCO_PRINCIPAL, tamanho_fila=TAMANHO_FILA, tamanho_lote=TAMANHO_LOTE):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+        self._estatisticas = Counter()
+        # A thread não tem ScriptRunContext: o monitor do arquivo é obtido aqui
+        self._monitor = banco.obter_monitor(caminho)
+        self._conn = None
+        # PRAGMA data_version da conexão do gravador no último commit conferido; no primeiro não há com o que
+        # comparar e o que veio de fora antes dele conta como gravação externa
+        self._versao_dados = None
+        self._thread = threading.Thread(target=self._executar, name=f"gravador-{caminho}", daemon=True)
+        self._thread.start()
+
+    def _contar(self, chave, quantidade=1):
+        with self._trava:
+            self._estatisticas[chave] += quantidade
+
+    # Função para enfileirar uma operação; devolve um Future com o valor devolvido por funcao(conn, *args)
+    # "altera" lista as tabelas gravadas, como em banco.transacao, para invalidar as leituras em cache
+    def enviar(self, funcao, *args, altera=()):
+        if self._parar.is_set():
+            raise EscritaRecusada(f"Gravador de {self.caminho} encerrado")
+        futuro = Future()
+        try:
+            self._fila.put((funcao, args, tuple(altera), futuro), timeout=TIMEOUT_FILA_S)
+        except queue.Full:
+            self._contar('recusadas')
+            raise EscritaRecusada(f"Fila de gravação de {self.caminho} cheia; tente novamente") from None
+        self._contar('enfileiradas')
+        return futuro
+
+    # Função para gravar e esperar o resultado (o erro da operação é levantado aqui, na sessão que pediu)
+    def executar(self, funcao, *args, altera=(), timeout=TIMEOUT_RESULTADO_S):
+        futuro = self.enviar(funcao, *args, altera=altera)
+        try:
+            return futuro.result(timeout)
+        except TempoEsgotado:
+            raise EscritaSemResposta(f"Sem resposta do gravador de {self.caminho} em {timeout}s; "
+                                     "a gravação ainda pode ser concluída") from None
+
+    # Espera a primeira operação e junta as que chegaram enquanto o lote anterior era gravado
+    def _proximo_lote(self):
+        try:
+            lote = [self._fila.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _conexao(self):
+        if self._conn is None:
+            # Sem os bancos anexados: a transação trava a escrita só deste arquivo (os outros têm o seu gravador)
+            self._conn = banco.abrir_conexao(self.caminho, anexar=False)
+        return self._conn
+
+    # Só muda com commits de outras conexões (outro worker, sqlite3 na linha de comando), nunca com os deste gravador
+    def _ler_versao_dados(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # Executa o lote numa transação; devolve [(ok, valor ou erro)] de cada operação, na ordem do lote
+    def _transacao(self, lote):
+        conn = self._conexao()
+        conn.execute("BEGIN IMMEDIATE")
+        resultados = []
+        try:
+            for funcao, args, _, _ in lote:
+                conn.execute("SAVEPOINT operacao")
+                try:
+                    valor = funcao(conn, *args)
+                except Exception as e:
+                    if _ocupado(e):
+                        raise
+                    conn.execute("ROLLBACK TO operacao")
+                    conn.execute("RELEASE operacao")
+                    resultados.append((False, e))
+                else:
+                    conn.execute("RELEASE operacao")
+                    resultados.append((True, valor))
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        return resultados
+
+    # Grava o lote e entrega o resultado de cada operação; banco ocupado repete o lote inteiro
+    def _gravar(self, lote):
+        lote = [operacao for operacao in lote if operacao[3].set_running_or_notify_cancel()]
+        if not lote:
+            return
+        for tentativa in range(1, TENTATIVAS_GRAVACAO + 1):
+            try:
+                resultados = self._transacao(lote)
+                break
+            except sqlite3.OperationalError as e:
+                if not _ocupado(e) or tentativa == TENTATIVAS_GRAVACAO:
+                    raise
+                self._contar('repeticoes')
+                log.warning("Banco ocupado ao gravar %d operações (tentativa %d): %s", len(lote), tentativa, e)
+                time.sleep(0.05 * 2 ** tentativa)
+
+        alteradas = {tabela for (ok, _), (_, _, altera, _) in zip(resultados, lote) if ok for tabela in altera}
+        if alteradas:
+            # O monitor é lido antes da conexão do gravador: uma gravação de fora entre as duas leituras
+            # fica para o monitor perceber sozinho, e uma anterior aparece na conexão do gravador
+            self._monitor.sincronizar()
+            versao = self._ler_versao_dados()
+            if self._versao_dados is None or versao != self._versao_dados:
+                self._monitor.registrar_externa()
+            self._versao_dados = versao
+            banco.registrar_escrita(self.caminho, *alteradas)
+        with self._trava:
+            self._estatisticas['lotes'] += 1
+            self._estatisticas['maior_lote'] = max(self._estatisticas['maior_lote'], len(lote))
+        for (ok, valor), (_, _, _, futuro) in zip(resultados, lote):
+            if ok:
+                self._contar('gravadas')
+                futuro.set_result(valor)
+            else:
+                self._contar('com_erro')
+                futuro.set_exception(valor)
+
+    def _executar(self):
+        while not (self._parar.is_set() and self._fila.empty()):
+            lote = self._proximo_lote()
+            if not lote:
+                continue
+            try:
+                self._gravar(lote)
+            except Exception as e:
+                log.exception("Erro ao gravar %d operações em %s", len(lote), self.caminho)
+                for _, _, _, futuro in lote:
+                    if not futuro.done():
+                        self._contar('com_erro')
+                        futuro.set_exception(e)
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+        if self._conn is not None:
+            self._conn.close()
+
+    # Função para esperar até que tudo o que já foi enfileirado esteja gravado
+    def descarregar(self):
+        self._fila.join()
+
+    # Recusa novas gravações, grava o que restou na fila e para a thread
+    def encerrar(self, timeout=TIMEOUT_ENCERRAMENTO_S):
+        self._parar.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.error("Gravador de %s encerrado com %d operações na fila", self.caminho, self._fila.qsize())
+
+    def estatisticas(self):
+        with self._trava:
+            estatisticas = dict(self._estatisticas)
+        estatisticas['na_fila'] = self._fila.qsize()
+        return estatisticas
+
+
+# Um gravador por arquivo de banco e por processo, compartilhado por todas as sessões
+# Grava o que restou na fila quando o processo termina
+@st.cache_resource
+def obter_gravador(caminho=banco.BANCO_PRINCIPAL):
+    gravador = GravadorUnico(caminho)
+    atexit.register(gravador.encerrar)
+    return gravador
+
+# Função para gravar pelo gravador do banco e esperar o resultado
+def executar(funcao, *args, caminho=banco.BANCO_PRINCIPAL, altera=(), timeout=TIMEOUT_RESULTADO_S):
+    return obter_gravador(caminho).executar(funcao, *args, altera=altera, timeout=timeout)
@@ -0,0 +1,316 @@
+# Fichas de treino: cada aluno tem fichas (Treino A, Treino B...) com os exercícios em ordem, séries,
+# repetições, carga e descanso. Os itens ficam numa tabela WITHOUT ROWID chaveada por (ficha, ordem):
+# os exercícios de uma ficha ficam juntos no disco e as fichas do aluno saem de uma consulta pelo índice
+# de matrícula. O exercício é gravado pelo id do catálogo (treino_academia.db, anexado como "treinos"),
+# que fica inteiro em memória, separado por categoria.
+# Fichas substituídas não são apagadas: ficam arquivadas como histórico do aluno.
+import html
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import streamlit as st
+
+import banco
+import escrita
+
+INTERVALO_VERIFICACAO_S = 5  # atraso máximo para o catálogo perceber gravações de fora do app
+ALUNOS_POR_ARQUIVO = 200  # impressão em lote: um HTML por grupo de alunos, cada grupo lido numa consulta
+
+# Colunas de cada item, na ordem de salvar_ficha e dos itens devolvidos pelas consultas
+COLUNAS_ITENS = ('exercicio', 'series', 'repeticoes', 'carga_kg', 'descanso_s')
+
+# treino_academia.db: o catálogo que já existia, criado aqui quando o arquivo ainda não tem a tabela
+SQL_EXERCICIOS = '''
+    CREATE TABLE IF NOT EXISTS exercicios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        categoria TEXT NOT NULL
+    )
+'''
+
+SQL_FICHAS = '''
+    CREATE TABLE IF NOT EXISTS fichas_treino (
+        codigo INTEGER PRIMARY KEY AUTOINCREMENT,
+        matricula INTEGER NOT NULL REFERENCES alunos (matricula),
+        nome TEXT NOT NULL,
+        observacao TEXT,
+        criada_em TEXT NOT NULL,
+        atualizada_em TEXT NOT NULL,
+        arquivada INTEGER NOT NULL DEFAULT 0
+    )
+'''
+# Carga em gramas, como o valor dos pagamentos em centavos; repetições em texto ("12", "8-10", "30s")
+SQL_ITENS = '''
+    CREATE TABLE IF NOT EXISTS itens_ficha (
+        ficha INTEGER NOT NULL REFERENCES fichas_treino (codigo),
+        ordem INTEGER NOT NULL,
+        exercicio INTEGER NOT NULL,
+        series INTEGER,
+        repeticoes TEXT,
+        carga_gramas INTEGER,
+        descanso_s INTEGER,
+        PRIMARY KEY (ficha, ordem)
+    ) WITHOUT ROWID
+'''
+SQL_INDICES = (
+    "CREATE INDEX IF NOT EXISTS idx_fichas_treino_matricula ON fichas_treino (matricula, arquivada, codigo)",
+)
+
+# Fichas com os itens em ordem, numa única consulta; o filtro de quais alunos entra no WHERE
+SQL_CONSULTAR = '''
+    SELECT f.matricula, f.codigo, f.nome, f.observacao, f.atualizada_em,
+           i.exercicio, i.series, i.repeticoes, i.carga_gramas / 1000.0, i.descanso_s
+    FROM fichas_treino f
+    LEFT JOIN itens_ficha i ON i.ficha = f.codigo
+    WHERE {filtro} AND f.arquivada = ?
+    ORDER BY f.matricula, f.codigo, i.ordem
+'''
+
+# Migração do banco principal: tabelas das fichas e índice por aluno
+def criar_estrutura(conn):
+    conn.execute(SQL_FICHAS)
+    conn.execute(SQL_ITENS)
+    for sql in SQL_INDICES:
+        conn.execute(sql)
+
+# Migração de treino_academia.db
+def criar_catalogo(conn):
+    conn.execute(SQL_EXERCICIOS)
+
+
+# Catálogo de exercícios em memória: id -> (nome, categoria) e categoria -> [(nome, id)] em ordem alfabética.
+# Carregado por uma única consulta no primeiro uso e mantido por adicionar_exercicio; gravações de fora do
+# app (percebidas pelo monitor de treino_academia.db, no máximo a cada INTERVALO_VERIFICACAO_S) recarregam
+class CatalogoExercicios:
+    def __init__(self, caminho=banco.BANCO_TREINOS):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self._monitor = banco.obter_monitor(caminho)
+        self._por_id = {}
+        self._por_categoria = {}
+        self._carregado = False
+        self._geracao = None
+        self._verificado_em = 0.0
+
+    def _carregar(self):
+        with banco.conexao(self.caminho) as conn:
+            geracao = self._monitor.verificar()
+            linhas = conn.execute("SELECT id, nome, categoria FROM exercicios").fetchall()
+        por_id, por_categoria = {}, defaultdict(list)
+        for id_exercicio, nome, categoria in linhas:
+            categoria = sys.intern(categoria)
+            por_id[id_exercicio] = (nome, categoria)
+            por_categoria[categoria].append((nome, id_exercicio))
+        for exercicios in por_categoria.values():
+            exercicios.sort(key=lambda exercicio: exercicio[0].casefold())
+        self._por_id, self._por_categoria = por_id, dict(por_categoria)
+        self._geracao, self._carregado = geracao, True
+        self._verificado_em = time.monotonic()
+
+    def _garantir_atualizado(self):
+        if not self._carregado:
+            self._carregar()
+        elif time.monotonic() - self._verificado_em > INTERVALO_VERIFICACAO_S:
+            self._verificado_em = time.monotonic()
+            if self._monitor.verificar() != self._geracao:
+                self._carregar()
+
+    def categorias(self):
+        with self._trava:
+            self._garantir_atualizado()
+            return sorted(self._por_categoria, key=str.casefold)
+
+    # Exercícios de uma categoria (ou de todas), como [(nome, id)] em ordem alfabética
+    def exercicios(self, categoria=None):
+        with self._trava:
+            self._garantir_atualizado()
+            if categoria is not None:
+                return list(self._por_categoria.get(categoria, ()))
+            return sorted(((nome, id_exercicio) for id_exercicio, (nome, _) in self._por_id.items()),
+                          key=lambda exercicio: exercicio[0].casefold())
+
+    # (nome, categoria) do exercício; None quando saiu do catálogo
+    def obter(self, id_exercicio):
+        with self._trava:
+            self._garantir_atualizado()
+            return self._por_id.get(id_exercicio)
+
+    # Chamado depois do commit de um exercício novo (catálogo ainda não carregado: nada a fazer)
+    def registrar(self, id_exercicio, nome, categoria):
+        with self._trava:
+            if not self._carregado:
+                return
+            categoria = sys.intern(categoria)
+            self._por_id[id_exercicio] = (nome, categoria)
+            exercicios = self._por_categoria.setdefault(categoria, [])
+            exercicios.append((nome, id_exercicio))
+            exercicios.sort(key=lambda exercicio: exercicio[0].casefold())
+
+    def invalidar(self):
+        with self._trava:
+            self._carregado = False
+
+    def tamanho(self):
+        with self._trava:
+            self._garantir_atualizado()
+            return {'exercicios': len(self._por_id), 'categorias': len(self._por_categoria)}
+
+
+# Um catálogo por processo, compartilhado por todas as sessões
+@st.cache_resource
+def obter_catalogo(caminho=banco.BANCO_TREINOS):
+    return CatalogoExercicios(caminho)
+
+def _inserir_exercicio(conn, nome, categoria):
+    return conn.execute("INSERT INTO exercicios (nome, categoria) VALUES (?, ?)", (nome, categoria)).lastrowid
+
+# Função para cadastrar um exercício no catálogo; devolve o id
+# Gravado pelo gravador de treino_academia.db, sem travar a escrita do banco principal
+def adicionar_exercicio(nome, categoria):
+    nome, categoria = nome.strip(), categoria.strip()
+    id_exercicio = escrita.executar(_inserir_exercicio, nome, categoria, caminho=banco.BANCO_TREINOS,
+                                    altera=('exercicios',))
+    obter_catalogo().registrar(id_exercicio, nome, categoria)
+    return id_exercicio
+
+
+# Agrupa as linhas da consulta: {matrícula: [ficha]}, cada ficha com os itens na ordem de COLUNAS_ITENS
+def _agrupar(linhas):
+    fichas = defaultdict(list)
+    atual = None
+    for matricula, codigo, nome, observacao, atualizada_em, *item in linhas:
+        if atual is None or atual['codigo'] != codigo:
+            atual = {'codigo': codigo, 'nome': nome, 'observacao': observacao, 'atualizada_em': atualizada_em,
+                     'itens': []}
+            fichas[matricula].append(atual)
+        if item[0] is not None:
+            atual['itens'].append(tuple(item))
+    return dict(fichas)
+
+# Função para consultar as fichas de um aluno (ativas ou o histórico de arquivadas)
+@banco.leitura_em_cache('fichas_treino', 'itens_ficha')
+def consultar_fichas(matricula, arquivadas=False):
+    with banco.conexao() as conn:
+        linhas = conn.execute(SQL_CONSULTAR.format(filtro="f.matricula = ?"),
+                              (matricula, int(arquivadas))).fetchall()
+    return _agrupar(linhas).get(matricula, [])
+
+# As matrículas vão num único parâmetro JSON: a consulta não muda com o tamanho da lista
+def _lista_json(matriculas):
+    return f"[{','.join(str(int(matricula)) for matricula in matriculas)}]"
+
+# Função para consultar as fichas ativas de vários alunos de uma vez (impressão em lote)
+def consultar_fichas_varios(matriculas):
+    with banco.conexao() as conn:
+        linhas = conn.execute(SQL_CONSULTAR.format(filtro="f.matricula IN (SELECT value FROM json_each(?))"),
+                              (_lista_json(matriculas), 0)).fetchall()
+    return _agrupar(linhas)
+
+# Função para listar [(matrícula, nome)] dos alunos com ficha ativa, em ordem de nome
+# Filtra pela unidade e/ou por uma lista de matrículas (None: sem filtro)
+def alunos_com_ficha(unidade=None, matriculas=None):
+    if matriculas is not None:
+        matriculas = _lista_json(matriculas)
+    with banco.conexao() as conn:
+        return conn.execute('''
+            SELECT a.matricula, a.nome
+            FROM alunos a
+            WHERE EXISTS (SELECT 1 FROM fichas_treino f WHERE f.matricula = a.matricula AND f.arquivada = 0)
+              AND (:unidade IS NULL OR a.unidade = :unidade)
+              AND (:matriculas IS NULL OR a.matricula IN (SELECT value FROM json_each(:matriculas)))
+            ORDER BY a.nome, a.matricula
+        ''', {'unidade': unidade, 'matriculas': matriculas}).fetchall()
+
+def _parametros_itens(codigo, itens):
+    for ordem, (exercicio, series, repeticoes, carga_kg, descanso_s) in enumerate(itens, start=1):
+        yield (codigo, ordem, int(exercicio), series, repeticoes,
+               None if carga_kg is None else round(carga_kg * 1000), descanso_s)
+
+# Operação do gravador: grava a ficha e os itens; os itens de uma ficha editada são regravados inteiros
+# (a ordem é a chave e muda a cada edição). Ficha editada que não é do aluno ou já foi arquivada (por outra
+# sessão, por exemplo) é recusada antes de tocar nos itens
+def _gravar_ficha(conn, matricula, nome, itens, codigo, observacao, agora):
+    if codigo is None:
+        codigo = conn.execute('''
+            INSERT INTO fichas_treino (matricula, nome, observacao, criada_em, atualizada_em)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (matricula, nome, observacao, agora, agora)).lastrowid
+    else:
+        alteradas = conn.execute('''
+            UPDATE fichas_treino SET nome = ?, observacao = ?, atualizada_em = ?
+            WHERE codigo = ? AND matricula = ? AND arquivada = 0
+        ''', (nome, observacao, agora, codigo, matricula)).rowcount
+        if alteradas == 0:
+            raise ValueError(f"Ficha {codigo} não encontrada entre as fichas ativas da matrícula {matricula}")
+        conn.execute("DELETE FROM itens_ficha WHERE ficha = ?", (codigo,))
+    conn.executemany('''
+        INSERT INTO itens_ficha (ficha, ordem, exercicio, series, repeticoes, carga_gramas, descanso_s)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', _parametros_itens(codigo, itens))
+    return codigo
+
+# Função para gravar uma ficha (nova ou editada) com os itens na ordem recebida; devolve o código
+def salvar_ficha(matricula, nome, itens, codigo=None, observacao=None):
+    return escrita.executar(_gravar_ficha, matricula, nome, list(itens), codigo, observacao,
+                            datetime.now().strftime('%Y-%m-%d %H:%M:%S'), altera=('fichas_treino', 'itens_ficha'))
+
+def _arquivar_ficha(conn, codigo, agora):
+    conn.execute("UPDATE fichas_treino SET arquivada = 1, atualizada_em = ? WHERE codigo = ?", (agora, codigo))
+
+# Função para arquivar uma ficha (sai das fichas ativas e fica no histórico do aluno)
+def arquivar_ficha(codigo):
+    escrita.executar(_arquivar_ficha, codigo, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), altera=('fichas_treino',))
+
+
+ESTILO_IMPRESSAO = '''
+    body { font-family: Arial, sans-serif; font-size: 12px; }
+    .aluno { page-break-after: always; }
+    .aluno:last-child { page-break-after: auto; }
+    table { border-collapse: collapse; width: 100%; margin-bottom: 16px; }
+    th, td { border: 1px solid #999; padding: 4px 6px; text-align: left; }
+    th { background: #eee; }
+'''
+
+def _numero(valor, sufixo=""):
+    if valor is None:
+        return ""
+    return f"{valor:g}{sufixo}"
+
+# Função para montar um HTML com as fichas de vários alunos, um aluno por página na impressão
+# alunos: [(matrícula, nome)] na ordem de impressão; fichas: resultado de consultar_fichas_varios
+def montar_impressao(alunos, fichas, catalogo):
+    partes = [f"<html><head><meta charset='utf-8'><style>{ESTILO_IMPRESSAO}</style></head><body>"]
+    for matricula, nome in alunos:
+        if matricula not in fichas:
+            continue
+        partes.append(f"<div class='aluno'><h2>{html.escape(str(nome))} (matrícula {matricula})</h2>")
+        for ficha in fichas[matricula]:
+            partes.append(f"<h3>{html.escape(ficha['nome'])}</h3>")
+            if ficha['observacao']:
+                partes.append(f"<p>{html.escape(ficha['observacao'])}</p>")
+            partes.append("<table><tr><th>#</th><th>Exercício</th><th>Categoria</th><th>Séries</th>"
+                          "<th>Repetições</th><th>Carga</th><th>Descanso</th></tr>")
+            for ordem, (exercicio, series, repeticoes, carga_kg, descanso_s) in enumerate(ficha['itens'], start=1):
+                exercicio_nome, categoria = catalogo.obter(exercicio) or (f"Exercício {exercicio}", "")
+                partes.append(
+                    f"<tr><td>{ordem}</td><td>{html.escape(exercicio_nome)}</td><td>{html.escape(categoria)}</td>"
+                    f"<td>{_numero(series)}</td><td>{html.escape(repeticoes or '')}</td>"
+                    f"<td>{_numero(carga_kg, ' kg')}</td><td>{_numero(descanso_s, 's')}</td></tr>"
+                )
+            partes.append("</table>")
+        atualizada_em = max(ficha['atualizada_em'] for ficha in fichas[matricula])
+        partes.append(f"<p>Atualizada em {atualizada_em[:10]}</p></div>")
+    partes.append("</body></html>")
+    return "".join(partes)
+
+# Função para gerar os arquivos da impressão em lote: [(nome do arquivo, HTML)], ALUNOS_POR_ARQUIVO alunos em cada
+def gerar_impressao(alunos, catalogo, por_arquivo=ALUNOS_POR_ARQUIVO):
+    arquivos = []
+    for inicio in range(0, len(alunos), por_arquivo):
+        grupo = alunos[inicio:inicio + por_arquivo]
+        fichas = consultar_fichas_varios([matricula for matricula, _ in grupo])
+        arquivos.append((f"fichas_treino_{inicio // por_arquivo + 1:03d}.html", montar_impressao(grupo, fichas, catalogo)))
+    return arquivos
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import catraca
+import migracoes
+import perfil
+
+COLUNAS_ENTRADAS = ["Horário", "Matrícula", "Nome", "Unidade", "Dispositivo", "Liberada"]
+
+def render():
+    st.title("\U0001F6AA Gestão de Entrada")
+
+    migracoes.garantir_esquema()
+    gravador = catraca.obter_gravador()
+
+    # Registro da passagem: a decisão sai do índice em memória e a gravação fica com o gravador em segundo plano
+    with st.form("registrar_entrada", clear_on_submit=True):
+        identificacao = st.text_input("Matrícula ou CPF")
+        registrar = st.form_submit_button("✅ Registrar entrada")
+
+    if registrar and identificacao:
+        dispositivo = f"recepcao:{st.session_state.get('user') or 'anonimo'}"
+        aluno, liberada, enfileirada = catraca.registrar_entrada(identificacao, dispositivo)
+        if aluno is None:
+            st.error("Aluno não encontrado.")
+        elif not enfileirada:
+            st.error("Muitas entradas aguardando gravação; tente novamente em instantes.")
+        elif liberada:
+            st.success(f"Entrada liberada: {aluno[1]} (vencimento {aluno[3]})")
+        else:
+            st.error(f"Entrada bloqueada: {aluno[1]} (mensalidade vencida em {aluno[3] or 'sem pagamento'})")
+
+    # Entradas do dia (as que ainda estão na fila aparecem assim que o lote for gravado)
+    dia = st.date_input("Dia", value=date.today(), key="dia_entradas")
+    (total, liberadas), ultimas = catraca.consultar_entradas(dia)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Entradas", total)
+    col2.metric("Liberadas", liberadas)
+    col3.metric("Bloqueadas", total - liberadas)
+
+    if ultimas:
+        with perfil.secao('dataframe'):
+            df_entradas = pd.DataFrame(ultimas, columns=COLUNAS_ENTRADAS)
+            df_entradas["Liberada"] = df_entradas["Liberada"].astype(bool)
+        perfil.exibir_dataframe(df_entradas, hide_index=True)
+    else:
+        st.write("Nenhuma entrada registrada neste dia.")
+
+    if st.session_state.get('selected_table') == "USER_ADMIN":
+        with st.expander("Fila de gravação e índice de acesso"):
+            st.json(gravador.estatisticas())
+            memoria = catraca.obter_indice().tamanho_memoria()
+            st.write(f"Índice de acesso: {memoria['alunos']} alunos, {memoria['cpfs']} CPFs, "
+                     f"{memoria['bytes'] / 1024 / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    render()
@@ -1,114 +1,132 @@
-import datetime 
-import sqlite3
-import streamlit as st
-from streamlit_option_menu import option_menu
-from datetime import datetime, timedelta
-
-
-st.set_page_config(page_title="GDE ACESSO_PROD_V1.2")
-
-# Função para verificar login no banco de dados
-def login(username, password, selected_table):
-    conn = sqlite3.connect('novo.db')
-    cursor = conn.cursor()
-
-    if selected_table == "USER_N1":
-        cursor.execute('SELECT * FROM usuarios WHERE user=? AND senha=?', (username, password))
-    elif selected_table == "USER_ADMIN":
-        cursor.execute('SELECT * FROM admin WHERE user=? AND senha=?', (username, password))
-
-    user = cursor.fetchone()
-    conn.close()
-    return user
-
-# Função para atualizar o status no banco de dados
-def atualizar_status(selected_id, novo_status):
-    conn = sqlite3.connect('novo.db')
-    cursor = conn.cursor()
-    update_query = "UPDATE entrada SET Status = ? WHERE ID = ?"
-    cursor.execute(update_query, (novo_status, selected_id))
-    conn.commit()
-    conn.close()
-
-# Página de login
-def login_page():
-    st.title('Login Acesso')
-    username = st.text_input('Usuário')
-    password = st.text_input('Senha', type='password')
-    
-    selected_table = st.selectbox("USER_LEVEL:", ["USER_N1", "USER_ADMIN"])
-
-    if st.button('Login'):
-        user = login(username, password, selected_table)
-        if user is not None:
-            st.success('Login realizado com sucesso!')
-            
-            # Armazena informações de login na sessão
-            st.session_state.logged_in = True
-            st.session_state.user = username
-            st.session_state.selected_table = selected_table  # Define o nível do usuário na sessão
-
-        else:
-            st.error('Usuário ou senha incorretos.')
-
-# Função para exibir o menu e funcionalidades após o login
-def show_menu():
-    with st.sidebar:
-        if st.session_state.selected_table == "USER_ADMIN":
-            selected = option_menu(
-                "Menu Administrador", 
-                ["Entrada","Cadastro Aluno", "Gestão de Entrada", "Montar Treino", "Extrair Relatório", "Usuários", "Banco de Dados", "Usuario Administrador", "Logout"], 
-                icons=['box-arrow-in-right', 'box-arrow-in-right', 'clipboard-data', 'x-circle', 'file-earmark-arrow-down', 'person', 'database', 'shield-lock', 'box-arrow-right'], 
-                menu_icon="cast", 
-                default_index=0
-            )
-        else:
-            selected = option_menu(
-                "Menu", 
-                ["Entrada", "Cadastro Aluno", "Gestão de Entrada", "Montar Treino", "Extrair Relatório", "Logout"], 
-                icons=['box-arrow-in-right', 'clipboard-data', 'x-circle', 'file-earmark-arrow-down', 'box-arrow-right'], 
-                menu_icon="cast", 
-                default_index=0
-            )
-
-    if selected == "Entrada":
-        exec(open("entrada.py",encoding='utf-8').read(), globals())
-    elif selected == "Cadastro Aluno":
-        exec(open("alunos.py",encoding='utf-8').read())    
-    elif selected == "Montar Treino":
-        exec(open("treino.py", encoding='utf-8').read(), globals())
-    elif selected == "Gestão de Entrada":
-        exec(open("gestao_entrada.py").read())    
-    elif selected == "Extrair Relatório":
-        exec(open("relatorio.py").read())
-    elif selected == "Usuários":
-        exec(open("user.py", encoding='utf-8').read(), globals())
-    elif selected == "Banco de Dados":
-        exec(open("editar_excluir.py").read())
-    elif selected == "Usuario Administrador":
-        exec(open("useradmin.py").read())
-    elif selected == "Logout":
-        logout()
-
-# Função para fazer logout
-def logout():
-    st.session_state.logged_in = False
-    st.session_state.user = None
-    st.session_state.selected_table = None  # Remove o nível do usuário da sessão
-    st.experimental_rerun()  # Recarrega a página para mostrar a tela de login
-
-# Verifica se o usuário está logado antes de exibir o conteúdo
-if 'logged_in' not in st.session_state or not st.session_state.logged_in:
-    login_page()
-else:
-    show_menu()
-
-
-
-def carregar_css(caminho_css):
-    with open(caminho_css) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-
-# Chame a função com o caminho do arquivo CSS
-carregar_css("style.css")
-
+import datetime 
+import os
+import streamlit as st
+from streamlit_option_menu import option_menu
+from datetime import datetime, timedelta
+
+import autenticacao
+import banco
+import escrita
+import migracoes
+import paginas
+import perfil
+
+
+st.set_page_config(page_title="GDE ACESSO_PROD_V1.2")
+
+# Aplica as migrações pendentes e importa as páginas uma única vez por processo
+migracoes.garantir_esquema()
+paginas.carregar_paginas()
+
+# Função para verificar login (senha conferida pelo hash bcrypt em novo.db)
+def login(username, password, selected_table):
+    return autenticacao.autenticar(username, password, selected_table)
+
+def _gravar_status(conn, selected_id, novo_status):
+    update_query = "UPDATE entrada SET Status = ? WHERE ID = ?"
+    conn.execute(update_query, (novo_status, selected_id))
+
+# Função para atualizar o status no banco de dados
+def atualizar_status(selected_id, novo_status):
+    escrita.executar(_gravar_status, selected_id, novo_status, caminho=banco.BANCO_USUARIOS)
+
+# Página de login
+def login_page():
+    st.title('Login Acesso')
+    username = st.text_input('Usuário')
+    password = st.text_input('Senha', type='password')
+    
+    selected_table = st.selectbox("USER_LEVEL:", ["USER_N1", "USER_ADMIN"])
+
+    if st.button('Login'):
+        identidade = login(username, password, selected_table)
+        if identidade is not None:
+            st.success('Login realizado com sucesso!')
+            
+            # Armazena a identidade verificada na sessão: as próximas execuções não consultam novo.db
+            st.session_state.identidade = identidade
+            st.session_state.logged_in = True
+            st.session_state.user = username
+            st.session_state.selected_table = selected_table  # Define o nível do usuário na sessão
+
+        else:
+            st.error('Usuário ou senha incorretos.')
+
+# Entradas do menu de cada nível de usuário e seus ícones
+MENU_ADMIN = ["Entrada", "Cadastro Aluno", "Gestão de Entrada", "Pagamentos", "Montar Treino", "Extrair Relatório", "Usuários", "Banco de Dados", "Usuario Administrador"]
+MENU_PADRAO = ["Entrada", "Cadastro Aluno", "Gestão de Entrada", "Pagamentos", "Montar Treino", "Extrair Relatório"]
+ICONES = {
+    "Entrada": 'box-arrow-in-right',
+    "Cadastro Aluno": 'box-arrow-in-right',
+    "Gestão de Entrada": 'clipboard-data',
+    "Pagamentos": 'cash-coin',
+    "Montar Treino": 'clipboard-check',
+    "Extrair Relatório": 'file-earmark-arrow-down',
+    "Usuários": 'person',
+    "Banco de Dados": 'database',
+    "Usuario Administrador": 'shield-lock',
+    "Logout": 'box-arrow-right',
+}
+
+# Função para exibir o menu e funcionalidades após o login
+def show_menu():
+    administrador = st.session_state.selected_table == "USER_ADMIN"
+    opcoes = paginas.paginas_disponiveis(MENU_ADMIN if administrador else MENU_PADRAO) + ["Logout"]
+
+    with st.sidebar:
+        selected = option_menu(
+            "Menu Administrador" if administrador else "Menu",
+            opcoes,
+            icons=[ICONES[opcao] for opcao in opcoes],
+            menu_icon="cast",
+            default_index=0
+        )
+
+        # Páginas registradas sem arquivo são avisadas ao administrador em vez de falhar no clique
+        indisponiveis = paginas.paginas_indisponiveis()
+        if administrador and indisponiveis:
+            st.warning("Páginas indisponíveis: " + "; ".join(f"{titulo} ({motivo})" for titulo, motivo in indisponiveis.items()))
+
+        # Acertos e faltas das leituras em cache desde que o processo subiu
+        if administrador:
+            with st.expander("Cache de leituras"):
+                estatisticas = banco.estatisticas_cache()
+                if estatisticas:
+                    st.dataframe(estatisticas, hide_index=True)
+                else:
+                    st.write("Nenhuma leitura em cache ainda.")
+
+        # Espaço do painel de tempos, preenchido depois que a página terminar de executar
+        painel_perfil = st.empty() if administrador else None
+
+    if selected == "Logout":
+        logout()
+    else:
+        with perfil.medir_pagina(selected):
+            paginas.renderizar(selected)
+        if painel_perfil is not None:
+            perfil.exibir_painel(painel_perfil)
+
+# Função para fazer logout
+def logout():
+    st.session_state.logged_in = False
+    st.session_state.user = None
+    st.session_state.selected_table = None  # Remove o nível do usuário da sessão
+    st.session_state.identidade = None
+    st.rerun()  # Recarrega a página para mostrar a tela de login
+
+# Verifica se o usuário está logado antes de exibir o conteúdo
+if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+    login_page()
+else:
+    show_menu()
+
+
+
+def carregar_css(caminho_css):
+    with open(caminho_css) as f:
+        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+
+# Chame a função com o caminho do arquivo CSS (ao lado do código: os workers rodam na pasta dos bancos)
+carregar_css(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css"))
+
@@ -0,0 +1,160 @@
+from datetime import datetime
+
+import streamlit as st
+
+import analitico
+import autenticacao
+import banco
+import busca_alunos
+import catraca
+import fichas_treino
+import pagamentos
+import resumos
+import vencimentos
+
+SQL_VERSAO_ESQUEMA = '''
+    CREATE TABLE IF NOT EXISTS versao_esquema (
+        versao INTEGER PRIMARY KEY,
+        descricao TEXT NOT NULL,
+        aplicada_em TEXT NOT NULL
+    )
+'''
+
+# Definição única das tabelas principais (antes repetida em alunos.py, treino.py e backup.py)
+SQL_ALUNOS = '''
+    CREATE TABLE IF NOT EXISTS alunos (
+        matricula INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT NOT NULL,
+        cpf TEXT NOT NULL UNIQUE,
+        data_nascimento DATE,
+        endereco TEXT,
+        telefone TEXT,
+        email TEXT,
+        unidade TEXT
+    )
+'''
+
+SQL_PAGAMENTOS = '''
+    CREATE TABLE IF NOT EXISTS {tabela} (
+        codigo_pagamento INTEGER PRIMARY KEY AUTOINCREMENT,
+        matricula INTEGER,
+        unidade TEXT,
+        nome TEXT,
+        cpf TEXT,
+        data_pagamento DATE,
+        plano TEXT,
+        valor REAL,
+        status TEXT,
+        FOREIGN KEY (matricula) REFERENCES alunos (matricula)
+    )
+'''
+COLUNAS_PAGAMENTOS = ('matricula', 'unidade', 'nome', 'cpf', 'data_pagamento', 'plano', 'valor', 'status')
+
+# Função para listar as colunas de uma tabela (nome -> (tipo, pk))
+def _colunas(conn, tabela):
+    return {coluna[1]: (coluna[2].upper(), coluna[5]) for coluna in conn.execute(f"PRAGMA table_info({tabela})")}
+
+# Versão 1: cria as tabelas que ainda não existem e adiciona colunas que faltam em bancos antigos
+def _criar_tabelas(conn):
+    conn.execute(SQL_ALUNOS)
+    conn.execute(SQL_PAGAMENTOS.format(tabela='pagamentos'))
+
+    if 'unidade' not in _colunas(conn, 'alunos'):
+        conn.execute("ALTER TABLE alunos ADD COLUMN unidade TEXT")
+
+# Versão 2: reconstrói pagamentos com codigo_pagamento INTEGER AUTOINCREMENT (era TEXT e nulo no banco antigo)
+def _reconstruir_pagamentos(conn):
+    colunas = _colunas(conn, 'pagamentos')
+    if colunas.get('codigo_pagamento') == ('INTEGER', 1) and all(c in colunas for c in COLUNAS_PAGAMENTOS):
+        return
+
+    # Colunas ausentes no banco antigo são copiadas como NULL; o rowid vira o código do pagamento
+    origem = ', '.join(c if c in colunas else 'NULL' for c in COLUNAS_PAGAMENTOS)
+    conn.execute(SQL_PAGAMENTOS.format(tabela='pagamentos_nova'))
+    conn.execute(f'''
+        INSERT INTO pagamentos_nova (codigo_pagamento, {', '.join(COLUNAS_PAGAMENTOS)})
+        SELECT rowid, {origem} FROM pagamentos ORDER BY rowid
+    ''')
+    conn.execute("DROP TABLE pagamentos")
+    conn.execute("ALTER TABLE pagamentos_nova RENAME TO pagamentos")
+
+# Versão 5: índices dos caminhos mais usados nas buscas de pagamentos
+def _criar_indices_pagamentos(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_matricula ON pagamentos (matricula)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_cpf ON pagamentos (cpf)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_data ON pagamentos (data_pagamento)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_unidade_data ON pagamentos (unidade, data_pagamento)")
+
+# Versão 6: índices da listagem paginada de alunos (prefixo do nome, unidade e nascimento)
+def _criar_indices_alunos(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alunos_nome ON alunos (nome COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alunos_unidade ON alunos (unidade, matricula)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alunos_nascimento ON alunos (data_nascimento)")
+
+# Versão 9: pagamentos compactos (datas em dias, valor em centavos, códigos de unidade, plano e status)
+# Nome e CPF saem do pagamento e vêm de alunos pela visão pagamentos; os gatilhos passam para pagamentos_base
+def _normalizar_pagamentos(conn):
+    pagamentos.criar_estrutura(conn)
+    vencimentos.criar_gatilho_base(conn)
+    resumos.criar_gatilhos_base(conn)
+
+# Migrações em ordem; uma versão aplicada nunca é executada de novo
+MIGRACOES = {
+    banco.BANCO_PRINCIPAL: [
+        (1, "Tabelas alunos e pagamentos", _criar_tabelas),
+        (2, "codigo_pagamento INTEGER AUTOINCREMENT", _reconstruir_pagamentos),
+        (3, "Vencimento e último pagamento por matrícula", vencimentos.criar_estrutura),
+        (4, "Índice de texto completo do nome do aluno", busca_alunos.criar_indice),
+        (5, "Índices de pagamentos", _criar_indices_pagamentos),
+        (6, "Índices da listagem de alunos", _criar_indices_alunos),
+        (7, "Resumos de receita e vencimentos mantidos por gatilhos", resumos.criar_estrutura),
+        (8, "Registro de entradas da catraca", catraca.criar_estrutura),
+        (9, "Pagamentos compactos com nome e CPF só em alunos", _normalizar_pagamentos),
+        (10, "Fichas de treino por aluno", fichas_treino.criar_estrutura),
+        (11, "Último pagamento recalculado na exclusão e na correção de pagamentos", vencimentos.criar_gatilhos_recalculo),
+        (12, "Contador de alterações de pagamentos para o instantâneo analítico", analitico.criar_contadores),
+        (13, "Contador de alterações de alunos para o instantâneo analítico", analitico.criar_contador_alunos),
+    ],
+    banco.BANCO_USUARIOS: [
+        (1, "Credenciais únicas com senha em hash bcrypt", autenticacao.criar_estrutura),
+    ],
+    banco.BANCO_TREINOS: [
+        (1, "Catálogo de exercícios", fichas_treino.criar_catalogo),
+    ],
+}
+
+# Função para aplicar as migrações pendentes em uma única transação
+# BEGIN IMMEDIATE garante que só um processo aplique as migrações por vez
+def aplicar_migracoes(conn, migracoes):
+    conn.execute(SQL_VERSAO_ESQUEMA)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        atual = conn.execute("SELECT COALESCE(MAX(versao), 0) FROM versao_esquema").fetchone()[0]
+        pendentes = [migracao for migracao in migracoes if migracao[0] > atual]
+        for versao, descricao, migracao in pendentes:
+            migracao(conn)
+            conn.execute(
+                "INSERT INTO versao_esquema (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                (versao, descricao, datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+            )
+        if pendentes:
+            conn.execute("ANALYZE")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [versao for versao, _, _ in pendentes]
+
+# Executa as migrações de todos os bancos uma única vez por processo
+@st.cache_resource
+def garantir_esquema():
+    aplicadas = {}
+    for caminho, migracoes in MIGRACOES.items():
+        with banco.conexao(caminho) as conn:
+            aplicadas[caminho] = aplicar_migracoes(conn, migracoes)
+    return aplicadas
+
+# Permite aplicar as migrações fora do Streamlit (ex.: durante o deploy)
+if __name__ == "__main__":
+    for caminho, versoes in garantir_esquema().items():
+        print(f"{caminho}: {versoes or 'nenhuma migração pendente'}")
@@ -0,0 +1,267 @@
+import io
+import sqlite3
+import zipfile
+
+import pandas as pd
+import streamlit as st
+
+import alunos
+import componentes
+import fichas_treino
+import migracoes
+
+COLUNAS_EDITOR = {
+    'exercicio': "Exercício",
+    'series': "Séries",
+    'repeticoes': "Repetições",
+    'carga_kg': "Carga (kg)",
+    'descanso_s': "Descanso (s)",
+}
+UNIDADES = ["Todas", "Academia I", "Academia II"]
+NOVA_FICHA = "➕ Nova ficha"
+
+# Rótulo do exercício no editor; o id na frente mantém o rótulo único e volta a ser o id ao salvar
+def rotulo_exercicio(id_exercicio, catalogo):
+    nome, categoria = catalogo.obter(id_exercicio) or (f"Exercício {id_exercicio}", "fora do catálogo")
+    return f"{id_exercicio} - {nome} ({categoria})"
+
+def _id_exercicio(rotulo):
+    return int(rotulo.split(" - ", 1)[0])
+
+# Função para montar a tabela do editor a partir dos itens de uma ficha
+def tabela_itens(itens, catalogo):
+    tabela = pd.DataFrame(itens, columns=list(COLUNAS_EDITOR))
+    tabela['exercicio'] = [rotulo_exercicio(id_exercicio, catalogo) for id_exercicio in tabela['exercicio']]
+    return tabela.astype({'series': 'Int64', 'descanso_s': 'Int64', 'carga_kg': 'float'})
+
+# Função para converter as linhas do editor nos itens da ficha (linhas sem exercício são ignoradas)
+def itens_da_tabela(tabela):
+    itens = []
+    for exercicio, series, repeticoes, carga_kg, descanso_s in tabela[list(COLUNAS_EDITOR)].itertuples(index=False):
+        if pd.isna(exercicio) or not exercicio:
+            continue
+        itens.append((
+            _id_exercicio(exercicio),
+            None if pd.isna(series) else int(series),
+            None if pd.isna(repeticoes) or not str(repeticoes).strip() else str(repeticoes).strip(),
+            None if pd.isna(carga_kg) else float(carga_kg),
+            None if pd.isna(descanso_s) else int(descanso_s),
+        ))
+    return itens
+
+# Rascunho da ficha em edição na sessão; trocar de aluno ou de ficha recarrega do banco
+# A versão entra na chave do editor: ao adicionar exercícios pelo catálogo o editor recomeça do rascunho novo
+def carregar_rascunho(matricula, ficha, catalogo):
+    chave = (matricula, ficha['codigo'] if ficha else None)
+    rascunho = st.session_state.get("rascunho_treino")
+    if rascunho is None or rascunho['chave'] != chave:
+        rascunho = {
+            'chave': chave,
+            'itens': tabela_itens(ficha['itens'] if ficha else [], catalogo),
+            'versao': (rascunho['versao'] + 1) if rascunho else 0,
+        }
+        st.session_state.rascunho_treino = rascunho
+    return rascunho
+
+def limpar_rascunho():
+    st.session_state.rascunho_treino = None
+
+# Seleção do aluno por matrícula, nome ou CPF (nome com a lista paginada de componentes)
+def selecionar_aluno():
+    col1, col2 = st.columns(2)
+    with col1:
+        busca_por = st.selectbox("Buscar por", ["Matrícula", "Nome", "CPF"], key="busca_treino")
+    with col2:
+        valor = st.text_input("Insira o valor para buscar", key="valor_busca_treino")
+
+    if st.button("\U0001F50D Buscar", key="buscar_treino"):
+        if not valor:
+            st.warning("Por favor, insira um valor para buscar.")
+        elif busca_por == "Nome":
+            componentes.iniciar_busca(valor, "treino")
+        else:
+            st.session_state.termo_treino = None
+            st.session_state.aluno_treino = alunos.buscar_aluno(busca_por, valor)
+            limpar_rascunho()
+            if not st.session_state.aluno_treino:
+                st.error("Aluno não encontrado.")
+
+    if busca_por == "Nome" and st.session_state.get("termo_treino"):
+        matricula = componentes.selecionar_aluno(st.session_state.termo_treino, "treino")
+        if matricula and st.button("Selecionar aluno", key="selecionar_treino"):
+            st.session_state.aluno_treino = alunos.buscar_aluno("Matrícula", matricula)
+            limpar_rascunho()
+
+    return st.session_state.get("aluno_treino")
+
+# Adiciona ao rascunho os exercícios escolhidos no catálogo, por categoria
+def adicionar_do_catalogo(rascunho, editado, catalogo):
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        categoria = st.selectbox("Categoria", catalogo.categorias(), key="categoria_treino")
+    with col2:
+        opcoes = dict(catalogo.exercicios(categoria)) if categoria else {}
+        escolhidos = st.multiselect("Exercícios", list(opcoes), key="exercicios_treino")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        series = st.number_input("Séries", min_value=1, max_value=20, value=3, key="series_treino")
+    with col2:
+        repeticoes = st.text_input("Repetições", value="12", key="repeticoes_treino")
+    with col3:
+        carga = st.number_input("Carga (kg)", min_value=0.0, step=0.5, value=None, key="carga_treino")
+    with col4:
+        descanso = st.number_input("Descanso (s)", min_value=0, step=15, value=60, key="descanso_treino")
+
+    if st.button("➕ Adicionar à ficha", key="adicionar_treino", disabled=not escolhidos):
+        novos = tabela_itens([(opcoes[nome], series, repeticoes, carga, descanso) for nome in escolhidos], catalogo)
+        rascunho['itens'] = pd.concat([editado, novos], ignore_index=True)
+        rascunho['versao'] += 1
+        st.rerun()
+
+# Edição das fichas ativas do aluno escolhido
+def editar_fichas(aluno, catalogo):
+    matricula, nome, cpf, *_, unidade = aluno
+    st.write(f"**{nome}** - Matrícula {matricula} - CPF: {cpf} ({unidade or 'Sem unidade'})")
+
+    fichas = fichas_treino.consultar_fichas(matricula)
+    por_titulo = {f"{ficha['nome']} (atualizada em {ficha['atualizada_em'][:10]})": ficha for ficha in fichas}
+    escolha = st.selectbox("Ficha", list(por_titulo) + [NOVA_FICHA], key=f"ficha_treino_{matricula}")
+    ficha = por_titulo.get(escolha)
+    rascunho = carregar_rascunho(matricula, ficha, catalogo)
+
+    nome_ficha = st.text_input("Nome da ficha", value=ficha['nome'] if ficha else f"Treino {chr(ord('A') + len(fichas))}",
+                               key=f"nome_ficha_{rascunho['chave']}")
+    observacao = st.text_area("Observações", value=(ficha or {}).get('observacao') or "",
+                              key=f"observacao_ficha_{rascunho['chave']}")
+
+    # A ordem das linhas é a ordem da ficha; linhas novas entram no fim
+    editado = st.data_editor(
+        rascunho['itens'],
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'exercicio': st.column_config.SelectboxColumn(
+                COLUNAS_EDITOR['exercicio'], required=True, width="large",
+                options=[rotulo_exercicio(id_exercicio, catalogo) for _, id_exercicio in catalogo.exercicios()],
+            ),
+            'series': st.column_config.NumberColumn(COLUNAS_EDITOR['series'], min_value=1, max_value=20, step=1),
+            'repeticoes': st.column_config.TextColumn(COLUNAS_EDITOR['repeticoes']),
+            'carga_kg': st.column_config.NumberColumn(COLUNAS_EDITOR['carga_kg'], min_value=0.0, step=0.5, format="%.1f"),
+            'descanso_s': st.column_config.NumberColumn(COLUNAS_EDITOR['descanso_s'], min_value=0, step=15),
+        },
+        key=f"editor_treino_{rascunho['chave']}_{rascunho['versao']}",
+    )
+
+    with st.expander("Adicionar exercícios do catálogo"):
+        adicionar_do_catalogo(rascunho, editado, catalogo)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("\U0001F4BE Salvar ficha", key="salvar_ficha"):
+            itens = itens_da_tabela(editado)
+            if not nome_ficha.strip():
+                st.error("Informe o nome da ficha.")
+            elif not itens:
+                st.error("A ficha precisa de pelo menos um exercício.")
+            else:
+                try:
+                    fichas_treino.salvar_ficha(matricula, nome_ficha.strip(), itens,
+                                               ficha['codigo'] if ficha else None, observacao.strip() or None)
+                    limpar_rascunho()
+                    st.success(f"Ficha salva com {len(itens)} exercícios.")
+                except (sqlite3.Error, ValueError) as e:
+                    st.error(f"Erro ao salvar a ficha: {e}")
+    with col2:
+        if ficha and st.button("\U0001F5C3 Arquivar ficha", key="arquivar_ficha"):
+            fichas_treino.arquivar_ficha(ficha['codigo'])
+            limpar_rascunho()
+            st.rerun()
+
+    with st.expander("Histórico de fichas arquivadas"):
+        arquivadas = fichas_treino.consultar_fichas(matricula, arquivadas=True)
+        if not arquivadas:
+            st.write("Nenhuma ficha arquivada.")
+        for arquivada in reversed(arquivadas):
+            st.write(f"**{arquivada['nome']}** (arquivada em {arquivada['atualizada_em'][:10]})")
+            st.dataframe(tabela_itens(arquivada['itens'], catalogo).rename(columns=COLUNAS_EDITOR), hide_index=True)
+
+# Impressão em lote: um HTML com um aluno por página, de uma unidade ou de uma lista de matrículas
+def imprimir_fichas(catalogo):
+    st.write("Gere um arquivo com as fichas ativas de vários alunos (um aluno por página) e imprima pelo navegador.")
+    col1, col2 = st.columns(2)
+    with col1:
+        unidade = st.selectbox("Unidade", UNIDADES, key="unidade_impressao")
+    with col2:
+        lista = st.text_input("Matrículas (separadas por vírgula, vazio = todas)", key="matriculas_impressao")
+
+    if st.button("\U0001F5A8 Gerar fichas para impressão", key="gerar_impressao"):
+        try:
+            matriculas = [int(matricula) for matricula in lista.replace(";", ",").split(",") if matricula.strip()] or None
+        except ValueError:
+            st.error("Informe as matrículas como números separados por vírgula.")
+            return
+        selecionados = fichas_treino.alunos_com_ficha(None if unidade == "Todas" else unidade, matriculas)
+        if not selecionados:
+            st.session_state.impressao_treino = None
+            st.warning("Nenhum aluno com ficha ativa nesse filtro.")
+        else:
+            st.session_state.impressao_treino = (len(selecionados),
+                                                 fichas_treino.gerar_impressao(selecionados, catalogo))
+
+    if st.session_state.get("impressao_treino"):
+        quantidade, arquivos = st.session_state.impressao_treino
+        if len(arquivos) == 1:
+            nome_arquivo, documento = arquivos[0]
+            st.download_button(f"\U0001F4E5 Baixar fichas de {quantidade} alunos", documento.encode('utf-8'),
+                               file_name=nome_arquivo, mime="text/html", key="baixar_impressao")
+        else:
+            compactado = io.BytesIO()
+            with zipfile.ZipFile(compactado, "w", zipfile.ZIP_DEFLATED) as zf:
+                for nome_arquivo, documento in arquivos:
+                    zf.writestr(nome_arquivo, documento)
+            st.download_button(f"\U0001F4E5 Baixar fichas de {quantidade} alunos ({len(arquivos)} arquivos)",
+                               compactado.getvalue(), file_name="fichas_treino.zip", mime="application/zip",
+                               key="baixar_impressao")
+
+# Catálogo de exercícios por categoria e cadastro de exercícios novos
+def gerenciar_catalogo(catalogo):
+    tamanho = catalogo.tamanho()
+    st.write(f"{tamanho['exercicios']} exercícios em {tamanho['categorias']} categorias.")
+
+    categorias = catalogo.categorias()
+    if categorias:
+        categoria = st.selectbox("Categoria", categorias, key="categoria_catalogo")
+        st.dataframe(pd.DataFrame(catalogo.exercicios(categoria), columns=["Exercício", "Id"]), hide_index=True)
+
+    with st.form("novo_exercicio", clear_on_submit=True):
+        nome = st.text_input("Nome do exercício")
+        categoria_nova = st.text_input("Categoria (ex.: Peito, Costas, Pernas)")
+        if st.form_submit_button("➕ Cadastrar exercício"):
+            if not nome.strip() or not categoria_nova.strip():
+                st.error("Informe o nome e a categoria.")
+            else:
+                fichas_treino.adicionar_exercicio(nome, categoria_nova)
+                st.success(f"Exercício {nome.strip()} cadastrado.")
+
+def render():
+    st.title("\U0001F3CB Montar Treino")
+    migracoes.garantir_esquema()
+    catalogo = fichas_treino.obter_catalogo()
+
+    tab1, tab2, tab3 = st.tabs(["\U0001F4C1 Fichas", "\U0001F4C1 Imprimir", "\U0001F4C1 Catálogo de Exercícios"])
+
+    with tab1:
+        aluno = selecionar_aluno()
+        if aluno:
+            editar_fichas(aluno, catalogo)
+
+    with tab2:
+        imprimir_fichas(catalogo)
+
+    with tab3:
+        gerenciar_catalogo(catalogo)
+
+if __name__ == "__main__":
+    render()
@@ -0,0 +1,216 @@
+# Esquema compacto dos pagamentos: uma linha por pagamento chaveada pela matrícula, com datas em dias
+# desde 1970-01-01, valor em centavos e unidade, plano e status como códigos inteiros.
+# Nome e CPF vêm sempre de alunos; a visão "pagamentos" mantém as colunas antigas para quem só lê
+# (ou grava pelos gatilhos INSTEAD OF) e o código do app grava direto em pagamentos_base.
+
+EPOCA_JULIANA = 2440587.5  # julianday('1970-01-01')
+
+STATUS_CODIGOS = {"Em dia": 1, "Atrasado": 2, "Pago": 3}
+PLANOS = ("Mensal", "Trimestral", "Semestral", "Anual")
+
+# Colunas gravadas pelo app, na ordem de inserir e inserir_varios
+COLUNAS = ('matricula', 'unidade', 'data_pagamento', 'plano', 'valor', 'status', 'data_vencimento')
+
+# Expressões SQL de conversão entre o formato gravado e o formato das colunas antigas
+def sql_dias(expressao):
+    return f"CAST(julianday({expressao}) - {EPOCA_JULIANA} AS INTEGER)"
+
+def sql_data(expressao):
+    return f"date({expressao} + {EPOCA_JULIANA})"
+
+def sql_mes(expressao):
+    return f"strftime('%Y-%m', {expressao} + {EPOCA_JULIANA})"
+
+def sql_centavos(expressao):
+    return f"CAST(ROUND({expressao} * 100) AS INTEGER)"
+
+def sql_status_codigo(expressao):
+    casos = " ".join(f"WHEN '{nome}' THEN {codigo}" for nome, codigo in STATUS_CODIGOS.items())
+    return f"CASE {expressao} {casos} END"
+
+def sql_status_nome(expressao):
+    casos = " ".join(f"WHEN {codigo} THEN '{nome}'" for nome, codigo in STATUS_CODIGOS.items())
+    return f"CASE {expressao} {casos} END"
+
+def sql_unidade(expressao):
+    return f"(SELECT nome FROM unidades WHERE codigo = {expressao})"
+
+def sql_plano(expressao):
+    return f"(SELECT nome FROM planos WHERE codigo = {expressao})"
+
+SQL_UNIDADES = '''
+    CREATE TABLE IF NOT EXISTS unidades (
+        codigo INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE
+    )
+'''
+SQL_PLANOS = '''
+    CREATE TABLE IF NOT EXISTS planos (
+        codigo INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL UNIQUE
+    )
+'''
+SQL_PAGAMENTOS_BASE = '''
+    CREATE TABLE IF NOT EXISTS pagamentos_base (
+        codigo_pagamento INTEGER PRIMARY KEY AUTOINCREMENT,
+        matricula INTEGER,
+        unidade INTEGER REFERENCES unidades (codigo),
+        plano INTEGER REFERENCES planos (codigo),
+        data_pagamento INTEGER,
+        data_vencimento INTEGER,
+        valor_centavos INTEGER,
+        status INTEGER,
+        FOREIGN KEY (matricula) REFERENCES alunos (matricula)
+    )
+'''
+
+# Nome e CPF gravados nos pagamentos antigos que não batem com o cadastro atual (ou sem cadastro):
+# guardados na migração para não se perderem, fora do caminho das consultas
+SQL_PAGAMENTOS_LEGADO = '''
+    CREATE TABLE IF NOT EXISTS pagamentos_legado (
+        codigo_pagamento INTEGER PRIMARY KEY,
+        nome TEXT,
+        cpf TEXT
+    )
+'''
+
+# Mesmas colunas, na mesma ordem, da antiga tabela pagamentos
+SQL_VISAO = f'''
+    CREATE VIEW IF NOT EXISTS pagamentos AS
+    SELECT p.codigo_pagamento, p.matricula, u.nome AS unidade, a.nome, a.cpf,
+           {sql_data('p.data_pagamento')} AS data_pagamento, pl.nome AS plano,
+           p.valor_centavos / 100.0 AS valor, {sql_status_nome('p.status')} AS status,
+           {sql_data('p.data_vencimento')} AS data_vencimento
+    FROM pagamentos_base p
+    LEFT JOIN alunos a ON a.matricula = p.matricula
+    LEFT JOIN unidades u ON u.codigo = p.unidade
+    LEFT JOIN planos pl ON pl.codigo = p.plano
+'''
+
+SQL_REGISTRAR_CODIGOS = '''
+    INSERT OR IGNORE INTO unidades (nome) SELECT {r}.unidade WHERE {r}.unidade IS NOT NULL;
+    INSERT OR IGNORE INTO planos (nome) SELECT {r}.plano WHERE {r}.plano IS NOT NULL;
+'''
+
+def _valores(r):
+    return {
+        'matricula': f"{r}.matricula",
+        'unidade': f"(SELECT codigo FROM unidades WHERE nome = {r}.unidade)",
+        'plano': f"(SELECT codigo FROM planos WHERE nome = {r}.plano)",
+        'data_pagamento': sql_dias(f"{r}.data_pagamento"),
+        'data_vencimento': sql_dias(f"{r}.data_vencimento"),
+        'valor_centavos': sql_centavos(f"{r}.valor"),
+        'status': sql_status_codigo(f"{r}.status"),
+    }
+
+# Gravações feitas na visão (scripts antigos, sqlite3 na linha de comando); nome e CPF são ignorados
+SQL_GATILHOS_VISAO = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_visao_insercao
+    INSTEAD OF INSERT ON pagamentos
+    BEGIN
+        {SQL_REGISTRAR_CODIGOS.format(r='NEW')}
+        INSERT INTO pagamentos_base (codigo_pagamento, {", ".join(_valores('NEW'))})
+        VALUES (NEW.codigo_pagamento, {", ".join(_valores('NEW').values())});
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_visao_alteracao
+    INSTEAD OF UPDATE ON pagamentos
+    BEGIN
+        {SQL_REGISTRAR_CODIGOS.format(r='NEW')}
+        UPDATE pagamentos_base
+        SET {", ".join(f"{coluna} = {valor}" for coluna, valor in _valores('NEW').items())}
+        WHERE codigo_pagamento = OLD.codigo_pagamento;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_visao_exclusao
+    INSTEAD OF DELETE ON pagamentos
+    BEGIN
+        DELETE FROM pagamentos_base WHERE codigo_pagamento = OLD.codigo_pagamento;
+    END
+    ''',
+)
+
+# Índices dos caminhos quentes; o de matrícula cobre o histórico do aluno e a conferência de duplicados
+SQL_INDICES = (
+    "CREATE INDEX IF NOT EXISTS idx_pagamentos_base_matricula ON pagamentos_base (matricula, data_pagamento, valor_centavos)",
+    "CREATE INDEX IF NOT EXISTS idx_pagamentos_base_data ON pagamentos_base (data_pagamento)",
+    "CREATE INDEX IF NOT EXISTS idx_pagamentos_base_unidade_data ON pagamentos_base (unidade, data_pagamento)",
+    "CREATE INDEX IF NOT EXISTS idx_pagamentos_base_status_vencimento ON pagamentos_base (status, data_vencimento)",
+    # Cobre a junção pagamentos -> alunos (nome e CPF) sem ler a linha inteira do aluno
+    "CREATE INDEX IF NOT EXISTS idx_alunos_matricula_nome_cpf ON alunos (matricula, nome, cpf)",
+)
+
+SQL_INSERIR = f'''
+    INSERT INTO pagamentos_base (matricula, unidade, plano, data_pagamento, data_vencimento, valor_centavos, status)
+    VALUES (?, ?, ?, {sql_dias('?')}, {sql_dias('?')}, {sql_centavos('?')}, ?)
+'''
+
+# Função para cadastrar as unidades e os planos ainda sem código; devolve os códigos de cada nome
+def registrar_codigos(conn, unidades=(), planos=()):
+    codigos = []
+    for tabela, nomes in (("unidades", unidades), ("planos", planos)):
+        conn.executemany(f"INSERT OR IGNORE INTO {tabela} (nome) VALUES (?)", [(nome,) for nome in set(nomes) if nome])
+        codigos.append(dict(conn.execute(f"SELECT nome, codigo FROM {tabela}")))
+    return codigos
+
+def _parametros(linhas, codigos_unidades, codigos_planos):
+    for matricula, unidade, data_pagamento, plano, valor, status, data_vencimento in linhas:
+        yield (matricula, codigos_unidades.get(unidade), codigos_planos.get(plano), data_pagamento, data_vencimento,
+               valor, STATUS_CODIGOS.get(status))
+
+# Função para gravar um pagamento (colunas na ordem de COLUNAS); devolve o código do pagamento
+def inserir(conn, linha):
+    codigos = registrar_codigos(conn, [linha[1]], [linha[3]])
+    return conn.execute(SQL_INSERIR, next(_parametros([linha], *codigos))).lastrowid
+
+# Função para gravar vários pagamentos de uma vez (linhas na ordem de COLUNAS); devolve quantos
+def inserir_varios(conn, linhas):
+    linhas = list(linhas)
+    codigos = registrar_codigos(conn, [linha[1] for linha in linhas], [linha[3] for linha in linhas])
+    return conn.executemany(SQL_INSERIR, _parametros(linhas, *codigos)).rowcount
+
+# Migração: troca a tabela pagamentos pela tabela compacta e pela visão com as colunas antigas
+# Os gatilhos de ultimo_pagamento e dos resumos são recriados em pagamentos_base por quem chama
+def criar_estrutura(conn):
+    desconhecidos = conn.execute(f'''
+        SELECT DISTINCT status FROM pagamentos
+        WHERE status IS NOT NULL AND ({sql_status_codigo('status')}) IS NULL
+    ''').fetchall()
+    if desconhecidos:
+        raise ValueError(f"Status de pagamento sem código: {[status for status, in desconhecidos]}")
+
+    conn.execute(SQL_UNIDADES)
+    conn.execute(SQL_PLANOS)
+    conn.executemany("INSERT OR IGNORE INTO planos (nome) VALUES (?)", [(plano,) for plano in PLANOS])
+    conn.execute('''
+        INSERT OR IGNORE INTO unidades (nome)
+        SELECT unidade FROM alunos WHERE unidade IS NOT NULL
+        UNION SELECT unidade FROM pagamentos WHERE unidade IS NOT NULL
+    ''')
+    conn.execute("INSERT OR IGNORE INTO planos (nome) SELECT DISTINCT plano FROM pagamentos WHERE plano IS NOT NULL")
+
+    conn.execute(SQL_PAGAMENTOS_LEGADO)
+    conn.execute('''
+        INSERT INTO pagamentos_legado (codigo_pagamento, nome, cpf)
+        SELECT p.codigo_pagamento, p.nome, p.cpf
+        FROM pagamentos p
+        LEFT JOIN alunos a ON a.matricula = p.matricula
+        WHERE a.matricula IS NULL OR a.nome IS NOT p.nome OR a.cpf IS NOT p.cpf
+    ''')
+
+    conn.execute(SQL_PAGAMENTOS_BASE)
+    valores = _valores('p')
+    conn.execute(f'''
+        INSERT INTO pagamentos_base (codigo_pagamento, {", ".join(valores)})
+        SELECT p.codigo_pagamento, {", ".join(valores.values())}
+        FROM pagamentos p
+        ORDER BY p.codigo_pagamento
+    ''')
+
+    conn.execute("DROP TABLE pagamentos")  # leva junto os índices e gatilhos da tabela antiga
+    conn.execute(SQL_VISAO)
+    for sql in SQL_GATILHOS_VISAO + SQL_INDICES:
+        conn.execute(sql)
@@ -0,0 +1,49 @@
+import importlib
+
+import streamlit as st
+
+# Módulo de cada entrada do menu; toda página expõe render()
+PAGINAS = {
+    "Entrada": "entrada",
+    "Cadastro Aluno": "alunos",
+    "Gestão de Entrada": "gestao_entrada",
+    "Pagamentos": "treino",
+    "Montar Treino": "montar_treino",
+    "Extrair Relatório": "relatorio",
+    "Usuários": "user",
+    "Banco de Dados": "editar_excluir",
+    "Usuario Administrador": "useradmin",
+}
+
+# Importa todas as páginas uma única vez por processo (pandas, matplotlib etc. carregam só aqui)
+# Página sem arquivo fica indisponível no menu; página com erro de código derruba a inicialização
+@st.cache_resource
+def carregar_paginas():
+    disponiveis, indisponiveis = {}, {}
+    for titulo, nome_modulo in PAGINAS.items():
+        try:
+            modulo = importlib.import_module(nome_modulo)
+        except ModuleNotFoundError as e:
+            if e.name != nome_modulo:
+                raise
+            indisponiveis[titulo] = f"{nome_modulo}.py não encontrado"
+            continue
+
+        if not callable(getattr(modulo, 'render', None)):
+            raise AttributeError(f"A página {nome_modulo}.py não define render()")
+        disponiveis[titulo] = modulo.render
+    return disponiveis, indisponiveis
+
+# Função para listar as páginas que podem aparecer no menu, na ordem pedida
+def paginas_disponiveis(titulos):
+    disponiveis, _ = carregar_paginas()
+    return [titulo for titulo in titulos if titulo in disponiveis]
+
+# Função para listar as páginas registradas que não puderam ser carregadas (título -> motivo)
+def paginas_indisponiveis():
+    return carregar_paginas()[1]
+
+# Função para exibir uma página do registro
+def renderizar(titulo):
+    disponiveis, _ = carregar_paginas()
+    disponiveis[titulo]()
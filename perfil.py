@@ -0,0 +1,139 @@
+import contextvars
+import json
+import logging
+import os
+import socket
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import streamlit as st
+
+# Medição ligada para todas as sessões (ex.: GDE_PERFIL=1) ou só na sessão do administrador, pelo painel
+PERFIL_GLOBAL = os.environ.get("GDE_PERFIL") == "1"
+# Cada worker grava no seu arquivo (perfil.<máquina>.<pid>.jsonl): a rotação do RotatingFileHandler
+# não é segura entre processos escrevendo no mesmo arquivo
+ARQUIVO_LOG = os.environ.get("GDE_PERFIL_LOG", "perfil.jsonl")
+TAMANHO_LOG = 5 * 1024 * 1024
+ARQUIVOS_LOG = 5
+
+# Medição da execução em andamento; cada sessão do Streamlit roda em sua própria thread
+_medicao_atual = contextvars.ContextVar("medicao_atual", default=None)
+_SEM_MEDICAO = nullcontext()
+
+
+# Tempos de uma execução de página, por seção (tempo exclusivo: seções internas são descontadas)
+class Medicao:
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.tempos = Counter()
+        self.chamadas = Counter()
+        self.bytes_tabelas = 0
+        self._pilha = []
+
+    @contextmanager
+    def secao(self, nome):
+        inicio = time.perf_counter()
+        self._pilha.append(0.0)
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            internas = self._pilha.pop()
+            self.tempos[nome] += decorrido - internas
+            self.chamadas[nome] += 1
+            if self._pilha:
+                self._pilha[-1] += decorrido
+
+    def resumo(self, total):
+        secoes = {
+            nome: {'ms': round(tempo * 1000, 2), 'chamadas': self.chamadas[nome]}
+            for nome, tempo in self.tempos.most_common()
+        }
+        # O que sobra é o próprio Streamlit: widgets, layout e serialização dos elementos
+        secoes['interface'] = {'ms': round((total - sum(self.tempos.values())) * 1000, 2), 'chamadas': 1}
+        return {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'pagina': self.pagina,
+            'total_ms': round(total * 1000, 2),
+            'secoes': secoes,
+            'bytes_tabelas': self.bytes_tabelas,
+        }
+
+
+# Função para montar o nome do arquivo de log deste processo a partir de ARQUIVO_LOG
+def _arquivo_log_processo():
+    base, extensao = os.path.splitext(ARQUIVO_LOG)
+    return f"{base}.{socket.gethostname()}.{os.getpid()}{extensao}"
+
+
+# Log JSON lines com rotação, aberto uma única vez por processo (em arquivo próprio do processo)
+@st.cache_resource
+def _log_perfil():
+    log = logging.getLogger("gde.perfil")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    manipulador = RotatingFileHandler(_arquivo_log_processo(), maxBytes=TAMANHO_LOG, backupCount=ARQUIVOS_LOG, encoding='utf-8')
+    manipulador.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(manipulador)
+    return log
+
+
+# Função para saber se a medição está ligada nesta sessão
+def perfil_ativo():
+    return PERFIL_GLOBAL or st.session_state.get('perfil_ativo', False)
+
+
+# Mede a execução de uma página inteira; sem medição ativa não faz nada
+@contextmanager
+def medir_pagina(pagina):
+    if not perfil_ativo():
+        yield None
+        return
+
+    medicao = Medicao(pagina)
+    token = _medicao_atual.set(medicao)
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    finally:
+        _medicao_atual.reset(token)
+        resumo = medicao.resumo(time.perf_counter() - inicio)
+        st.session_state['perfil_ultimo'] = resumo
+        _log_perfil().info(json.dumps(resumo, ensure_ascii=False))
+
+
+# Marca um trecho com nome (sql, dataframe, grafico...); custo de um ContextVar.get quando desligado
+def secao(nome):
+    medicao = _medicao_atual.get()
+    return medicao.secao(nome) if medicao else _SEM_MEDICAO
+
+
+# Função para exibir um DataFrame medindo a serialização e o tamanho enviado ao navegador
+def exibir_dataframe(dados, **opcoes):
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return st.dataframe(dados, **opcoes)
+
+    import pyarrow as pa
+
+    with medicao.secao('tabela'):
+        if hasattr(dados, 'columns'):
+            medicao.bytes_tabelas += pa.Table.from_pandas(dados, preserve_index=False).nbytes
+        return st.dataframe(dados, **opcoes)
+
+
+# Painel do administrador com a última medição desta sessão
+def exibir_painel(area):
+    resumo = st.session_state.get('perfil_ultimo')
+    with area.container():
+        st.checkbox("⏱ Medir tempos desta sessão", key='perfil_ativo', disabled=PERFIL_GLOBAL)
+        if not resumo:
+            return
+        st.caption(f"{resumo['pagina']}: {resumo['total_ms']:.0f} ms | tabelas: {resumo['bytes_tabelas'] / 1024:.0f} KB")
+        st.dataframe(
+            [{'seção': nome, 'ms': dados['ms'], 'chamadas': dados['chamadas']} for nome, dados in resumo['secoes'].items()],
+            hide_index=True,
+        )
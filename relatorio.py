@@ -0,0 +1,177 @@
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import streamlit as st
+import xlsxwriter
+
+import analitico
+import migracoes
+
+TAMANHO_LOTE = 5000
+LIMITE_LINHAS_XLSX = 1_048_575  # linhas de dados por aba (a primeira linha é o cabeçalho)
+
+UNIDADES = ["Academia I", "Academia II"]
+PLANOS = ["Mensal", "Trimestral", "Semestral", "Anual"]
+FORMATOS = {"Excel (.xlsx)": "xlsx", "CSV (.csv)": "csv", "Parquet (.parquet)": "parquet"}
+
+COLUNAS = ["Código", "Matrícula", "Nome", "CPF", "Unidade", "Plano", "Data de Pagamento", "Vencimento", "Valor", "Status"]
+
+# Função para percorrer o relatório em lotes de linhas (tuplas na ordem de COLUNAS)
+# "tabelas" são os lotes de analitico.relatorio_em_lotes, montados um de cada vez
+def ler_em_lotes(tabelas):
+    for tabela in tabelas:
+        for lote in tabela.to_batches(max_chunksize=TAMANHO_LOTE):
+            yield list(zip(*(coluna.to_pylist() for coluna in lote.columns)))
+
+# Função para gravar em Excel no modo de memória constante (cada linha é descarregada no disco)
+def escrever_xlsx(caminho, tabelas):
+    lotes = ler_em_lotes(tabelas)
+    livro = xlsxwriter.Workbook(caminho, {'constant_memory': True})
+    planilha = None
+    linha = total = 0
+    for lote in lotes:
+        for registro in lote:
+            if planilha is None or linha == LIMITE_LINHAS_XLSX:
+                planilha = livro.add_worksheet(f"Mensalidades {len(livro.worksheets()) + 1}")
+                planilha.write_row(0, 0, COLUNAS)
+                linha = 0
+            linha += 1
+            planilha.write_row(linha, 0, registro)
+        total += len(lote)
+    if planilha is None:
+        livro.add_worksheet("Mensalidades 1").write_row(0, 0, COLUNAS)
+    livro.close()
+    return total
+
+# Função para gravar em CSV (separador ";" e BOM para abrir direto no Excel)
+def escrever_csv(caminho, tabelas):
+    lotes = ler_em_lotes(tabelas)
+    total = 0
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(COLUNAS)
+        for lote in lotes:
+            escritor.writerows(lote)
+            total += len(lote)
+    return total
+
+# Função para gravar em Parquet: as tabelas Arrow vão direto para o arquivo, sem passar por tuplas
+def escrever_parquet(caminho, tabelas):
+    import pyarrow.parquet as pq
+
+    total = 0
+    with pq.ParquetWriter(caminho, analitico.ESQUEMA_RELATORIO) as escritor:
+        for tabela in tabelas:
+            escritor.write_table(tabela)
+            total += tabela.num_rows
+    return total
+
+ESCRITORES = {"xlsx": escrever_xlsx, "csv": escrever_csv, "parquet": escrever_parquet}
+
+# Função para exportar o relatório no formato escolhido; "filtros" são os argumentos de
+# analitico.relatorio_em_lotes e "tabelas" o instantâneo (pagamentos, alunos) lido no início da geração
+# Cada escritor recebe as tabelas Arrow do relatório; Excel e CSV as percorrem como tuplas (ler_em_lotes)
+def exportar_relatorio(caminho, formato, filtros, tabelas):
+    return ESCRITORES[formato](caminho, analitico.relatorio_em_lotes(**filtros, tabelas=tabelas))
+
+# Função para exportar um arquivo por unidade, em paralelo (cada um com o seu recorte do mesmo instantâneo)
+def exportar_por_unidade(pasta, formato, unidades, filtros, tabelas):
+    trabalhadores = max(1, min(len(unidades), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        futuros = {}
+        for unidade in unidades:
+            caminho = os.path.join(pasta, f"relatorio_{unidade.replace(' ', '_')}.{formato}")
+            futuros[caminho] = executor.submit(exportar_relatorio, caminho, formato, {**filtros, 'unidade': unidade},
+                                               tabelas)
+        return {caminho: futuro.result() for caminho, futuro in futuros.items()}
+
+# Função para gerar o arquivo final do download (um arquivo ou um .zip com um arquivo por unidade)
+# Roda inteira no executor: a consulta ao instantâneo também sai da execução da página
+# Devolve (nome do arquivo, conteúdo, linhas): o download_button guarda o conteúdo em memória de qualquer
+# forma, então a pasta temporária é apagada aqui mesmo, inclusive quando a geração falha
+def gerar_relatorio(formato, por_unidade, unidades, filtros):
+    tabelas = analitico.carregar_tabelas()
+    pasta = tempfile.mkdtemp(prefix="relatorio_")
+    try:
+        if not por_unidade:
+            caminho = os.path.join(pasta, f"relatorio_mensalidades.{formato}")
+            linhas = exportar_relatorio(caminho, formato, filtros, tabelas)
+        else:
+            arquivos = exportar_por_unidade(pasta, formato, unidades, filtros, tabelas)
+            caminho = os.path.join(pasta, "relatorio_mensalidades.zip")
+            with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as pacote:
+                for arquivo in arquivos:
+                    pacote.write(arquivo, os.path.basename(arquivo))
+            linhas = sum(arquivos.values())
+        with open(caminho, 'rb') as arquivo:
+            return os.path.basename(caminho), arquivo.read(), linhas
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# Executor compartilhado: o relatório é gerado em segundo plano e a página continua respondendo
+@st.cache_resource
+def _executor_relatorios():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="relatorio")
+
+# Acompanha a geração em andamento e oferece o download quando terminar
+@st.fragment(run_every=1)
+def acompanhar_relatorio():
+    futuro = st.session_state.get('relatorio_futuro')
+    if futuro is None:
+        return
+    if not futuro.done():
+        st.info("⏳ Gerando relatório... você pode continuar usando a página.")
+        return
+
+    try:
+        nome, conteudo, linhas = futuro.result()
+    except Exception as e:
+        st.error(f"Erro ao gerar relatório: {e}")
+        return
+
+    st.success(f"Relatório gerado com {linhas} pagamentos.")
+    st.download_button("\U0001F4E5 Baixar relatório", conteudo, file_name=nome)
+
+# Interface do Streamlit
+def render():
+    st.title("Relatório de Mensalidades")
+
+    migracoes.garantir_esquema()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        inicio = st.date_input("Pagamentos a partir de", value=date.today().replace(day=1), key="relatorio_inicio")
+        unidade = st.selectbox("Unidade", ["Todas"] + UNIDADES, key="relatorio_unidade")
+        status = st.selectbox("Status", ["Todos", "Atrasado", "Em dia"], key="relatorio_status")
+    with col2:
+        fim = st.date_input("Pagamentos até", value=date.today(), key="relatorio_fim")
+        plano = st.selectbox("Plano", ["Todos"] + PLANOS, key="relatorio_plano")
+        formato = st.selectbox("Formato", list(FORMATOS), key="relatorio_formato")
+
+    por_unidade = st.checkbox("Um arquivo por unidade (gerados em paralelo)", key="relatorio_por_unidade",
+                              disabled=unidade != "Todas")
+
+    if st.button("\U0001F4C4 Gerar relatório", key="relatorio_gerar"):
+        if inicio > fim:
+            st.error("A data inicial deve ser anterior à data final.")
+        else:
+            # Consulta ao instantâneo analítico e gravação do arquivo ficam em segundo plano
+            filtros = {
+                'inicio': inicio,
+                'fim': fim,
+                'unidade': None if unidade == "Todas" else unidade,
+                'plano': None if plano == "Todos" else plano,
+                'status': None if status == "Todos" else status,
+            }
+            st.session_state['relatorio_futuro'] = _executor_relatorios().submit(
+                gerar_relatorio, FORMATOS[formato], por_unidade and unidade == "Todas", UNIDADES, filtros)
+
+    acompanhar_relatorio()
+
+if __name__ == "__main__":
+    render()
@@ -0,0 +1,271 @@
+import argparse
+from datetime import date
+
+import pandas as pd
+
+import banco
+import pagamentos
+import vencimentos
+
+# Receita e quantidade de pagamentos por unidade, plano e mês (AAAA-MM)
+# Unidade e plano vazios são gravados como '' para que a chave primária funcione no ON CONFLICT
+SQL_RESUMO_RECEITA = '''
+    CREATE TABLE IF NOT EXISTS resumo_receita (
+        unidade TEXT NOT NULL,
+        plano TEXT NOT NULL,
+        mes TEXT NOT NULL,
+        quantidade INTEGER NOT NULL,
+        total REAL NOT NULL,
+        PRIMARY KEY (unidade, plano, mes)
+    ) WITHOUT ROWID
+'''
+
+# Quantidade de alunos por unidade e data de vencimento do último pagamento
+# Ativos em uma data = soma das faixas com vencimento a partir dela (não depende de recálculo diário)
+SQL_RESUMO_VENCIMENTOS = '''
+    CREATE TABLE IF NOT EXISTS resumo_vencimentos (
+        unidade TEXT NOT NULL,
+        data_vencimento DATE NOT NULL,
+        quantidade INTEGER NOT NULL,
+        PRIMARY KEY (unidade, data_vencimento)
+    ) WITHOUT ROWID
+'''
+
+# Os modelos de receita recebem as expressões de unidade, plano, mês e valor da linha de pagamento
+SQL_SOMAR_RECEITA = '''
+    INSERT INTO resumo_receita (unidade, plano, mes, quantidade, total)
+    VALUES (IFNULL({unidade}, ''), IFNULL({plano}, ''), IFNULL({mes}, ''), {sinal}1, {sinal}IFNULL({valor}, 0))
+    ON CONFLICT (unidade, plano, mes) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        total = total + excluded.total;
+'''
+
+SQL_SOMAR_VENCIMENTO = '''
+    INSERT INTO resumo_vencimentos (unidade, data_vencimento, quantidade)
+    VALUES (IFNULL({r}.unidade, ''), {r}.data_vencimento, {sinal}1)
+    ON CONFLICT (unidade, data_vencimento) DO UPDATE SET quantidade = quantidade + excluded.quantidade;
+'''
+
+# A faixa que ficou zerada é removida (pela chave) para o resumo continuar pequeno
+SQL_LIMPAR_RECEITA = '''
+    DELETE FROM resumo_receita
+    WHERE unidade = IFNULL({unidade}, '') AND plano = IFNULL({plano}, '') AND mes = IFNULL({mes}, '') AND quantidade = 0;
+'''
+SQL_LIMPAR_VENCIMENTO = '''
+    DELETE FROM resumo_vencimentos
+    WHERE unidade = IFNULL({r}.unidade, '') AND data_vencimento = {r}.data_vencimento AND quantidade = 0;
+'''
+
+# Colunas da antiga tabela pagamentos e da tabela compacta pagamentos_base, na linha NEW ou OLD
+def _colunas_texto(r):
+    return {'unidade': f"{r}.unidade", 'plano': f"{r}.plano", 'mes': f"substr({r}.data_pagamento, 1, 7)", 'valor': f"{r}.valor"}
+
+def _colunas_base(r):
+    return {
+        'unidade': pagamentos.sql_unidade(f"{r}.unidade"),
+        'plano': pagamentos.sql_plano(f"{r}.plano"),
+        'mes': pagamentos.sql_mes(f"{r}.data_pagamento"),
+        'valor': f"{r}.valor_centavos / 100.0",
+    }
+
+# Gatilhos de receita sobre a tabela de pagamentos informada
+def _gatilhos_receita(tabela, colunas, colunas_alteradas):
+    return (
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_pagamentos_resumo_insercao
+        AFTER INSERT ON {tabela}
+        BEGIN
+            {SQL_SOMAR_RECEITA.format(**colunas('NEW'), sinal='')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_pagamentos_resumo_exclusao
+        AFTER DELETE ON {tabela}
+        BEGIN
+            {SQL_SOMAR_RECEITA.format(**colunas('OLD'), sinal='-')}
+            {SQL_LIMPAR_RECEITA.format(**colunas('OLD'))}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_pagamentos_resumo_alteracao
+        AFTER UPDATE OF {colunas_alteradas} ON {tabela}
+        BEGIN
+            {SQL_SOMAR_RECEITA.format(**colunas('OLD'), sinal='-')}
+            {SQL_SOMAR_RECEITA.format(**colunas('NEW'), sinal='')}
+            {SQL_LIMPAR_RECEITA.format(**colunas('OLD'))}
+        END
+        ''',
+    )
+
+SQL_GATILHOS_VENCIMENTOS = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_ultimo_pagamento_resumo_insercao
+    AFTER INSERT ON ultimo_pagamento
+    BEGIN
+        {SQL_SOMAR_VENCIMENTO.format(r='NEW', sinal='')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_ultimo_pagamento_resumo_exclusao
+    AFTER DELETE ON ultimo_pagamento
+    BEGIN
+        {SQL_SOMAR_VENCIMENTO.format(r='OLD', sinal='-')}
+        {SQL_LIMPAR_VENCIMENTO.format(r='OLD')}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_ultimo_pagamento_resumo_alteracao
+    AFTER UPDATE OF unidade, data_vencimento ON ultimo_pagamento
+    BEGIN
+        {SQL_SOMAR_VENCIMENTO.format(r='OLD', sinal='-')}
+        {SQL_SOMAR_VENCIMENTO.format(r='NEW', sinal='')}
+        {SQL_LIMPAR_VENCIMENTO.format(r='OLD')}
+    END
+    ''',
+)
+
+SQL_GATILHOS = _gatilhos_receita('pagamentos', _colunas_texto, 'unidade, plano, data_pagamento, valor') + SQL_GATILHOS_VENCIMENTOS
+SQL_GATILHOS_BASE = _gatilhos_receita('pagamentos_base', _colunas_base, 'unidade, plano, data_pagamento, valor_centavos')
+
+# Mesmos agrupamentos calculados direto das tabelas de origem (reconstrução e conferência)
+SQL_RECEITA_ORIGEM = '''
+    SELECT IFNULL(unidade, '') AS unidade, IFNULL(plano, '') AS plano,
+           IFNULL(substr(data_pagamento, 1, 7), '') AS mes, COUNT(*) AS quantidade, SUM(IFNULL(valor, 0)) AS total
+    FROM pagamentos
+    GROUP BY 1, 2, 3
+'''
+# Na tabela compacta (versão 9) a soma é feita em centavos sobre os códigos e só os grupos são decodificados;
+# NOT INDEXED lê a tabela em sequência (pelo índice de unidade cada linha seria uma busca fora de ordem)
+SQL_RECEITA_ORIGEM_BASE = f'''
+    SELECT IFNULL(u.nome, '') AS unidade, IFNULL(pl.nome, '') AS plano,
+           IFNULL({pagamentos.sql_mes('p.data_pagamento')}, '') AS mes, SUM(p.quantidade) AS quantidade,
+           SUM(p.centavos) / 100.0 AS total
+    FROM (
+        SELECT unidade, plano, data_pagamento, COUNT(*) AS quantidade, SUM(IFNULL(valor_centavos, 0)) AS centavos
+        FROM pagamentos_base NOT INDEXED
+        GROUP BY 1, 2, 3
+    ) p
+    LEFT JOIN unidades u ON u.codigo = p.unidade
+    LEFT JOIN planos pl ON pl.codigo = p.plano
+    GROUP BY 1, 2, 3
+'''
+SQL_VENCIMENTOS_ORIGEM = '''
+    SELECT IFNULL(unidade, '') AS unidade, data_vencimento, COUNT(*) AS quantidade
+    FROM ultimo_pagamento
+    GROUP BY 1, 2
+'''
+# Na tabela compacta o último pagamento de cada aluno sai do histórico, não de ultimo_pagamento: a conferência
+# pega também o que os gatilhos de ultimo_pagamento deixarem para trás
+SQL_ULTIMO_PAGAMENTO_ORIGEM_BASE = f'''
+    SELECT matricula, codigo_pagamento, {pagamentos.sql_unidade('unidade')} AS unidade,
+           {pagamentos.sql_data('data_vencimento')} AS data_vencimento
+    FROM ({vencimentos.SQL_ULTIMOS_BASE.format(filtro='')})
+'''
+SQL_VENCIMENTOS_ORIGEM_BASE = f'''
+    SELECT IFNULL(unidade, '') AS unidade, data_vencimento, COUNT(*) AS quantidade
+    FROM ({SQL_ULTIMO_PAGAMENTO_ORIGEM_BASE})
+    GROUP BY 1, 2
+'''
+
+# Colunas comparadas na conferência (o total é arredondado em centavos para ignorar erro de ponto flutuante)
+CONFERENCIAS = {
+    "resumo_receita": "unidade, plano, mes, quantidade, ROUND(total, 2)",
+    "resumo_vencimentos": "unidade, data_vencimento, quantidade",
+    "ultimo_pagamento": "matricula, codigo_pagamento, unidade, data_vencimento",
+}
+
+# Função para escolher as consultas de origem conforme a versão do esquema de pagamentos
+def _origens(conn):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'pagamentos_base'").fetchone() is None:
+        return {"resumo_receita": SQL_RECEITA_ORIGEM, "resumo_vencimentos": SQL_VENCIMENTOS_ORIGEM}
+    return {
+        "resumo_receita": SQL_RECEITA_ORIGEM_BASE,
+        "resumo_vencimentos": SQL_VENCIMENTOS_ORIGEM_BASE,
+        "ultimo_pagamento": SQL_ULTIMO_PAGAMENTO_ORIGEM_BASE,
+    }
+
+# Função para reconstruir os resumos a partir do histórico de pagamentos
+# Na tabela compacta ultimo_pagamento também é refeito, antes dos resumos que dependem dele
+def reconstruir_resumos(conn):
+    origens = _origens(conn)
+    if "ultimo_pagamento" in origens:
+        vencimentos.recalcular_ultimo_pagamento(conn)
+    conn.execute("DELETE FROM resumo_receita")
+    conn.execute("DELETE FROM resumo_vencimentos")
+    conn.execute(f"INSERT INTO resumo_receita (unidade, plano, mes, quantidade, total) {origens['resumo_receita']}")
+    conn.execute(f"INSERT INTO resumo_vencimentos (unidade, data_vencimento, quantidade) {origens['resumo_vencimentos']}")
+
+# Migração: cria os resumos, os gatilhos que os mantêm e preenche com o histórico atual
+def criar_estrutura(conn):
+    conn.execute(SQL_RESUMO_RECEITA)
+    conn.execute(SQL_RESUMO_VENCIMENTOS)
+    for sql in SQL_GATILHOS:
+        conn.execute(sql)
+    reconstruir_resumos(conn)
+
+# Migração da tabela compacta: os gatilhos de receita passam a observar pagamentos_base
+# (os da tabela antiga somem com ela) e os totais são refeitos com os valores já em centavos
+def criar_gatilhos_base(conn):
+    for sql in SQL_GATILHOS_BASE:
+        conn.execute(sql)
+    reconstruir_resumos(conn)
+
+# Função para conferir os resumos com as tabelas de origem
+# Devolve as linhas divergentes de cada resumo (vazio quando está tudo certo)
+def verificar_resumos(conn):
+    divergencias = {}
+    for tabela, sql_origem in _origens(conn).items():
+        colunas = CONFERENCIAS[tabela]
+        resumo = f"SELECT {colunas} FROM {tabela}"
+        origem = f"SELECT {colunas} FROM ({sql_origem})"
+        linhas = conn.execute(f'''
+            SELECT 'só no resumo', * FROM ({resumo} EXCEPT {origem})
+            UNION ALL
+            SELECT 'só na origem', * FROM ({origem} EXCEPT {resumo})
+        ''').fetchall()
+        if linhas:
+            divergencias[tabela] = linhas
+    return divergencias
+
+# Função para contar os alunos ativos (vencimento a partir de hoje) e atrasados, por unidade
+def contar_situacao(conn, hoje=None):
+    return pd.read_sql_query('''
+        SELECT unidade,
+               SUM(CASE WHEN data_vencimento >= :hoje THEN quantidade ELSE 0 END) AS ativos,
+               SUM(CASE WHEN data_vencimento < :hoje THEN quantidade ELSE 0 END) AS atrasados
+        FROM resumo_vencimentos
+        GROUP BY unidade
+    ''', conn, params={'hoje': (hoje or date.today()).strftime('%Y-%m-%d')})
+
+# Função para consultar a receita e a quantidade de pagamentos por mês, unidade e plano a partir de um mês
+def consultar_receita(conn, mes_inicial):
+    return pd.read_sql_query('''
+        SELECT mes, unidade, plano, quantidade, total
+        FROM resumo_receita
+        WHERE mes >= ?
+        ORDER BY mes, unidade, plano
+    ''', conn, params=(mes_inicial,))
+
+# Permite reconstruir ou conferir os resumos fora do Streamlit
+if __name__ == "__main__":
+    import migracoes
+
+    parser = argparse.ArgumentParser(description="Resumos de receita e vencimentos")
+    parser.add_argument("acao", choices=["verificar", "reconstruir"])
+    args = parser.parse_args()
+
+    migracoes.garantir_esquema()
+    if args.acao == "reconstruir":
+        with banco.transacao(altera=('pagamentos', 'ultimo_pagamento')) as conn:
+            reconstruir_resumos(conn)
+        print("Resumos reconstruídos.")
+
+    with banco.conexao() as conn:
+        divergencias = verificar_resumos(conn)
+    for tabela, linhas in divergencias.items():
+        print(f"{tabela}: {len(linhas)} linhas divergentes")
+        for linha in linhas[:20]:
+            print("   ", linha)
+    if not divergencias:
+        print("Resumos consistentes com as tabelas de origem.")
+    raise SystemExit(1 if divergencias else 0)
@@ -0,0 +1,117 @@
+# Verificação de saúde do app para o balanceador e o docker compose (modo com vários workers)
+# Confere se cada banco abre, responde e está no modo WAL, se o cache compartilhado responde e se os workers
+# do Streamlit respondem em /_stcore/health. Um endereço de worker com vários IPs (serviço escalado no compose)
+# é conferido em cada IP.
+# Uso: python saude.py                                   confere os bancos (sai com 1 se algo falhar)
+#      python saude.py --workers localhost:8501          confere também os workers (healthcheck do container)
+#      python saude.py servir --porta 8081 --workers worker:8501   GET /saude em JSON (200 ou 503)
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import banco
+import cache_compartilhado
+
+BANCOS = (banco.BANCO_PRINCIPAL, banco.BANCO_USUARIOS, banco.BANCO_TREINOS)
+TIMEOUT_S = 2
+CAMINHO_SAUDE = "/saude"
+
+
+# Somente leitura: a verificação nunca cria um banco vazio nem espera pelo lock de escrita
+def verificar_banco(caminho):
+    if not os.path.exists(caminho):
+        return {'ok': False, 'erro': "arquivo não encontrado"}
+    try:
+        conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, timeout=TIMEOUT_S)
+        try:
+            modo = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return {'ok': False, 'erro': str(e)}
+    # Vários processos gravando no mesmo arquivo pedem WAL: no modo rollback os leitores esperam as escritas
+    if modo != 'wal':
+        return {'ok': False, 'journal_mode': modo, 'erro': "banco fora do modo WAL"}
+    return {'ok': True, 'journal_mode': modo}
+
+def verificar_cache():
+    if not cache_compartilhado.ARQUIVO:
+        return {'ok': True, 'ativo': False}
+    resultado = verificar_banco(cache_compartilhado.ARQUIVO)
+    if not resultado['ok'] and resultado.get('erro') == "arquivo não encontrado":
+        return {'ok': True, 'ativo': True, 'aviso': "criado pelo primeiro worker que ler"}
+    return {**resultado, 'ativo': True}
+
+# Função para conferir um endereço host:porta de worker em todos os IPs para os quais ele resolve
+def verificar_worker(endereco):
+    host, _, porta = endereco.rpartition(':')
+    try:
+        ips = sorted({info[4][0] for info in socket.getaddrinfo(host, int(porta), type=socket.SOCK_STREAM)})
+    except (OSError, ValueError) as e:
+        return {endereco: {'ok': False, 'erro': str(e)}}
+    resultados = {}
+    for ip in ips:
+        url = f"http://{ip if ':' not in ip else f'[{ip}]'}:{porta}/_stcore/health"
+        try:
+            with urllib.request.urlopen(url, timeout=TIMEOUT_S) as resposta:
+                resultados[f"{ip}:{porta}"] = {'ok': resposta.status == 200}
+        except OSError as e:
+            resultados[f"{ip}:{porta}"] = {'ok': False, 'erro': str(e)}
+    return resultados
+
+def verificar(workers=()):
+    bancos = {caminho: verificar_banco(caminho) for caminho in BANCOS}
+    cache = verificar_cache()
+    instancias = {}
+    for endereco in workers:
+        instancias.update(verificar_worker(endereco))
+    return {
+        'ok': all(resultado['ok'] for resultado in (*bancos.values(), cache, *instancias.values())),
+        'verificado_em': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'bancos': bancos,
+        'cache_compartilhado': cache,
+        'workers': instancias,
+    }
+
+
+def servir(porta, workers):
+    class Saude(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != CAMINHO_SAUDE:
+                self.send_error(404)
+                return
+            resultado = verificar(workers)
+            corpo = json.dumps(resultado, ensure_ascii=False).encode('utf-8')
+            self.send_response(200 if resultado['ok'] else 503)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("", porta), Saude).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificação de saúde dos bancos e dos workers")
+    parser.add_argument("acao", nargs="?", choices=["verificar", "servir"], default="verificar")
+    parser.add_argument("--workers", default="", help="endereços host:porta separados por vírgula")
+    parser.add_argument("--porta", type=int, default=8081)
+    args = parser.parse_args()
+    workers = [endereco for endereco in args.workers.split(",") if endereco]
+
+    if args.acao == "servir":
+        servir(args.porta, workers)
+    else:
+        resultado = verificar(workers)
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        raise SystemExit(0 if resultado['ok'] else 1)
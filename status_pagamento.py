@@ -0,0 +1,69 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+ATRASADO = "Atrasado"
+EM_DIA = "Em dia"
+DATA_INVALIDA = "Data inválida"
+
+# Quantidade de meses coberta por cada plano
+PERIODICIDADE_MESES = {
+    'mensal': 1,
+    'trimestral': 3,
+    'semestral': 6,
+    'anual': 12
+}
+
+# Função para converter a coluna de datas de pagamento de uma só vez
+def converter_datas(datas_pagamento):
+    datas = pd.Series(datas_pagamento)
+    if pd.api.types.is_datetime64_any_dtype(datas):
+        return datas
+    return pd.to_datetime(datas, format='%Y-%m-%d', errors='coerce')
+
+# Função para converter a coluna de planos em quantidade de meses (NaN quando o plano não existe)
+def converter_planos(planos):
+    return pd.Series(planos).str.lower().map(PERIODICIDADE_MESES)
+
+# Função para somar os meses do plano às datas já convertidas (NaT quando não há vencimento)
+def _somar_meses(datas, meses):
+    dias = datas.to_numpy(dtype='datetime64[D]')
+    inicio_mes = dias.astype('datetime64[M]')
+    dia_no_mes = dias - inicio_mes.astype('datetime64[D]')
+
+    # Mesmo comportamento do relativedelta: o dia é limitado ao último dia do mês de destino
+    mes_destino = inicio_mes + meses.fillna(0).to_numpy(dtype='int64').astype('timedelta64[M]')
+    inicio_destino = mes_destino.astype('datetime64[D]')
+    dias_no_mes = (mes_destino + 1).astype('datetime64[D]') - inicio_destino
+    vencimentos = inicio_destino + np.minimum(dia_no_mes, dias_no_mes - 1)
+
+    vencimentos[meses.isna().to_numpy()] = np.datetime64('NaT')
+    return vencimentos
+
+# Função para calcular o próximo vencimento de todas as linhas com aritmética de meses vetorizada
+def calcular_vencimentos(datas_pagamento, planos):
+    datas = converter_datas(datas_pagamento)
+    meses = converter_planos(planos)
+    return pd.Series(_somar_meses(datas, meses), index=datas.index)
+
+# Função para calcular o próximo vencimento de um único pagamento (None quando não há vencimento)
+def proximo_vencimento(data_pagamento, plano):
+    vencimento = calcular_vencimentos([data_pagamento], [plano]).iloc[0]
+    return None if pd.isna(vencimento) else vencimento.date()
+
+# Função para calcular o status de todas as linhas comparando com um único "hoje"
+def calcular_status(datas_pagamento, planos, hoje=None):
+    datas = converter_datas(datas_pagamento)
+    meses = converter_planos(planos)
+    vencimentos = _somar_meses(datas, meses)
+    hoje = np.datetime64(hoje or date.today(), 'D')
+
+    status = np.where(vencimentos < hoje, ATRASADO, EM_DIA).astype(object)
+    status[meses.isna().to_numpy()] = None
+    status[datas.isna().to_numpy()] = DATA_INVALIDA
+    return pd.Series(status, index=datas.index)
+
+# Função para calcular o status de um único pagamento com o mesmo motor
+def status_pagamento(data_pagamento, plano, hoje=None):
+    return calcular_status([data_pagamento], [plano], hoje).iloc[0]
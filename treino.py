@@ -1,220 +1,225 @@
-import sqlite3
-import streamlit as st
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-import pandas as pd
-
-# Função para criar as tabelas necessárias
-def criar_tabelas():
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    
-    # Criar tabela de alunos
-    c.execute(''' 
-        CREATE TABLE IF NOT EXISTS alunos (
-            matricula INTEGER PRIMARY KEY AUTOINCREMENT,
-            unidade TEXT NOT NULL,
-            nome TEXT NOT NULL,
-            cpf TEXT NOT NULL UNIQUE,
-            data_nascimento DATE,
-            endereco TEXT,
-            telefone TEXT,
-            email TEXT
-        )
-    ''')
-
-    # Criar tabela de pagamentos
-    c.execute(''' 
-        CREATE TABLE IF NOT EXISTS pagamentos (
-            codigo_pagamento INTEGER PRIMARY KEY AUTOINCREMENT,
-            matricula INTEGER,
-            unidade TEXT NOT NULL,
-            nome TEXT,
-            cpf TEXT,
-            data_pagamento DATE,
-            plano TEXT,
-            valor REAL,
-            status TEXT,
-            FOREIGN KEY (matricula) REFERENCES alunos (matricula)
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
-
-# Função para buscar aluno
-def buscar_aluno(busca_por, valor):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    
-    if busca_por == "Matrícula":
-        c.execute("SELECT * FROM alunos WHERE matricula = ?", (valor,))
-    elif busca_por == "Nome":
-        c.execute("SELECT * FROM alunos WHERE nome LIKE ?", ('%' + valor + '%',))
-    elif busca_por == "CPF":
-        c.execute("SELECT * FROM alunos WHERE cpf = ?", (valor,))
-    
-    aluno = c.fetchone()
-    conn.close()
-    return aluno
-
-# Função para calcular o status do próximo pagamento com base no plano
-def alerta_proximo_pagamento(data_pagamento, plano):
-    if isinstance(data_pagamento, str):
-        for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
-            try:
-                data_pagamento = datetime.strptime(data_pagamento, fmt)
-                break
-            except ValueError:
-                continue
-    elif isinstance(data_pagamento, date):
-        data_pagamento = datetime.combine(data_pagamento, datetime.min.time())
-    else:
-        return None
-
-    periodicidade_meses = {
-        'mensal': 1,
-        'trimestral': 3,
-        'semestral': 6,
-        'anual': 12
-    }
-
-    plano = plano.lower()
-    if plano not in periodicidade_meses:
-        return None
-
-    proximo_pagamento = data_pagamento + relativedelta(months=periodicidade_meses[plano])
-    hoje = datetime.now()
-
-    return "Atrasado" if proximo_pagamento < hoje else "Em dia"
-
-# Função para registrar pagamento
-def registrar_pagamento(matricula, unidade, nome, cpf, data_pagamento, plano, valor):
-    conn = sqlite3.connect('database.db')
-    c = conn.cursor()
-    try:
-        data_pagamento_str = data_pagamento.strftime('%Y-%m-%d')
-        
-        status = alerta_proximo_pagamento(data_pagamento, plano)
-        
-        if status == "Atrasado":
-            status = "Pago"
-        
-        c.execute(''' 
-            INSERT INTO pagamentos (matricula, unidade, nome, cpf, data_pagamento, plano, valor, status) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (matricula, unidade, nome, cpf, data_pagamento_str, plano, valor, status))
-
-        conn.commit()
-        codigo_pagamento = c.lastrowid
-        st.write(f"Dados inseridos: {codigo_pagamento}, {matricula}, {unidade}, {nome}, {cpf}, {data_pagamento}, {plano}, {valor}")
-    except sqlite3.Error as e:
-        st.write(f"Erro ao registrar pagamento: {e}")
-        return None
-    finally:
-        conn.close()
-        
-    return codigo_pagamento
-
-# Função para limpar os campos após registrar o pagamento
-def limpar_campos():
-    st.session_state.aluno_encontrado = None
-    st.session_state.valor_mensalidade = 0.0
-
-# Interface do Streamlit
-
-
-# Criar tabelas se não existirem
-criar_tabelas()
-
-# Definir as abas
-tab1, tab2, tab3 = st.tabs(["\U0001F4C1 Dados Gerais", "\U0001F4C1 Inserir", "\U0001F4C1 Editar/Excluir"])
-
-# Aba de dados gerais com filtro e busca específica
-with tab1:
-    conn = sqlite3.connect('database.db')
-    
-    try:
-        st.write("Consulta Pagamentos")
-        col1,col2 =st.columns(2)
-        with col1:
-         busca = st.selectbox("Buscar por", ["Matrícula", "Nome", "CPF"], key="busca_aba1")
-        with col2:
-         valor_busca = st.text_input("Valor",placeholder='Insira para pesquisar')
-
-        if st.button("\U0001F50DPesquisar"):
-            if valor_busca:
-                if busca == "Matrícula":
-                    query = "SELECT * FROM pagamentos WHERE matricula = ?"
-                    pagamentos = pd.read_sql_query(query, conn, params=(valor_busca,))
-                elif busca == "Nome":
-                    query = "SELECT * FROM pagamentos WHERE nome LIKE ?"
-                    pagamentos = pd.read_sql_query(query, conn, params=('%' + valor_busca + '%',))
-                elif busca == "CPF":
-                    query = "SELECT * FROM pagamentos WHERE cpf = ?"
-                    pagamentos = pd.read_sql_query(query, conn, params=(valor_busca,))
-                
-                if not pagamentos.empty:
-                    pagamentos['data_pagamento'] = pd.to_datetime(pagamentos['data_pagamento'], format='%Y-%m-%d', errors='coerce')
-                    pagamentos_exibicao = pagamentos[['matricula', 'nome', 'cpf', 'plano', 'unidade', 'data_pagamento', 'valor', 'status']].rename(columns={
-                        'data_pagamento': 'Data de Pagamento',
-                        'valor': 'Valor da Mensalidade',
-                        'status': 'Status'
-                    })
-                    st.dataframe(pagamentos_exibicao)
-                else:
-                    st.warning("Nenhum pagamento encontrado para a busca realizada.")
-            else:
-                st.warning("Por favor, insira um valor para busca.")
-    except Exception as e:
-        st.error(f"Ocorreu um erro ao carregar os dados: {str(e)}")
-    finally:
-        conn.close()
-
-# Aba de inserção de dados
-with tab2:
-    busca_por = st.selectbox("Buscar por", ["Matrícula", "Nome", "CPF"], key="busca_aba2")
-    valor = st.text_input("Insira o valor para buscar", key="valor_busca_aba2")
-
-    if "aluno_encontrado" not in st.session_state:
-        st.session_state.aluno_encontrado = None
-
-    if st.button("\U0001F50D Buscar", key="buscar_aba2"):
-        if valor:
-            aluno = buscar_aluno(busca_por, valor)
-            if aluno:
-                st.session_state.aluno_encontrado = aluno
-                matricula, unidade, nome, cpf, *_ = aluno
-                st.success(f"Aluno encontrado: {nome} - CPF: {cpf}")
-            else:
-                st.error("Aluno não encontrado.")
-        else:
-            st.warning("Por favor, insira um valor para buscar.")
-
-    if st.session_state.aluno_encontrado:
-        matricula, unidade, nome, cpf, *_ = st.session_state.aluno_encontrado
-
-        st.text_input("Matrícula", value=matricula, disabled=True, key="matricula_aba2")
-        st.text_input("Nome", value=nome, disabled=True, key="nome_aba2")
-        st.text_input("CPF", value=cpf, disabled=True, key="cpf_aba2")
-        st.text_input("Unidade", value=unidade, disabled=True, key="unidade_aba2")
-
-        data_pagamento = st.date_input("Data de Pagamento", value=datetime.today(), key="data_pagamento_aba2")
-        plano = st.selectbox("Plano", ["Mensal", "Trimestral", "Semestral", "Anual"], key="plano_aba2")
-        valor_mensalidade = st.number_input("Valor da Mensalidade", min_value=0.0, step=0.01, key="valor_mensalidade_aba2")
-
-        if st.button("\U0001F4E5 Registrar Pagamento", key="registrar_pagamento_aba2"):
-            if valor_mensalidade <= 0:
-                st.error("Por favor, insira um valor de mensalidade válido.")
-            else:
-                codigo = registrar_pagamento(matricula, unidade, nome, cpf, data_pagamento, plano, valor_mensalidade)
-                if codigo:
-                    st.success(f"Pagamento registrado com sucesso! Código de pagamento: {codigo}")
-                    limpar_campos()
-                else:
-                    st.error("Erro ao registrar pagamento.")
-
-# Aba de edição e exclusão
-with tab3:
-    st.write("Funções para edição e exclusão ainda não implementadas.")
-
+import sqlite3
+import streamlit as st
+from datetime import date, datetime
+import pandas as pd
+
+import banco
+import busca_alunos
+import catraca
+import componentes
+import conciliacao
+import escrita
+import migracoes
+import pagamentos
+import perfil
+import status_pagamento
+
+# Função para buscar aluno
+def buscar_aluno(busca_por, valor):
+    with banco.conexao() as conn:
+        c = conn.cursor()
+
+        # Colunas explícitas: a ordem física da tabela varia entre os bancos existentes
+        colunas = "matricula, unidade, nome, cpf, data_nascimento, endereco, telefone, email"
+        if busca_por == "Matrícula":
+            c.execute(f"SELECT {colunas} FROM alunos WHERE matricula = ?", (valor,))
+        elif busca_por == "Nome":
+            c.execute(f"SELECT {colunas} FROM alunos WHERE matricula = ?", (busca_alunos.melhor_matricula(valor),))
+        elif busca_por == "CPF":
+            c.execute(f"SELECT {colunas} FROM alunos WHERE cpf = ?", (valor,))
+
+        aluno = c.fetchone()
+    return aluno
+
+# Função para calcular o status do próximo pagamento com base no plano
+def alerta_proximo_pagamento(data_pagamento, plano):
+    if isinstance(data_pagamento, str):
+        for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+            try:
+                data_pagamento = datetime.strptime(data_pagamento, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    elif not isinstance(data_pagamento, date):
+        return None
+
+    status = status_pagamento.status_pagamento(pd.Timestamp(data_pagamento).normalize(), plano)
+    return status if status != status_pagamento.DATA_INVALIDA else None
+
+# Função para registrar pagamento
+def registrar_pagamento(matricula, unidade, nome, cpf, data_pagamento, plano, valor):
+    try:
+        data_pagamento_str = data_pagamento.strftime('%Y-%m-%d')
+        data_vencimento = status_pagamento.proximo_vencimento(data_pagamento_str, plano)
+        data_vencimento_str = data_vencimento.strftime('%Y-%m-%d') if data_vencimento else None
+        
+        status = alerta_proximo_pagamento(data_pagamento, plano)
+        
+        if status == "Atrasado":
+            status = "Pago"
+
+        # Nome e CPF não são gravados no pagamento: vêm sempre do cadastro do aluno
+        codigo_pagamento = escrita.executar(
+            pagamentos.inserir, (matricula, unidade, data_pagamento_str, plano, valor, status, data_vencimento_str),
+            altera=('pagamentos',))
+        catraca.obter_indice().registrar_pagamento(matricula, data_vencimento_str)
+        st.write(f"Dados inseridos: {codigo_pagamento}, {matricula}, {unidade}, {nome}, {cpf}, {data_pagamento}, {plano}, {valor}")
+    except sqlite3.Error as e:
+        st.write(f"Erro ao registrar pagamento: {e}")
+        return None
+        
+    return codigo_pagamento
+
+# Função para limpar os campos após registrar o pagamento
+def limpar_campos():
+    st.session_state.aluno_encontrado = None
+    st.session_state.valor_mensalidade = 0.0
+
+# Interface do Streamlit
+def render():
+    # Criar tabelas se não existirem
+    migracoes.garantir_esquema()
+
+    # Definir as abas
+    tab1, tab2, tab3, tab4 = st.tabs(["\U0001F4C1 Dados Gerais", "\U0001F4C1 Inserir", "\U0001F4C1 Editar/Excluir", "\U0001F4C1 Conciliação"])
+
+    # Aba de dados gerais com filtro e busca específica
+    with tab1:
+        try:
+            st.write("Consulta Pagamentos")
+            col1,col2 =st.columns(2)
+            with col1:
+             busca = st.selectbox("Buscar por", ["Matrícula", "Nome", "CPF"], key="busca_aba1")
+            with col2:
+             valor_busca = st.text_input("Valor",placeholder='Insira para pesquisar')
+
+            if st.button("\U0001F50DPesquisar"):
+                if valor_busca:
+                    with banco.conexao() as conn:
+                        if busca == "Matrícula":
+                            query = "SELECT * FROM pagamentos WHERE matricula = ?"
+                            pagamentos = pd.read_sql_query(query, conn, params=(valor_busca,))
+                        elif busca == "Nome":
+                            # Nome pelo índice de texto completo, pagamentos pelo índice de matrícula
+                            query = """
+                                SELECT * FROM pagamentos WHERE matricula IN (
+                                    SELECT rowid FROM alunos_fts WHERE alunos_fts MATCH ?
+                                )
+                            """
+                            pagamentos = pd.read_sql_query(query, conn, params=(busca_alunos.montar_expressao(valor_busca),))
+                        elif busca == "CPF":
+                            query = "SELECT * FROM pagamentos WHERE cpf = ?"
+                            pagamentos = pd.read_sql_query(query, conn, params=(valor_busca,))
+
+                    if not pagamentos.empty:
+                        with perfil.secao('dataframe'):
+                            pagamentos['data_pagamento'] = pd.to_datetime(pagamentos['data_pagamento'], format='%Y-%m-%d', errors='coerce')
+                            pagamentos_exibicao = pagamentos[['matricula', 'nome', 'cpf', 'plano', 'unidade', 'data_pagamento', 'valor', 'status']].rename(columns={
+                                'data_pagamento': 'Data de Pagamento',
+                                'valor': 'Valor da Mensalidade',
+                                'status': 'Status'
+                            })
+                        perfil.exibir_dataframe(pagamentos_exibicao)
+                    else:
+                        st.warning("Nenhum pagamento encontrado para a busca realizada.")
+                else:
+                    st.warning("Por favor, insira um valor para busca.")
+        except Exception as e:
+            st.error(f"Ocorreu um erro ao carregar os dados: {str(e)}")
+
+    # Aba de inserção de dados
+    with tab2:
+        busca_por = st.selectbox("Buscar por", ["Matrícula", "Nome", "CPF"], key="busca_aba2")
+        valor = st.text_input("Insira o valor para buscar", key="valor_busca_aba2")
+
+        if "aluno_encontrado" not in st.session_state:
+            st.session_state.aluno_encontrado = None
+
+        if st.button("\U0001F50D Buscar", key="buscar_aba2"):
+            if valor:
+                if busca_por == "Nome":
+                    # Vários alunos podem ter o mesmo nome: a escolha é feita na lista abaixo
+                    componentes.iniciar_busca(valor, "pagamento")
+                else:
+                    st.session_state.termo_pagamento = None
+                    aluno = buscar_aluno(busca_por, valor)
+                    if aluno:
+                        st.session_state.aluno_encontrado = aluno
+                        matricula, unidade, nome, cpf, *_ = aluno
+                        st.success(f"Aluno encontrado: {nome} - CPF: {cpf}")
+                    else:
+                        st.error("Aluno não encontrado.")
+            else:
+                st.warning("Por favor, insira um valor para buscar.")
+
+        if busca_por == "Nome" and st.session_state.get("termo_pagamento"):
+            matricula_escolhida = componentes.selecionar_aluno(st.session_state.termo_pagamento, "pagamento")
+            if matricula_escolhida and st.button("Selecionar aluno", key="selecionar_aba2"):
+                st.session_state.aluno_encontrado = buscar_aluno("Matrícula", matricula_escolhida)
+
+        if st.session_state.aluno_encontrado:
+            matricula, unidade, nome, cpf, *_ = st.session_state.aluno_encontrado
+
+            st.text_input("Matrícula", value=matricula, disabled=True, key="matricula_aba2")
+            st.text_input("Nome", value=nome, disabled=True, key="nome_aba2")
+            st.text_input("CPF", value=cpf, disabled=True, key="cpf_aba2")
+            st.text_input("Unidade", value=unidade, disabled=True, key="unidade_aba2")
+
+            data_pagamento = st.date_input("Data de Pagamento", value=datetime.today(), key="data_pagamento_aba2")
+            plano = st.selectbox("Plano", ["Mensal", "Trimestral", "Semestral", "Anual"], key="plano_aba2")
+            valor_mensalidade = st.number_input("Valor da Mensalidade", min_value=0.0, step=0.01, key="valor_mensalidade_aba2")
+
+            if st.button("\U0001F4E5 Registrar Pagamento", key="registrar_pagamento_aba2"):
+                if valor_mensalidade <= 0:
+                    st.error("Por favor, insira um valor de mensalidade válido.")
+                else:
+                    codigo = registrar_pagamento(matricula, unidade, nome, cpf, data_pagamento, plano, valor_mensalidade)
+                    if codigo:
+                        st.success(f"Pagamento registrado com sucesso! Código de pagamento: {codigo}")
+                        limpar_campos()
+                    else:
+                        st.error("Erro ao registrar pagamento.")
+
+    # Aba de edição e exclusão
+    with tab3:
+        st.write("Funções para edição e exclusão ainda não implementadas.")
+
+    # Aba de conciliação do extrato bancário/PIX: cruza todas as linhas de uma vez e registra em uma transação
+    with tab4:
+        st.write("Envie o extrato do banco (CSV ou OFX). Os créditos são cruzados com os alunos pelo CPF "
+                 "ou pela matrícula informados na linha ou no histórico.")
+        arquivo_extrato = st.file_uploader("Extrato", type=["csv", "ofx"], key="arquivo_extrato")
+        plano_extrato = st.selectbox("Plano das linhas sem plano", conciliacao.PLANOS, key="plano_extrato")
+
+        if arquivo_extrato is not None and st.button("\U0001F50D Conciliar", key="conciliar_extrato"):
+            try:
+                extrato = conciliacao.ler_extrato(arquivo_extrato, arquivo_extrato.name)
+                st.session_state.conciliacao = conciliacao.conciliar(extrato, plano_extrato)
+            except (ValueError, KeyError, UnicodeDecodeError, pd.errors.ParserError) as e:
+                st.session_state.conciliacao = None
+                st.error(f"Não foi possível ler o extrato: {e}")
+
+        if st.session_state.get("conciliacao"):
+            pagamentos, revisao, resumo = st.session_state.conciliacao
+            st.write(f"{resumo['linhas']} linhas: {resumo['conciliados']} pagamentos conciliados, "
+                     f"{resumo['revisao']} para revisão e {resumo['debitos_ignorados']} débitos ignorados.")
+            if not pagamentos.empty:
+                perfil.exibir_dataframe(pagamentos[['matricula', 'nome', 'unidade', 'data_pagamento', 'plano', 'valor', 'status']],
+                                        hide_index=True)
+                if st.button(f"\U0001F4E5 Registrar {len(pagamentos)} pagamentos", key="registrar_conciliados"):
+                    try:
+                        registrados = conciliacao.registrar_conciliados(pagamentos)
+                        st.success(f"{registrados} pagamentos registrados.")
+                        st.session_state.conciliacao = (pagamentos.iloc[0:0], revisao, {**resumo, 'conciliados': 0})
+                    except sqlite3.Error as e:
+                        st.error(f"Erro ao registrar os pagamentos; nada foi gravado: {e}")
+            if not revisao.empty:
+                st.warning("Linhas para revisão (registre manualmente na aba Inserir):")
+                perfil.exibir_dataframe(revisao, hide_index=True)
+                st.download_button("Baixar linhas para revisão", revisao.to_csv(index=False, sep=';').encode('utf-8-sig'),
+                                   file_name="revisao_extrato.csv", mime="text/csv", key="baixar_revisao")
+
+if __name__ == "__main__":
+    render()
@@ -0,0 +1,233 @@
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import escrita
+import pagamentos
+import status_pagamento
+
+# Último pagamento (maior vencimento) de cada matrícula, mantido pelo gatilho de inserção
+SQL_ULTIMO_PAGAMENTO = '''
+    CREATE TABLE IF NOT EXISTS ultimo_pagamento (
+        matricula INTEGER PRIMARY KEY,
+        codigo_pagamento INTEGER NOT NULL,
+        unidade TEXT,
+        plano TEXT,
+        data_pagamento DATE,
+        data_vencimento DATE NOT NULL,
+        status TEXT
+    )
+'''
+
+SQL_GATILHO_INSERCAO = '''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_ultimo_pagamento
+    AFTER INSERT ON pagamentos
+    WHEN NEW.matricula IS NOT NULL AND NEW.data_vencimento IS NOT NULL
+    BEGIN
+        INSERT INTO ultimo_pagamento (matricula, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento, status)
+        VALUES (NEW.matricula, NEW.rowid, NEW.unidade, NEW.plano, NEW.data_pagamento, NEW.data_vencimento,
+                CASE WHEN NEW.data_vencimento < date('now', 'localtime') THEN 'Atrasado' ELSE 'Em dia' END)
+        ON CONFLICT (matricula) DO UPDATE SET
+            codigo_pagamento = excluded.codigo_pagamento,
+            unidade = excluded.unidade,
+            plano = excluded.plano,
+            data_pagamento = excluded.data_pagamento,
+            data_vencimento = excluded.data_vencimento,
+            status = excluded.status
+        WHERE excluded.data_vencimento >= ultimo_pagamento.data_vencimento;
+    END
+'''
+
+# Mesmo gatilho sobre a tabela compacta (versão 9): datas, unidade e plano voltam ao formato de ultimo_pagamento
+# Desde a versão 11 só entram matrículas cadastradas, como no recálculo dos gatilhos de exclusão e alteração
+SQL_GATILHO_INSERCAO_BASE = f'''
+    CREATE TRIGGER IF NOT EXISTS trg_pagamentos_ultimo_pagamento
+    AFTER INSERT ON pagamentos_base
+    WHEN NEW.matricula IS NOT NULL AND NEW.data_vencimento IS NOT NULL
+         AND EXISTS (SELECT 1 FROM alunos WHERE matricula = NEW.matricula)
+    BEGIN
+        INSERT INTO ultimo_pagamento (matricula, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento, status)
+        VALUES (NEW.matricula, NEW.codigo_pagamento, {pagamentos.sql_unidade('NEW.unidade')}, {pagamentos.sql_plano('NEW.plano')},
+                {pagamentos.sql_data('NEW.data_pagamento')}, {pagamentos.sql_data('NEW.data_vencimento')},
+                CASE WHEN {pagamentos.sql_data('NEW.data_vencimento')} < date('now', 'localtime') THEN 'Atrasado' ELSE 'Em dia' END)
+        ON CONFLICT (matricula) DO UPDATE SET
+            codigo_pagamento = excluded.codigo_pagamento,
+            unidade = excluded.unidade,
+            plano = excluded.plano,
+            data_pagamento = excluded.data_pagamento,
+            data_vencimento = excluded.data_vencimento,
+            status = excluded.status
+        WHERE excluded.data_vencimento >= ultimo_pagamento.data_vencimento;
+    END
+'''
+
+# Último pagamento de cada matrícula cadastrada, direto de pagamentos_base (maior vencimento; no empate, o mais
+# recente), no formato gravado; {filtro} restringe as matrículas (ex.: " AND p.matricula = OLD.matricula")
+SQL_ULTIMOS_BASE = '''
+    SELECT matricula, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento
+    FROM (
+        SELECT p.matricula, p.codigo_pagamento, p.unidade, p.plano, p.data_pagamento, p.data_vencimento,
+               ROW_NUMBER() OVER (PARTITION BY p.matricula ORDER BY p.data_vencimento DESC, p.codigo_pagamento DESC) AS ordem
+        FROM pagamentos_base p
+        JOIN alunos a ON a.matricula = p.matricula
+        WHERE p.data_vencimento IS NOT NULL{filtro}
+    )
+    WHERE ordem = 1
+'''
+
+# Comandos que recalculam ultimo_pagamento das matrículas do filtro a partir do histórico: o gatilho de inserção só
+# compara com a linha atual, mas exclusão e correção podem devolver a matrícula a um vencimento anterior
+def _sql_recalcular_ultimo(filtro_ultimo, filtro_base):
+    return (
+        f"DELETE FROM ultimo_pagamento WHERE {filtro_ultimo}",
+        f'''
+        INSERT INTO ultimo_pagamento (matricula, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento, status)
+        SELECT matricula, codigo_pagamento, {pagamentos.sql_unidade('unidade')}, {pagamentos.sql_plano('plano')},
+               {pagamentos.sql_data('data_pagamento')}, {pagamentos.sql_data('data_vencimento')},
+               CASE WHEN {pagamentos.sql_data('data_vencimento')} < date('now', 'localtime') THEN 'Atrasado' ELSE 'Em dia' END
+        FROM ({SQL_ULTIMOS_BASE.format(filtro=filtro_base)})
+        ''',
+    )
+
+def _gatilho_recalculo(nome, evento, condicao, filtro_ultimo, filtro_base):
+    comandos = ";\n".join(_sql_recalcular_ultimo(filtro_ultimo, filtro_base))
+    return f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} {condicao} BEGIN {comandos}; END"
+
+SQL_GATILHOS_RECALCULO_BASE = (
+    _gatilho_recalculo("trg_pagamentos_base_ultimo_exclusao", "AFTER DELETE ON pagamentos_base",
+                       "WHEN OLD.matricula IS NOT NULL",
+                       "matricula = OLD.matricula", " AND p.matricula = OLD.matricula"),
+    _gatilho_recalculo("trg_pagamentos_base_ultimo_alteracao",
+                       "AFTER UPDATE OF matricula, unidade, plano, data_pagamento, data_vencimento ON pagamentos_base", "",
+                       "matricula IN (OLD.matricula, NEW.matricula)", " AND p.matricula IN (OLD.matricula, NEW.matricula)"),
+)
+
+SQL_GATILHO_EXCLUSAO_ALUNO = '''
+    CREATE TRIGGER IF NOT EXISTS trg_alunos_ultimo_pagamento
+    AFTER DELETE ON alunos
+    BEGIN
+        DELETE FROM ultimo_pagamento WHERE matricula = OLD.matricula;
+    END
+'''
+
+SQL_INDICES = (
+    "CREATE INDEX IF NOT EXISTS idx_ultimo_pagamento_vencimento ON ultimo_pagamento (data_vencimento)",
+    "CREATE INDEX IF NOT EXISTS idx_pagamentos_status_vencimento ON pagamentos (status, data_vencimento)",
+)
+
+# Situação de cada aluno pelo último pagamento; o filtro de status vira uma faixa no índice de vencimento
+SQL_SITUACAO = '''
+    SELECT a.nome, u.plano, u.data_pagamento, u.data_vencimento,
+           CASE WHEN u.data_vencimento < :hoje THEN 'Atrasado' ELSE 'Em dia' END AS Status
+    FROM ultimo_pagamento u
+    JOIN alunos a ON a.matricula = u.matricula
+'''
+FILTROS_SITUACAO = {
+    "Atrasado": " WHERE u.data_vencimento < :hoje",
+    "Em dia": " WHERE u.data_vencimento >= :hoje",
+}
+
+# Função para converter a data de referência para o formato gravado no banco
+def _data_referencia(hoje=None):
+    return (hoje or date.today()).strftime('%Y-%m-%d')
+
+# Função para preencher o vencimento dos pagamentos antigos com o motor de status
+def preencher_vencimentos(conn):
+    pendentes = pd.read_sql_query(
+        "SELECT rowid AS id, data_pagamento, plano FROM pagamentos WHERE data_vencimento IS NULL", conn)
+    vencimentos = status_pagamento.calcular_vencimentos(pendentes['data_pagamento'], pendentes['plano'])
+    pendentes['data_vencimento'] = vencimentos.dt.strftime('%Y-%m-%d')
+    pendentes = pendentes.dropna(subset=['data_vencimento'])
+    conn.executemany(
+        "UPDATE pagamentos SET data_vencimento = ? WHERE rowid = ?",
+        pendentes[['data_vencimento', 'id']].itertuples(index=False, name=None),
+    )
+
+# Função para reconstruir a tabela de último pagamento a partir do histórico completo
+def reconstruir_ultimo_pagamento(conn, hoje=None):
+    conn.execute("DELETE FROM ultimo_pagamento")
+    conn.execute('''
+        INSERT INTO ultimo_pagamento (matricula, codigo_pagamento, unidade, plano, data_pagamento, data_vencimento, status)
+        SELECT matricula, id, unidade, plano, data_pagamento, data_vencimento,
+               CASE WHEN data_vencimento < ? THEN 'Atrasado' ELSE 'Em dia' END
+        FROM (
+            SELECT rowid AS id, matricula, unidade, plano, data_pagamento, data_vencimento,
+                   ROW_NUMBER() OVER (PARTITION BY matricula ORDER BY data_vencimento DESC, rowid DESC) AS ordem
+            FROM pagamentos
+            WHERE matricula IS NOT NULL AND data_vencimento IS NOT NULL
+        )
+        WHERE ordem = 1
+    ''', (_data_referencia(hoje),))
+
+# Função para criar a coluna de vencimento, a tabela de último pagamento, os gatilhos e os índices
+def criar_estrutura(conn):
+    colunas = {coluna[1] for coluna in conn.execute("PRAGMA table_info(pagamentos)")}
+    nova_coluna = 'data_vencimento' not in colunas
+    if nova_coluna:
+        conn.execute("ALTER TABLE pagamentos ADD COLUMN data_vencimento DATE")
+
+    conn.execute(SQL_ULTIMO_PAGAMENTO)
+    conn.execute(SQL_GATILHO_INSERCAO)
+    conn.execute(SQL_GATILHO_EXCLUSAO_ALUNO)
+    for sql in SQL_INDICES:
+        conn.execute(sql)
+
+    if nova_coluna:
+        preencher_vencimentos(conn)
+        reconstruir_ultimo_pagamento(conn)
+
+# Versão 9: o gatilho de ultimo_pagamento passa a observar pagamentos_base (o antigo some com a tabela)
+def criar_gatilho_base(conn):
+    conn.execute(SQL_GATILHO_INSERCAO_BASE)
+
+# Função para recalcular ultimo_pagamento inteiro a partir de pagamentos_base (os gatilhos mantêm os resumos)
+def recalcular_ultimo_pagamento(conn):
+    for comando in _sql_recalcular_ultimo("1", ""):
+        conn.execute(comando)
+
+# Versão 11: exclusão e correção de pagamentos também atualizam ultimo_pagamento; o gatilho de inserção passa a
+# ignorar matrículas sem cadastro e a tabela é refeita para corrigir o que ficou para trás
+def criar_gatilhos_recalculo(conn):
+    conn.execute("DROP TRIGGER IF EXISTS trg_pagamentos_ultimo_pagamento")
+    conn.execute(SQL_GATILHO_INSERCAO_BASE)
+    for sql in SQL_GATILHOS_RECALCULO_BASE:
+        conn.execute(sql)
+    recalcular_ultimo_pagamento(conn)
+
+# Função para consultar a situação dos alunos (Todos, Atrasado ou Em dia) em uma data
+def consultar_situacao(conn, filtro_status="Todos", hoje=None):
+    query = SQL_SITUACAO + FILTROS_SITUACAO.get(filtro_status, "")
+    return pd.read_sql_query(query, conn, params={'hoje': _data_referencia(hoje)})
+
+# Função para consultar apenas os alunos com pagamento vencido
+def consultar_atrasados(conn, hoje=None):
+    return consultar_situacao(conn, "Atrasado", hoje)
+
+def _marcar_vencidos(conn, parametros):
+    atualizados = conn.execute(f'''
+        UPDATE pagamentos_base SET status = {pagamentos.STATUS_CODIGOS['Atrasado']}
+        WHERE status = {pagamentos.STATUS_CODIGOS['Em dia']} AND data_vencimento < {pagamentos.sql_dias('?')}
+    ''', parametros).rowcount
+    conn.execute(
+        "UPDATE ultimo_pagamento SET status = 'Atrasado' WHERE status = 'Em dia' AND data_vencimento < ?",
+        parametros)
+    return atualizados
+
+# Função para atualizar, em lote, o status gravado dos pagamentos que passaram do vencimento
+def atualizar_status_vencidos(hoje=None):
+    return escrita.executar(_marcar_vencidos, (_data_referencia(hoje),), altera=('pagamentos',))
+
+# Roda o recálculo no máximo uma vez por dia em cada processo
+@st.cache_resource
+def _recalculo_do_dia(dia):
+    return atualizar_status_vencidos()
+
+def executar_recalculo_periodico():
+    return _recalculo_do_dia(date.today().isoformat())
+
+# Permite agendar o recálculo fora do Streamlit (ex.: cron diário)
+if __name__ == "__main__":
+    import migracoes
+    migracoes.garantir_esquema()
+    print(f"Pagamentos atualizados para 'Atrasado': {atualizar_status_vencidos()}")